@@ -13,7 +13,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 # Importar los modelos SQLAlchemy
-from src.models import user, invoice  # noqa
+from src.models import user, invoice, partner, system_settings, activity_log, raw_extraction, idempotency_key  # noqa
 from src.core.config import settings
 from src.models.base import Base
 
@@ -21,9 +21,13 @@ from src.models.base import Base
 # access to the values within the .ini file in use.
 config = context.config
 
+# Conexión abierta por la aplicación al migrar en el arranque (src.core.migrations)
+app_connection = config.attributes.get("connection")
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# Desde la aplicación no se reconfigura el logging del proceso
+if config.config_file_name is not None and app_connection is None:
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -72,6 +76,13 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    if app_connection is not None:
+        # La transacción (y el advisory lock) la maneja quien llama
+        context.configure(connection=app_connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     configuration = config.get_section(config.config_ini_section)
     configuration["sqlalchemy.url"] = get_url()
     
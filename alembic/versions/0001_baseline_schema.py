@@ -0,0 +1,298 @@
+"""Esquema base (tablas que creaba init_db con create_all)
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# Las bases existentes ya tienen estas tablas (creadas en cada arranque con
+# `Base.metadata.create_all`); por eso cada tabla se crea solo si falta y a las
+# tablas antiguas se les agregan las columnas e índices que `create_all` nunca
+# agrega a una tabla existente. Una base nueva y una heredada terminan iguales.
+
+
+def _tables() -> set:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _columns(table: str) -> set:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _create_users() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("full_name", sa.String(255), nullable=False),
+        sa.Column("role", sa.String(50), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("token_version", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("profile_photo_url", sa.String(500), nullable=True),
+        sa.Column("phone", sa.String(20), nullable=True),
+        sa.Column("address", sa.Text(), nullable=True),
+        sa.Column("birth_date", sa.DateTime(), nullable=True),
+        sa.Column("position", sa.String(100), nullable=True),
+        sa.Column("department", sa.String(100), nullable=True),
+        sa.Column("hire_date", sa.DateTime(), nullable=True),
+        sa.Column("salary", sa.Integer(), nullable=True),
+        sa.Column("preferences", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+
+def _create_partners() -> None:
+    op.create_table(
+        "partners",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False, unique=True),
+        sa.Column("email", sa.String(255), nullable=True),
+        sa.Column("phone", sa.String(50), nullable=True),
+        sa.Column("cuit", sa.String(20), nullable=True, unique=True),
+        sa.Column("address", sa.Text(), nullable=True),
+        sa.Column("city", sa.String(100), nullable=True),
+        sa.Column("province", sa.String(100), nullable=True),
+        sa.Column("postal_code", sa.String(20), nullable=True),
+        sa.Column("contact_person", sa.String(255), nullable=True),
+        sa.Column("business_type", sa.String(100), nullable=True),
+        sa.Column("tax_category", sa.String(50), nullable=True),
+        sa.Column("payment_terms", sa.String(100), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("fiscal_data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_partners_id", "partners", ["id"])
+
+
+def _create_invoices() -> None:
+    op.create_table(
+        "invoices",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("tipo_factura", sa.String(1), nullable=True),
+        sa.Column("numero_factura", sa.String(50), nullable=True),
+        sa.Column("cuit", sa.String(13), nullable=True),
+        sa.Column("razon_social", sa.String(255), nullable=True),
+        sa.Column("fecha_emision", sa.Date(), nullable=True),
+        sa.Column("fecha_vencimiento", sa.Date(), nullable=True),
+        sa.Column("upload_date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("subtotal", sa.DECIMAL(15, 2), nullable=True),
+        sa.Column("iva_porcentaje", sa.DECIMAL(5, 2)),
+        sa.Column("iva_monto", sa.DECIMAL(15, 2), nullable=True),
+        sa.Column("otros_impuestos", sa.DECIMAL(15, 2)),
+        sa.Column("total", sa.DECIMAL(15, 2), nullable=True),
+        sa.Column("moneda", sa.String(3)),
+        sa.Column("invoice_direction", sa.String(10), nullable=False),
+        sa.Column("owner", sa.String(100), nullable=True),
+        sa.Column("movimiento_cuenta", sa.Boolean(), nullable=False),
+        sa.Column("es_compensacion_iva", sa.Boolean(), nullable=False),
+        sa.Column("partner_id", sa.Integer(), sa.ForeignKey("partners.id"), nullable=True),
+        sa.Column("approver_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("approved_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("payment_status", sa.String(50), nullable=False),
+        sa.Column("metodo_pago", sa.String(50)),
+        sa.Column("extracted_data", sa.JSON(), nullable=True),
+        sa.Column("blob_url", sa.String(500), nullable=True),
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("pipeline_version", sa.Integer(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.CheckConstraint("tipo_factura IN ('A', 'B', 'C') OR tipo_factura IS NULL", name="chk_tipo_factura"),
+        sa.CheckConstraint("invoice_direction IN ('emitida', 'recibida')", name="chk_direccion"),
+        sa.CheckConstraint(
+            "payment_status IN ('pending_approval', 'approved', 'paid', 'rejected')", name="chk_payment_status"
+        ),
+    )
+    for column in (
+        "id", "user_id", "status", "tipo_factura", "numero_factura", "fecha_emision",
+        "invoice_direction", "owner", "movimiento_cuenta", "partner_id", "approver_id", "is_deleted",
+    ):
+        op.create_index(f"ix_invoices_{column}", "invoices", [column])
+
+
+def _create_system_settings() -> None:
+    op.create_table(
+        "system_settings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(100), nullable=False),
+        sa.Column("value", sa.JSON(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("category", sa.String(50), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_system_settings_id", "system_settings", ["id"])
+    op.create_index("ix_system_settings_key", "system_settings", ["key"], unique=True)
+
+
+def _create_fiscal_years() -> None:
+    op.create_table(
+        "fiscal_years",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("start_date", sa.DateTime(), nullable=False),
+        sa.Column("end_date", sa.DateTime(), nullable=False),
+        sa.Column("is_current", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_fiscal_years_id", "fiscal_years", ["id"])
+    op.create_index("ix_fiscal_years_year", "fiscal_years", ["year"], unique=True)
+
+
+def _create_backup_logs() -> None:
+    # Las columnas de progreso las agrega 0002 (también a las bases heredadas)
+    op.create_table(
+        "backup_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("backup_type", sa.String(50), nullable=False),
+        sa.Column("file_path", sa.String(500), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_backup_logs_id", "backup_logs", ["id"])
+
+
+def _create_activity_logs() -> None:
+    # Particionada por mes en PostgreSQL; las particiones las crea ActivityLogMaintenance.
+    # La clave incluye la columna de partición, así que el id sale de una secuencia
+    # propia; en SQLite la clave es solo el id (alias del rowid, autoincremental).
+    if op.get_bind().dialect.name == "sqlite":
+        key_columns = [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        ]
+    else:
+        op.execute(sa.schema.CreateSequence(sa.Sequence("activity_logs_id_seq")))
+        key_columns = [
+            sa.Column("id", sa.BigInteger(), primary_key=True, server_default=sa.text("nextval('activity_logs_id_seq')")),
+            sa.Column("timestamp", sa.DateTime(timezone=True), primary_key=True, server_default=sa.func.now(), nullable=False),
+        ]
+    op.create_table(
+        "activity_logs",
+        *key_columns,
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("action", sa.String(100), nullable=False),
+        sa.Column("details", sa.JSON().with_variant(postgresql.JSONB(), "postgresql"), nullable=True),
+        sa.Column("ip_address", sa.String(45), nullable=True),
+        postgresql_partition_by="RANGE (timestamp)",
+    )
+    if op.get_bind().dialect.name != "sqlite":
+        op.execute("ALTER SEQUENCE activity_logs_id_seq OWNED BY activity_logs.id")
+    op.create_index("ix_activity_logs_timestamp_id", "activity_logs", ["timestamp", "id"])
+    op.create_index("ix_activity_logs_user_timestamp", "activity_logs", ["user_id", "timestamp", "id"])
+    op.create_index("ix_activity_logs_action_timestamp", "activity_logs", ["action", "timestamp", "id"])
+    op.create_index(
+        "ix_activity_logs_invoice_timestamp", "activity_logs", [sa.text("(details ->> 'invoice_id')"), "timestamp"]
+    )
+
+
+def _create_raw_extractions() -> None:
+    op.create_table(
+        "raw_extractions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content_hash", sa.String(64), nullable=False),
+        sa.Column("model_id", sa.String(100), nullable=False),
+        sa.Column("codec", sa.String(10), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("raw_size", sa.Integer(), nullable=True),
+        sa.Column("compressed_size", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_raw_extractions_id", "raw_extractions", ["id"])
+    op.create_index("ix_raw_extractions_content_hash", "raw_extractions", ["content_hash"], unique=True)
+
+
+def _create_idempotency_keys() -> None:
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(255), nullable=False),
+        sa.Column("user_scope", sa.String(255), nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("method", sa.String(10), nullable=False),
+        sa.Column("path", sa.String(255), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("response_status", sa.Integer(), nullable=True),
+        sa.Column("response_content_type", sa.String(100), nullable=True),
+        sa.Column("response_body", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("key", "user_scope", name="uq_idempotency_key_scope"),
+    )
+    op.create_index("ix_idempotency_keys_id", "idempotency_keys", ["id"])
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+
+# En orden de dependencias (claves foráneas)
+TABLES = (
+    ("users", _create_users),
+    ("partners", _create_partners),
+    ("invoices", _create_invoices),
+    ("system_settings", _create_system_settings),
+    ("fiscal_years", _create_fiscal_years),
+    ("backup_logs", _create_backup_logs),
+    ("activity_logs", _create_activity_logs),
+    ("raw_extractions", _create_raw_extractions),
+    ("idempotency_keys", _create_idempotency_keys),
+)
+
+
+def upgrade() -> None:
+    existing = _tables()
+    for table, create in TABLES:
+        if table not in existing:
+            create()
+
+    # Columnas agregadas al modelo después de que la tabla ya existía
+    if "token_version" not in _columns("users"):
+        op.add_column("users", sa.Column("token_version", sa.Integer(), server_default="0", nullable=False))
+
+    invoice_columns = _columns("invoices")
+    if "content_hash" not in invoice_columns:
+        op.add_column("invoices", sa.Column("content_hash", sa.String(64), nullable=True))
+    if "pipeline_version" not in invoice_columns:
+        op.add_column("invoices", sa.Column("pipeline_version", sa.Integer(), nullable=True))
+
+    invoice_indexes = _indexes("invoices")
+    for name, columns in (
+        ("ix_invoices_content_hash", ["content_hash"]),
+        ("ix_invoices_pipeline_version", ["pipeline_version"]),
+        ("ix_invoices_duplicate_block", ["cuit", "numero_factura", "tipo_factura"]),
+    ):
+        if name not in invoice_indexes:
+            op.create_index(name, "invoices", columns)
+
+
+def downgrade() -> None:
+    for table, _ in reversed(TABLES):
+        op.drop_table(table)
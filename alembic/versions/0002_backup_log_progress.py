@@ -0,0 +1,40 @@
+"""Progreso de backups en backup_logs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Las bases que ya corrieron el ALTER TABLE del arranque tienen algunas columnas
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("backup_logs")}
+    with op.batch_alter_table("backup_logs") as batch_op:
+        if "progress" not in existing:
+            batch_op.add_column(sa.Column("progress", sa.Integer(), server_default="0", nullable=False))
+        if "tables_total" not in existing:
+            batch_op.add_column(sa.Column("tables_total", sa.Integer(), nullable=True))
+        if "tables_done" not in existing:
+            batch_op.add_column(sa.Column("tables_done", sa.Integer(), nullable=True))
+        if "details" not in existing:
+            batch_op.add_column(sa.Column("details", sa.JSON(), nullable=True))
+        # Los volcados en formato directorio superan los 2 GB de un INTEGER
+        batch_op.alter_column("file_size", type_=sa.BigInteger(), existing_nullable=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("backup_logs") as batch_op:
+        batch_op.alter_column("file_size", type_=sa.Integer(), existing_nullable=True)
+        batch_op.drop_column("details")
+        batch_op.drop_column("tables_done")
+        batch_op.drop_column("tables_total")
+        batch_op.drop_column("progress")
@@ -10,6 +10,8 @@ import os
 # Agregar el directorio src al path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+from sqlalchemy import text
+
 from src.core.database import engine, init_db
 from src.models import *  # Importar todos los modelos
 
@@ -22,6 +24,8 @@ async def recreate_tables():
         from src.models.base import Base
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
+            # Sin la revisión registrada, init_db vuelve a aplicar todas las migraciones
+            await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
             # También eliminar enums si existen
             await conn.execute("DROP TYPE IF EXISTS userrole CASCADE")
             await conn.execute("DROP TYPE IF EXISTS invoicetype CASCADE")
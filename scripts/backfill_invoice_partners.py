@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Script para vincular por CUIT las facturas existentes con su partner.
+"""
+
+import os
+import sys
+import asyncio
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.database import AsyncSessionLocal
+from src.services.partner_resolver import PartnerResolver
+
+
+async def backfill(batch_size: int, auto_create: bool, dry_run: bool) -> dict:
+    """Ejecuta la vinculación en lotes."""
+    async with AsyncSessionLocal() as session:
+        return await PartnerResolver(session).backfill_invoices(
+            batch_size=batch_size,
+            auto_create=auto_create,
+            dry_run=dry_run
+        )
+
+
+def main():
+    """Función principal para ejecutar la vinculación."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vincular facturas con partners por CUIT")
+    parser.add_argument("--batch-size", type=int, default=500, help="Facturas por lote")
+    parser.add_argument("--auto-create", action="store_true", help="Crear partners esqueleto para CUITs desconocidos")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar, sin guardar cambios")
+
+    args = parser.parse_args()
+
+    print("🔗 Vinculando facturas con partners...")
+    stats = asyncio.run(backfill(args.batch_size, args.auto_create, args.dry_run))
+
+    print(f"📄 Revisadas: {stats['processed']}")
+    print(f"✅ Vinculadas: {stats['linked']}{' (dry-run)' if args.dry_run else ''}")
+    print(f"⚠️  Sin partner: {stats['unresolved']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de parseo de montos: las heurísticas anteriores
+(`normalizar_monto` de FinancialCalculator y `normalizar_a_decimal` de
+CurrencyValidator, con varios replace/rfind/split por valor) contra el
+scanner único de `src.services.amount_parser`, valor por valor y en lote.
+"""
+
+import os
+import sys
+import random
+import time
+from decimal import Decimal, InvalidOperation
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.amount_parser import parse_amount, parse_many, parser_cache_info
+
+
+def legacy_normalizar_monto(valor) -> Decimal:
+    """Implementación anterior de FinancialCalculator.normalizar_monto."""
+    if isinstance(valor, Decimal):
+        return valor
+    if isinstance(valor, (int, float)):
+        return Decimal(str(valor))
+    valor_str = str(valor).strip().replace('$', '').replace(' ', '')
+    if not valor_str or valor_str == '-':
+        return Decimal('0')
+    if ',' in valor_str and '.' in valor_str:
+        if valor_str.rfind(',') > valor_str.rfind('.'):
+            valor_str = valor_str.replace('.', '').replace(',', '.')
+        else:
+            valor_str = valor_str.replace(',', '')
+    elif ',' in valor_str:
+        valor_str = valor_str.replace(',', '.')
+    try:
+        return Decimal(valor_str)
+    except InvalidOperation:
+        return Decimal('0')
+
+
+def legacy_normalizar_a_decimal(valor: str):
+    """Implementación anterior de CurrencyValidator.normalizar_a_decimal."""
+    valor_limpio = valor.replace('$', '').replace(' ', '').replace('ARS', '').strip()
+    if not valor_limpio or valor_limpio == '-':
+        return Decimal('0')
+    tiene_punto = '.' in valor_limpio
+    tiene_coma = ',' in valor_limpio
+    if tiene_punto and tiene_coma:
+        argentino = valor_limpio.rfind(',') > valor_limpio.rfind('.')
+    elif tiene_coma:
+        partes = valor_limpio.split(',')
+        argentino = len(partes) == 2 and len(partes[1]) <= 2
+    elif tiene_punto:
+        partes = valor_limpio.split('.')
+        argentino = not (len(partes) == 2 and len(partes[1]) <= 2)
+    else:
+        argentino = True
+    if argentino:
+        valor_normalizado = valor_limpio.replace('.', '').replace(',', '.')
+    else:
+        valor_normalizado = valor_limpio.replace(',', '')
+    try:
+        return Decimal(valor_normalizado)
+    except InvalidOperation:
+        return None
+
+
+def build_values(count: int, distinct: int, seed: int) -> list:
+    """Genera montos de texto mezclando formatos, con repeticiones como en una importación."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        amount = round(rng.uniform(0, 5_000_000), 2)
+        english = f"{amount:,.2f}"
+        argentine = english.replace(',', '\0').replace('.', ',').replace('\0', '.')
+        pool.append(rng.choice([
+            f"${argentine}",
+            argentine,
+            english,
+            f"{amount:.2f}".replace('.', ','),
+            f"-{argentine}",
+        ]))
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def run_benchmark(count: int, distinct: int, seed: int) -> dict:
+    """Parsea `count` montos con cada variante y mide el tiempo."""
+    values = build_values(count, distinct, seed)
+
+    variants = {
+        "normalizar_monto": lambda: [legacy_normalizar_monto(value) for value in values],
+        "normalizar_a_decimal": lambda: [legacy_normalizar_a_decimal(value) for value in values],
+        "parse_amount": lambda: [parse_amount(value)[0] for value in values],
+        "parse_many (centavos)": lambda: parse_many(values)[0],
+    }
+
+    results = {}
+    for name, run in variants.items():
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        results[name] = {"seconds": elapsed, "ns_per_value": elapsed / count * 1e9}
+    return results
+
+
+def main():
+    """Función principal para ejecutar el benchmark."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark de parseo de montos")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Cantidad de valores a parsear")
+    parser.add_argument("--distinct", type=int, default=5_000, help="Cantidad de literales distintos")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los valores aleatorios")
+
+    args = parser.parse_args()
+
+    print(f"⏱️  Parseando {args.count:,} valores ({args.distinct:,} distintos)...")
+    results = run_benchmark(args.count, args.distinct, args.seed)
+
+    baseline = results["normalizar_monto"]["seconds"]
+    print(f"{'variante':<24}{'segundos':>10}{'ns/valor':>10}{'speedup':>9}")
+    for name, data in results.items():
+        print(
+            f"{name:<24}{data['seconds']:>10.3f}{data['ns_per_value']:>10.0f}"
+            f"{baseline / data['seconds']:>8.1f}x"
+        )
+    print(f"📊 Caché: {parser_cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
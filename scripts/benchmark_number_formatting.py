@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de formateo de números: armado dígito por dígito (la
+implementación anterior de `formatear_moneda_argentina`) contra el núcleo
+de `src.services.number_formatting` (mini-lenguaje de formato + translate).
+"""
+
+import os
+import sys
+import random
+import time
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.number_formatting import format_number, format_numbers
+
+
+def legacy_format(value: float) -> str:
+    """Implementación anterior: separadores de miles agregados en un loop."""
+    partes = f"{abs(value):.2f}".split('.')
+    parte_entera, parte_decimal = partes[0], partes[1]
+    parte_entera_formateada = ''
+    for i, digito in enumerate(reversed(parte_entera)):
+        if i > 0 and i % 3 == 0:
+            parte_entera_formateada = '.' + parte_entera_formateada
+        parte_entera_formateada = digito + parte_entera_formateada
+    signo = '-' if value < 0 else ''
+    return f"{signo}{parte_entera_formateada},{parte_decimal}"
+
+
+def run_benchmark(count: int, seed: int) -> dict:
+    """Formatea `count` montos aleatorios con cada variante y mide el tiempo."""
+    rng = random.Random(seed)
+    values = [round(rng.uniform(-10_000_000, 10_000_000), 2) for _ in range(count)]
+
+    variants = {
+        "dígito por dígito": lambda: [legacy_format(value) for value in values],
+        "format + replace": lambda: [format_number(value) for value in values],
+        "lote (un translate)": lambda: format_numbers(values),
+    }
+
+    results = {}
+    reference = None
+    for name, run in variants.items():
+        started = time.perf_counter()
+        output = run()
+        elapsed = time.perf_counter() - started
+        if reference is None:
+            reference = output
+        results[name] = {
+            "seconds": elapsed,
+            "ns_per_value": elapsed / count * 1e9,
+            "matches": output == reference,
+        }
+    return results
+
+
+def main():
+    """Función principal para ejecutar el benchmark."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark de formateo de números")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Cantidad de valores a formatear")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los valores aleatorios")
+
+    args = parser.parse_args()
+
+    print(f"⏱️  Formateando {args.count:,} valores...")
+    results = run_benchmark(args.count, args.seed)
+
+    baseline = results["dígito por dígito"]["seconds"]
+    print(f"{'variante':<22}{'segundos':>10}{'ns/valor':>10}{'speedup':>9}  igual")
+    for name, data in results.items():
+        print(
+            f"{name:<22}{data['seconds']:>10.3f}{data['ns_per_value']:>10.0f}"
+            f"{baseline / data['seconds']:>8.1f}x  {'✅' if data['matches'] else '❌'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
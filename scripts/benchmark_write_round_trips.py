@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark de round trips por escritura: patrón add/commit/refresh contra
+los helpers con RETURNING de `src.repositories.returning`.
+
+Cuenta sentencias SQL y COMMITs enviados a la base (SQLite en memoria por
+defecto, o la URL indicada con --database-url) para crear y editar filas.
+"""
+
+import os
+import sys
+import asyncio
+import time
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import Column, DateTime, Integer, Numeric, String, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from src.repositories.returning import insert_returning, update_returning
+
+BenchBase = declarative_base()
+
+
+class BenchInvoice(BenchBase):
+    """Tabla mínima con server defaults, como `invoices`."""
+    __tablename__ = "bench_write_invoices"
+
+    id = Column(Integer, primary_key=True)
+    numero_factura = Column(String(50))
+    total = Column(Numeric(15, 2))
+    status = Column(String(20), server_default="processing")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RoundTripCounter:
+    """Cuenta sentencias y commits emitidos por un engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def _on_commit(self, *args):
+        self.count += 1
+
+
+async def legacy_create(session, index):
+    invoice = BenchInvoice(numero_factura=f"0001-{index:08d}", total=100)
+    session.add(invoice)
+    await session.commit()
+    await session.refresh(invoice)
+    return invoice
+
+
+async def legacy_update(session, invoice_id):
+    result = await session.execute(select(BenchInvoice).where(BenchInvoice.id == invoice_id))
+    invoice = result.scalar_one()
+    invoice.status = "completed"
+    await session.commit()
+    await session.refresh(invoice)
+    return invoice
+
+
+async def returning_create(session, index):
+    return await insert_returning(session, BenchInvoice, {"numero_factura": f"0001-{index:08d}", "total": 100})
+
+
+async def returning_update(session, invoice_id):
+    return await update_returning(session, BenchInvoice, BenchInvoice.id == invoice_id, {"status": "completed"})
+
+
+async def run_benchmark(database_url: str, iterations: int) -> dict:
+    """Ejecuta cada patrón `iterations` veces y mide round trips y tiempo."""
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(BenchBase.metadata.drop_all)
+        await conn.run_sync(BenchBase.metadata.create_all)
+
+    counter = RoundTripCounter(engine)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    results = {}
+
+    for name, create, update in (
+        ("add/commit/refresh", legacy_create, legacy_update),
+        ("RETURNING", returning_create, returning_update),
+    ):
+        async with session_factory() as session:
+            counter.count = 0
+            started = time.perf_counter()
+            ids = [(await create(session, index)).id for index in range(iterations)]
+            create_elapsed = time.perf_counter() - started
+            create_trips = counter.count
+
+            session.expunge_all()
+            counter.count = 0
+            started = time.perf_counter()
+            for invoice_id in ids:
+                await update(session, invoice_id)
+            update_elapsed = time.perf_counter() - started
+            update_trips = counter.count
+
+        results[name] = {
+            "create_round_trips": create_trips / iterations,
+            "update_round_trips": update_trips / iterations,
+            "create_ms": create_elapsed / iterations * 1000,
+            "update_ms": update_elapsed / iterations * 1000,
+        }
+
+    async with engine.begin() as conn:
+        await conn.run_sync(BenchBase.metadata.drop_all)
+    await engine.dispose()
+    return results
+
+
+def main():
+    """Función principal para ejecutar el benchmark."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Round trips por escritura: refresh vs RETURNING")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:", help="URL async de la base de pruebas")
+    parser.add_argument("--iterations", type=int, default=200, help="Escrituras por patrón")
+
+    args = parser.parse_args()
+
+    print(f"⏱️  Benchmark de escrituras ({args.iterations} iteraciones)...")
+    results = asyncio.run(run_benchmark(args.database_url, args.iterations))
+
+    print(f"{'patrón':<22}{'create RT':>10}{'update RT':>10}{'create ms':>11}{'update ms':>11}")
+    for name, data in results.items():
+        print(
+            f"{name:<22}{data['create_round_trips']:>10.1f}{data['update_round_trips']:>10.1f}"
+            f"{data['create_ms']:>11.3f}{data['update_ms']:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script de mantenimiento del log de actividades: particiones mensuales,
+retención y migración de la tabla sin particionar.
+"""
+
+import os
+import sys
+import asyncio
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.database import AsyncSessionLocal
+from src.services.activity_log_maintenance import ActivityLogMaintenance
+
+
+async def maintain(migrate_legacy: bool, batch_size: int, dry_run: bool) -> dict:
+    """Ejecuta la migración (opcional) y el mantenimiento."""
+    async with AsyncSessionLocal() as session:
+        maintenance = ActivityLogMaintenance(session)
+        migration = None
+        if migrate_legacy:
+            migration = await maintenance.migrate_legacy_table(batch_size=batch_size)
+        result = await maintenance.run(dry_run=dry_run)
+        result["migration"] = migration
+        return result
+
+
+def main():
+    """Función principal para ejecutar el mantenimiento."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mantenimiento de la tabla activity_logs")
+    parser.add_argument("--migrate-legacy", action="store_true", help="Convertir la tabla sin particionar (con la app detenida)")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Filas por lote al migrar")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar qué particiones se eliminarían/comprimirían")
+
+    args = parser.parse_args()
+
+    print("🗂️  Mantenimiento de activity_logs...")
+    result = asyncio.run(maintain(args.migrate_legacy, args.batch_size, args.dry_run))
+
+    if result["migration"]:
+        if result["migration"]["migrated"]:
+            print(f"✅ Migradas {result['migration']['rows']} filas (la tabla activity_logs_legacy queda para borrar a mano)")
+        else:
+            print("ℹ️  La tabla ya estaba particionada, no hay nada que migrar")
+    if not result["partitioned"]:
+        print("⚠️  activity_logs no está particionada: ejecutar con --migrate-legacy")
+        return
+    if result.get("skipped"):
+        print("⏭️  Otro proceso está haciendo el mantenimiento")
+        return
+
+    print(f"📅 Particiones creadas: {', '.join(result['created']) or 'ninguna'}")
+    for action in result["retention"]:
+        print(f"🧹 {action['partition']}: {action['action']}{' (dry-run)' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()
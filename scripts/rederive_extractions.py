@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script para re-derivar los datos de facturas desde los resultados crudos
+guardados de Azure Document Intelligence, sin volver a llamar a Azure.
+"""
+
+import os
+import sys
+import asyncio
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.database import AsyncSessionLocal
+from src.services.raw_extraction_store import RawExtractionStore
+
+
+async def rederive(batch_size: int, dry_run: bool) -> dict:
+    """Ejecuta la re-derivación sobre todas las facturas con resultado crudo."""
+    async with AsyncSessionLocal() as session:
+        store = RawExtractionStore(session)
+        return await store.rederive_invoices(batch_size=batch_size, dry_run=dry_run)
+
+
+def main():
+    """Función principal para ejecutar la re-derivación."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-derivar facturas desde resultados crudos de Document Intelligence")
+    parser.add_argument("--batch-size", type=int, default=500, help="Facturas por lote")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar cambios, sin guardar")
+
+    args = parser.parse_args()
+
+    print("🔁 Re-derivando facturas desde raw_extractions...")
+    stats = asyncio.run(rederive(args.batch_size, args.dry_run))
+
+    print(f"📄 Procesadas: {stats['processed']}")
+    print(f"✏️  Actualizadas: {stats['updated']}{' (dry-run)' if args.dry_run else ''}")
+    print(f"⚠️  Sin resultado crudo: {stats['missing_raw']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script para reprocesar con IA facturas en needs_review / error
+(por ejemplo tras una caída de Azure o un cambio de prompt).
+"""
+
+import os
+import sys
+import asyncio
+from datetime import date
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.database import AsyncSessionLocal
+from src.services.invoice_reprocessor import InvoiceReprocessor, ReprocessJob, run_reprocess_job
+
+
+async def reprocess(args) -> ReprocessJob:
+    """Selecciona las facturas y ejecuta el reprocesamiento mostrando el progreso."""
+    async with AsyncSessionLocal() as session:
+        invoice_ids = await InvoiceReprocessor(session).select_invoice_ids(
+            statuses=args.status,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            owner=args.owner,
+            pipeline_version_below=args.pipeline_version_below,
+            limit=args.limit
+        )
+
+    print(f"📋 Facturas seleccionadas: {len(invoice_ids)}")
+    job = ReprocessJob(filters=vars(args))
+    task = asyncio.create_task(run_reprocess_job(job, invoice_ids, dry_run=args.dry_run))
+
+    while not task.done():
+        await asyncio.sleep(2)
+        print(f"⏳ {job.processed}/{job.total} procesadas, {job.changed} con cambios, {job.errors} errores")
+
+    return await task
+
+
+def main():
+    """Función principal para ejecutar el reprocesamiento."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reprocesar facturas con IA")
+    parser.add_argument("--status", action="append", help="Estado a reprocesar (repetible). Por defecto: needs_review y error")
+    parser.add_argument("--date-from", type=date.fromisoformat, help="Fecha de subida desde (YYYY-MM-DD)")
+    parser.add_argument("--date-to", type=date.fromisoformat, help="Fecha de subida hasta (YYYY-MM-DD)")
+    parser.add_argument("--owner", help="Socio responsable")
+    parser.add_argument("--pipeline-version-below", type=int, help="Solo facturas procesadas con una versión anterior")
+    parser.add_argument("--limit", type=int, help="Cantidad máxima de facturas")
+    parser.add_argument("--dry-run", action="store_true", help="Calcular diferencias sin guardar cambios")
+
+    args = parser.parse_args()
+
+    job = asyncio.run(reprocess(args))
+
+    print(f"\n✅ Estado: {job.status}")
+    print(f"📄 Procesadas: {job.processed}/{job.total}")
+    print(f"✏️  Con cambios: {job.changed}")
+    print(f"⚠️  Errores: {job.errors}")
+    for transition, count in job.status_changes.items():
+        print(f"   {transition}: {count}")
+    for field, count in sorted(job.field_changes.items(), key=lambda item: -item[1]):
+        print(f"   {field}: {count} facturas")
+
+    sys.exit(0 if job.status == "completed" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,27 @@
 """
 Agentes de IA para el sistema Open Doors.
+
+Los agentes se importan en el primer acceso (PEP 562): importar el paquete
+no carga LangGraph, LangChain, OpenAI ni los SDKs de Azure.
 """
 
-from .enhanced_invoice_processing_agent import EnhancedInvoiceProcessingAgent
-from .financial_analysis_agent import FinancialAnalysisAgent
+import importlib
+
+_LAZY_EXPORTS = {
+    "EnhancedInvoiceProcessingAgent": ".enhanced_invoice_processing_agent",
+    "FinancialAnalysisAgent": ".financial_analysis_agent",
+}
+
+__all__ = ["EnhancedInvoiceProcessingAgent", "FinancialAnalysisAgent"]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ["EnhancedInvoiceProcessingAgent", "FinancialAnalysisAgent"]
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -208,7 +208,8 @@ class ApprovalWorkflow:
             await self.activity_logger.log_activity(
                 user_id=state.approver_id,
                 action=action,
-                details=details
+                details=details,
+                durable=True
             )
             
             state.messages.append(AIMessage(content="Actividad registrada en el log"))
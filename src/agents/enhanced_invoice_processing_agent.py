@@ -2,9 +2,9 @@
 Agente mejorado de procesamiento de facturas con validación inteligente.
 """
 
+import hashlib
 import json
 import logging
-import re
 from typing import Dict, Any, Optional
 from datetime import datetime
 
@@ -15,6 +15,10 @@ from azure.storage.blob import BlobServiceClient
 from openai import AsyncOpenAI
 
 from src.core.config import settings
+from src.core.metrics import track_azure
+from src.services.duplicate_detector import DuplicateDetector
+from src.services.invoice_extraction import map_analyze_result, to_jsonable
+from src.services.raw_extraction_store import RawExtractionStore
 
 logger = logging.getLogger(__name__)
 
@@ -49,108 +53,68 @@ class EnhancedInvoiceProcessingAgent:
                 credential=settings.AZURE_STORAGE_ACCOUNT_KEY
             )
     
-    async def extract_with_doc_intelligence(self, blob_url: str) -> Dict[str, Any]:
-        """Extrae datos usando Azure Document Intelligence con campos específicos."""
+    async def extract_with_doc_intelligence(self, blob_url: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Extrae datos usando Azure Document Intelligence con campos específicos.
+
+        El AnalyzeResult crudo se guarda comprimido en `raw_extractions` (por
+        hash SHA-256 del archivo). Si el mismo documento ya fue analizado, se
+        reutiliza el resultado guardado sin volver a llamar a Azure.
+
+        Args:
+            blob_url: URL del blob o `file://` en desarrollo
+            content_hash: SHA-256 del archivo si ya se conoce
+
+        Returns:
+            Datos mapeados de la factura
+        """
         try:
             logger.info("Extrayendo datos con Azure Document Intelligence mejorado")
+            store = RawExtractionStore(self.session) if self.session is not None else None
             
-            # Determinar si es un archivo local o un blob de Azure
-            if blob_url.startswith('file://'):
-                # Archivo local
-                file_path = blob_url.replace('file://', '')
-                with open(file_path, 'rb') as f:
-                    blob_data = f.read()
-            else:
-                # Blob de Azure Storage
-                blob_name = blob_url.split('/')[-1]
-                blob_client = self.blob_client.get_blob_client(
-                    container=settings.AZURE_STORAGE_CONTAINER_NAME,
-                    blob=blob_name
-                )
-                blob_data = blob_client.download_blob().readall()
-            
-            # Analizar documento con Azure Document Intelligence
-            poller = self.doc_client.begin_analyze_document(
-                "prebuilt-invoice",
-                document=blob_data
-            )
-            result = poller.result()
-            
-            # Extraer datos relevantes con campos específicos
-            extracted_data = {}
+            raw = None
+            if store and content_hash:
+                raw = await store.get(content_hash)
+                if raw is not None:
+                    logger.info(f"Reutilizando análisis guardado para {content_hash[:12]}")
             
-            # Mapeo de campos de Document Intelligence
-            field_mapping = {
-                'VendorName': 'proveedor',
-                'CustomerName': 'cliente',
-                'InvoiceId': 'numero_factura',
-                'InvoiceDate': 'fecha_emision',
-                'DueDate': 'fecha_vencimiento',
-                'InvoiceTotal': 'total',
-                'SubTotal': 'subtotal',
-                'TotalTax': 'iva',
-                'Items': 'items'
-            }
-            
-            for document in result.documents:
-                for name, field in document.fields.items():
-                    if name in field_mapping:
-                        extracted_data[field_mapping[name]] = field.value
-                    else:
-                        extracted_data[name.lower()] = field.value
-            
-            # Extraer información fiscal específica
-            extracted_data = await self._extract_fiscal_info(extracted_data, result)
-            
-            return extracted_data
-            
-        except Exception as e:
-            logger.error(f"Error en extracción mejorada: {str(e)}")
-            raise
-    
-    async def _extract_fiscal_info(self, extracted_data: dict, doc_result) -> dict:
-        """Extrae información fiscal específica (CUIT, tipo de comprobante)."""
-        try:
-            # Buscar CUIT en el texto extraído
-            if hasattr(doc_result, 'content') and doc_result.content:
-                content = doc_result.content
-                
-                # Patrones para detectar CUIT
-                cuit_pattern = r'\b\d{2}-\d{8}-\d\b'
-                cuit_match = re.search(cuit_pattern, content)
-                if cuit_match:
-                    extracted_data['cuit_proveedor'] = cuit_match.group()
-                
-                # Detectar tipo de comprobante
-                content_upper = content.upper()
-                if 'FACTURA A' in content_upper:
-                    extracted_data['tipo_factura'] = 'A'
-                elif 'FACTURA B' in content_upper:
-                    extracted_data['tipo_factura'] = 'B'
-                elif 'FACTURA C' in content_upper:
-                    extracted_data['tipo_factura'] = 'C'
-                elif 'COMPROBANTE' in content_upper:
-                    extracted_data['tipo_factura'] = 'Otro'
+            if raw is None:
+                # Determinar si es un archivo local o un blob de Azure
+                if blob_url.startswith('file://'):
+                    # Archivo local
+                    file_path = blob_url.replace('file://', '')
+                    with open(file_path, 'rb') as f:
+                        blob_data = f.read()
                 else:
-                    extracted_data['tipo_factura'] = 'Desconocido'
+                    # Blob de Azure Storage
+                    blob_name = blob_url.split('/')[-1]
+                    blob_client = self.blob_client.get_blob_client(
+                        container=settings.AZURE_STORAGE_CONTAINER_NAME,
+                        blob=blob_name
+                    )
+                    with track_azure("blob_storage", "download"):
+                        blob_data = blob_client.download_blob().readall()
                 
-                # Detectar CAE si está presente
-                cae_pattern = r'CAE:\s*(\d+)'
-                cae_match = re.search(cae_pattern, content, re.IGNORECASE)
-                if cae_match:
-                    extracted_data['cae'] = cae_match.group(1)
+                content_hash = content_hash or hashlib.sha256(blob_data).hexdigest()
                 
-                # Detectar número de comprobante más específico
-                comprobante_pattern = r'(?:FACTURA|COMPROBANTE)\s*[A-Z]?\s*N[O°]?\s*(\d+)'
-                comprobante_match = re.search(comprobante_pattern, content_upper)
-                if comprobante_match and 'numero_factura' not in extracted_data:
-                    extracted_data['numero_factura'] = comprobante_match.group(1)
+                # Analizar documento con Azure Document Intelligence
+                with track_azure("doc_intelligence", "analyze_invoice"):
+                    poller = self.doc_client.begin_analyze_document(
+                        "prebuilt-invoice",
+                        document=blob_data
+                    )
+                    result = poller.result()
+                raw = to_jsonable(result.to_dict())
+                
+                if store:
+                    await store.save(content_hash, raw, model_id="prebuilt-invoice")
             
-            return extracted_data
+            # Mapeo local de campos e información fiscal
+            return map_analyze_result(raw)
             
         except Exception as e:
-            logger.error(f"Error extrayendo información fiscal: {str(e)}")
-            return extracted_data
+            logger.error(f"Error en extracción mejorada: {str(e)}")
+            raise
     
     async def validate_and_clean_data(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
         """Valida y limpia los datos usando Azure OpenAI con validación de coherencia."""
@@ -189,15 +153,16 @@ class EnhancedInvoiceProcessingAgent:
             Responde ÚNICAMENTE con el JSON válido, sin texto adicional.
             """
 
-            response = await self.openai_client.chat.completions.create(
-                model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                messages=[
-                    {"role": "system", "content": "Eres un experto en facturación argentina. Responde siempre con JSON válido."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                extra_headers={"api-version": settings.OPENAI_API_VERSION}
-            )
+            with track_azure("openai", "validate_invoice"):
+                response = await self.openai_client.chat.completions.create(
+                    model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+                    messages=[
+                        {"role": "system", "content": "Eres un experto en facturación argentina. Responde siempre con JSON válido."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1,
+                    extra_headers={"api-version": settings.OPENAI_API_VERSION}
+                )
 
             cleaned_data = json.loads(response.choices[0].message.content)
             
@@ -252,16 +217,58 @@ class EnhancedInvoiceProcessingAgent:
             data['razon_revision'] = f"Error en validación: {str(e)}"
             return data
     
-    async def process_invoice(self, blob_url: str, user_id: int, invoice_id: int) -> Dict[str, Any]:
-        """Procesa una factura completa con el agente mejorado."""
+    async def process_invoice(
+        self,
+        blob_url: str,
+        user_id: int,
+        invoice_id: int,
+        content_hash: Optional[str] = None,
+        invoice_direction: str = "recibida",
+        reuse_exact_duplicate: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Procesa una factura completa con el agente mejorado.
+
+        Args:
+            blob_url: URL del blob o `file://` en desarrollo
+            user_id: Usuario que subió la factura
+            invoice_id: Factura que se procesa (se excluye de la búsqueda de duplicados)
+            content_hash: SHA-256 del archivo si ya se conoce
+            invoice_direction: 'recibida' o 'emitida'
+            reuse_exact_duplicate: Si otra factura tiene el mismo archivo, devolver
+                sus datos sin extraer. Solo para subidas nuevas: al reprocesar se
+                quiere una extracción propia (False)
+
+        Returns:
+            Estado, datos extraídos y notas del procesamiento
+        """
         try:
-            # 1. Extraer datos con Document Intelligence
-            extracted_data = await self.extract_with_doc_intelligence(blob_url)
+            detector = DuplicateDetector(self.session) if self.session is not None else None
+            
+            # 1. Mismo archivo ya cargado: reutilizar sus datos sin OCR ni LLM
+            if detector and content_hash and reuse_exact_duplicate:
+                exact = await detector.find_by_hash(content_hash, exclude_invoice_id=invoice_id)
+                if exact:
+                    return self._duplicate_result(dict(exact[0].extracted_data or {}), exact[0].id, 1.0)
             
-            # 2. Validar y limpiar con IA
+            # 2. Extraer datos con Document Intelligence (o desde el resultado crudo guardado)
+            extracted_data = await self.extract_with_doc_intelligence(blob_url, content_hash=content_hash)
+            
+            # 3. Probable duplicado (mismo CUIT/número): marcar antes de gastar en el LLM
+            if detector:
+                duplicate_check = await detector.check_extracted(
+                    extracted_data,
+                    exclude_invoice_id=invoice_id,
+                    invoice_direction=invoice_direction
+                )
+                if duplicate_check["is_duplicate"]:
+                    best = duplicate_check["similar_invoices"][0]
+                    return self._duplicate_result(extracted_data, best["invoice_id"], best["confidence"])
+            
+            # 4. Validar y limpiar con IA
             cleaned_data = await self.validate_and_clean_data(extracted_data)
             
-            # 3. Determinar estado final
+            # 5. Determinar estado final
             if cleaned_data.get('necesita_revision', False):
                 status = "needs_review"
             else:
@@ -280,3 +287,18 @@ class EnhancedInvoiceProcessingAgent:
                 "error_message": str(e),
                 "extracted_data": extracted_data if 'extracted_data' in locals() else {}
             }
+    
+    def _duplicate_result(self, data: Dict[str, Any], duplicate_of: int, confidence: float) -> Dict[str, Any]:
+        """Resultado para una factura marcada como probable duplicado."""
+        razon = f"Posible duplicado de la factura #{duplicate_of} (confianza {confidence:.0%})"
+        logger.info(razon)
+        data.update({
+            'necesita_revision': True,
+            'razon_revision': razon,
+            'duplicate_of': duplicate_of
+        })
+        return {
+            "status": "needs_review",
+            "extracted_data": data,
+            "processing_notes": razon
+        }
@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 
 from src.core.config import settings
+from src.core.metrics import track_azure
 from src.models.invoice import Invoice
 from src.models.user import User
 from src.services.financial_service import FinancialService
@@ -461,7 +462,8 @@ class FinancialAnalysisAgent:
             3. Recomendaciones fiscales si es apropiado
             """
             
-            response = await self.llm.ainvoke(analysis_prompt)
+            with track_azure("openai", "financial_analysis"):
+                response = await self.llm.ainvoke(analysis_prompt)
             result["analysis"] = response.content
             
             return result
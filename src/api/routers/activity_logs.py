@@ -0,0 +1,99 @@
+"""
+Router para consultar el log de actividades (auditoría).
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import get_session
+from src.core.permissions import require_admin
+from src.core.principal import Principal
+from src.services.activity_log_maintenance import ActivityLogMaintenance
+from src.services.activity_logger import ActivityLogger
+
+router = APIRouter()
+
+
+class ActivityLogResponse(BaseModel):
+    id: int
+    user_id: int
+    action: str
+    details: Optional[Dict[str, Any]] = None
+    ip_address: Optional[str] = None
+    timestamp: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ActivityLogPage(BaseModel):
+    items: List[ActivityLogResponse]
+    next_cursor: Optional[str] = None
+
+
+class RetentionRequest(BaseModel):
+    months: int = Field(..., ge=1, le=240)
+    mode: Literal["drop", "compress"] = "drop"
+
+
+@router.get("/", response_model=ActivityLogPage, summary="Buscar en el log de actividades")
+async def search_activity_logs(
+    user_id: Optional[int] = Query(None, description="ID del usuario"),
+    action: Optional[str] = Query(None, description="Tipo de acción (ej: APPROVE_INVOICE)"),
+    invoice_id: Optional[int] = Query(None, description="ID de factura en los detalles"),
+    date_from: Optional[datetime] = Query(None, description="Desde (inclusive)"),
+    date_to: Optional[datetime] = Query(None, description="Hasta (exclusive)"),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto por la página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(require_admin),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Busca actividades, más recientes primero, con paginación por cursor.
+    """
+    try:
+        logs, next_cursor = await ActivityLogger(session).search(
+            user_id=user_id,
+            action=action,
+            invoice_id=invoice_id,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+    return ActivityLogPage(
+        items=[ActivityLogResponse.model_validate(log) for log in logs],
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/retention", summary="Obtener la política de retención")
+async def get_retention(
+    current_user: Principal = Depends(require_admin),
+    session: AsyncSession = Depends(get_session)
+):
+    """Obtiene los meses de retención y la acción sobre particiones viejas."""
+    return await ActivityLogMaintenance(session).get_retention()
+
+
+@router.put("/retention", summary="Actualizar la política de retención")
+async def update_retention(
+    request: RetentionRequest,
+    current_user: Principal = Depends(require_admin),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Actualiza la retención. Se aplica en el próximo mantenimiento
+    (diario o con scripts/maintain_activity_log.py).
+    """
+    return await ActivityLogMaintenance(session).set_retention(request.months, request.mode)
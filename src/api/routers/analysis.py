@@ -7,10 +7,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 
-from src.core.database import get_session
+from src.core.database import get_report_session
 from src.core.security import get_current_user
 from src.models.user import User
-from src.agents.enhanced_financial_analysis_agent import EnhancedFinancialAnalysisAgent
 
 router = APIRouter()
 
@@ -34,7 +33,7 @@ class AnalysisResponse(BaseModel):
 async def analyze_financial_data(
     request: AnalysisRequest,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_report_session)
 ):
     """
     Analiza datos financieros usando IA basándose en una consulta en lenguaje natural.
@@ -48,6 +47,9 @@ async def analyze_financial_data(
         Análisis estructurado con datos y gráficos
     """
     try:
+        # Import diferido: el agente carga LangGraph y LangChain
+        from src.agents.enhanced_financial_analysis_agent import EnhancedFinancialAnalysisAgent
+        
         # Crear agente de análisis
         analysis_agent = EnhancedFinancialAnalysisAgent(session)
         
@@ -14,6 +14,7 @@ from src.core.security import get_current_user
 from src.models.user import User
 from src.models.invoice import Invoice
 from src.services.activity_logger import ActivityLogger
+from src.repositories.returning import update_returning
 
 router = APIRouter()
 
@@ -132,16 +133,24 @@ async def approve_invoice(
     Solo accesible para usuarios con rol 'approver' o 'admin'.
     """
     try:
-        # Buscar la factura
-        invoice_query = select(Invoice).where(
+        # Actualizar estado de la factura si sigue pendiente (UPDATE ... RETURNING)
+        now = datetime.now(timezone.utc)
+        invoice = await update_returning(
+            session,
+            Invoice,
             and_(
                 Invoice.id == invoice_id,
                 Invoice.payment_status == "pending_approval",
                 Invoice.is_deleted == False
-            )
+            ),
+            {
+                "payment_status": "approved",
+                "approver_id": current_user.id,
+                "approved_at": now,
+                "updated_at": now
+            },
+            commit=False
         )
-        result = await session.execute(invoice_query)
-        invoice = result.scalar_one_or_none()
         
         if not invoice:
             raise HTTPException(
@@ -149,12 +158,6 @@ async def approve_invoice(
                 detail="Factura no encontrada o no pendiente de aprobación"
             )
         
-        # Actualizar estado de la factura
-        invoice.payment_status = "approved"
-        invoice.approver_id = current_user.id
-        invoice.approved_at = datetime.now(timezone.utc)
-        invoice.updated_at = datetime.now(timezone.utc)
-        
         # Log de la actividad
         activity_logger = ActivityLogger(session)
         await activity_logger.log_activity(
@@ -165,11 +168,11 @@ async def approve_invoice(
                 "invoice_filename": invoice.filename,
                 "reason": request.reason,
                 "previous_status": "pending_approval"
-            }
+            },
+            durable=True
         )
         
         await session.commit()
-        await session.refresh(invoice)
         
         return ApprovalResponse(
             message="Factura aprobada exitosamente",
@@ -201,16 +204,24 @@ async def reject_invoice(
     Solo accesible para usuarios con rol 'approver' o 'admin'.
     """
     try:
-        # Buscar la factura
-        invoice_query = select(Invoice).where(
+        # Actualizar estado de la factura si sigue pendiente (UPDATE ... RETURNING)
+        now = datetime.now(timezone.utc)
+        invoice = await update_returning(
+            session,
+            Invoice,
             and_(
                 Invoice.id == invoice_id,
                 Invoice.payment_status == "pending_approval",
                 Invoice.is_deleted == False
-            )
+            ),
+            {
+                "payment_status": "rejected",
+                "approver_id": current_user.id,
+                "approved_at": now,  # Fecha de rechazo
+                "updated_at": now
+            },
+            commit=False
         )
-        result = await session.execute(invoice_query)
-        invoice = result.scalar_one_or_none()
         
         if not invoice:
             raise HTTPException(
@@ -218,12 +229,6 @@ async def reject_invoice(
                 detail="Factura no encontrada o no pendiente de aprobación"
             )
         
-        # Actualizar estado de la factura
-        invoice.payment_status = "rejected"
-        invoice.approver_id = current_user.id
-        invoice.approved_at = datetime.now(timezone.utc)  # Fecha de rechazo
-        invoice.updated_at = datetime.now(timezone.utc)
-        
         # Log de la actividad
         activity_logger = ActivityLogger(session)
         await activity_logger.log_activity(
@@ -234,11 +239,11 @@ async def reject_invoice(
                 "invoice_filename": invoice.filename,
                 "reason": request.reason,
                 "previous_status": "pending_approval"
-            }
+            },
+            durable=True
         )
         
         await session.commit()
-        await session.refresh(invoice)
         
         return RejectionResponse(
             message="Factura rechazada exitosamente",
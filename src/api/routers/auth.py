@@ -12,7 +12,8 @@ from jose import JWTError, jwt
 
 from src.core.database import get_session
 from src.core.config import settings
-from src.core.security import verify_password, get_password_hash
+from src.core.security import get_current_user, hash_password_async, needs_rehash, verify_password_async
+from src.core.principal import build_token_claims, token_versions
 from src.models.user import User
 
 router = APIRouter()
@@ -43,30 +44,13 @@ async def authenticate_user(session: AsyncSession, email: str, password: str) ->
     user = await get_user_by_email(session, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
-    return user
-
-async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)) -> User:
-    """Obtiene el usuario actual a partir del token JWT."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="No se pudieron validar las credenciales",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = await get_user_by_email(session, email)
-    if user is None:
-        raise credentials_exception
     
+    # Re-hash transparente si cambió el costo configurado de bcrypt
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(password)
+        await session.commit()
     return user
 
 @router.post("/token")
@@ -88,8 +72,9 @@ async def token(form_data: OAuth2PasswordRequestForm = Depends(), session: Async
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=build_token_claims(user), expires_delta=access_token_expires
     )
+    token_versions.put(user.id, user.token_version)
     
     return {
         "access_token": access_token,
@@ -123,8 +108,9 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Async
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=build_token_claims(user), expires_delta=access_token_expires
     )
+    token_versions.put(user.id, user.token_version)
     
     return {
         "access_token": access_token,
@@ -164,7 +150,7 @@ async def register(
         )
     
     # Crear nuevo usuario
-    hashed_password = get_password_hash(password)
+    hashed_password = await hash_password_async(password)
     user = User(
         email=email,
         hashed_password=hashed_password,
@@ -13,7 +13,7 @@ from sqlalchemy import select
 from typing import Optional
 from datetime import date
 
-from src.core.database import get_session
+from src.core.database import get_report_session
 <<<<<<< HEAD
 from src.services.financial_service import FinancialService
 from src.core.security import get_current_user
@@ -34,7 +34,7 @@ async def get_balance_iva(
     owner: Optional[str] = Query(None, description="Filtrar por socio (Hernán, Joni, Maxi, Leo, Franco)"),
     fecha_desde: Optional[date] = Query(None, description="Fecha inicio"),
     fecha_hasta: Optional[date] = Query(None, description="Fecha fin"),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_report_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -68,7 +68,7 @@ async def get_balance_iva(
 =======
     fecha_desde: Optional[date] = Query(None),
     fecha_hasta: Optional[date] = Query(None),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_report_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -110,7 +110,7 @@ async def get_balance_general(
     owner: Optional[str] = Query(None, description="Filtrar por socio (Hernán, Joni, Maxi, Leo, Franco)"),
     fecha_desde: Optional[date] = Query(None, description="Fecha inicio"),
     fecha_hasta: Optional[date] = Query(None, description="Fecha fin"),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_report_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -146,7 +146,7 @@ async def get_balance_general(
 async def get_balance_por_socio(
     fecha_desde: Optional[date] = Query(None, description="Fecha inicio"),
     fecha_hasta: Optional[date] = Query(None, description="Fecha fin"),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_report_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -182,7 +182,7 @@ async def get_balance_por_socio(
 =======
     fecha_desde: Optional[date] = Query(None),
     fecha_hasta: Optional[date] = Query(None),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_report_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -204,7 +204,7 @@ async def get_balance_por_socio(
 @router.get("/financial/balance-por-socio")
 async def get_balance_por_socio(
     socio: str = Query(...),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_report_session),
     current_user: User = Depends(get_current_user)
 ):
     """Balance específico de un socio"""
@@ -223,7 +223,7 @@ async def get_balance_por_socio(
 async def get_resumen_completo(
     fecha_desde: Optional[date] = Query(None),
     fecha_hasta: Optional[date] = Query(None),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_report_session),
     current_user: User = Depends(get_current_user)
 ):
     """Resumen financiero completo"""
@@ -2,36 +2,64 @@
 Router para subida y procesamiento de facturas con IA.
 """
 
+import hashlib
 import uuid
 import os
-from typing import Dict, Any
+from datetime import date
+from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from azure.storage.blob import BlobServiceClient
-from azure.core.exceptions import AzureError
+from pydantic import BaseModel, Field
 
 from src.core.database import get_session
+from src.core.permissions import require_admin
+from src.core.principal import Principal
 from src.core.security import get_current_user
 from src.core.config import settings
+from src.core.metrics import track_azure
 from src.models.user import User
 from src.models.invoice import Invoice
-from src.agents.enhanced_invoice_processing_agent import EnhancedInvoiceProcessingAgent
+from src.services.invoice_extraction import PIPELINE_VERSION, apply_summary, build_summary
+from src.services.invoice_reprocessor import InvoiceReprocessor, get_job, start_reprocess_job
+from src.services.partner_resolver import PartnerResolver
+from src.services.processing_queue import PRIORITY_UPLOAD, ai_slot
 
 router = APIRouter()
 security = HTTPBearer()
 
 
+class ReprocessRequest(BaseModel):
+    """Filtros para el reprocesamiento masivo de facturas."""
+    statuses: List[str] = Field(default_factory=lambda: ["needs_review", "error"], description="Estados a reprocesar")
+    date_from: Optional[date] = Field(None, description="Fecha de subida desde")
+    date_to: Optional[date] = Field(None, description="Fecha de subida hasta")
+    owner: Optional[str] = Field(None, description="Socio responsable")
+    pipeline_version_below: Optional[int] = Field(None, description="Solo facturas procesadas con una versión anterior")
+    limit: Optional[int] = Field(None, ge=1, description="Cantidad máxima de facturas")
+    dry_run: bool = Field(False, description="Calcular diferencias con el resultado crudo guardado, sin IA ni cambios")
+
+
 class InvoiceUploadService:
     """Servicio para manejar la subida y procesamiento de facturas."""
     
     def __init__(self):
         self.azure_storage_client = None
-        self.invoice_agent = EnhancedInvoiceProcessingAgent()
+        self._invoice_agent = None
+    
+    @property
+    def invoice_agent(self):
+        """Agente de procesamiento (se construye en el primer uso)."""
+        if self._invoice_agent is None:
+            from src.agents.enhanced_invoice_processing_agent import EnhancedInvoiceProcessingAgent
+            self._invoice_agent = EnhancedInvoiceProcessingAgent()
+        return self._invoice_agent
     
     def _get_azure_storage_client(self):
         """Obtiene el cliente de Azure Blob Storage."""
         if not self.azure_storage_client:
+            from azure.storage.blob import BlobServiceClient
+
             connection_string = (
                 f"DefaultEndpointsProtocol=https;"
                 f"AccountName={settings.AZURE_STORAGE_ACCOUNT_NAME};"
@@ -55,6 +83,8 @@ class InvoiceUploadService:
         Raises:
             HTTPException: Si hay error en la subida
         """
+        from azure.core.exceptions import AzureError
+        
         try:
             # Validar tipo de archivo
             allowed_extensions = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.txt'}
@@ -72,6 +102,7 @@ class InvoiceUploadService:
             
             # Leer contenido del archivo
             file_content = await file.read()
+            content_hash = hashlib.sha256(file_content).hexdigest()
             
             # Verificar si Azure Storage está configurado correctamente
             use_local_storage = (
@@ -92,18 +123,20 @@ class InvoiceUploadService:
                 )
                 
                 # Subir el archivo
-                blob_client.upload_blob(
-                    file_content,
-                    overwrite=True,
-                    content_type=file.content_type or 'application/octet-stream'
-                )
+                with track_azure("blob_storage", "upload"):
+                    blob_client.upload_blob(
+                        file_content,
+                        overwrite=True,
+                        content_type=file.content_type or 'application/octet-stream'
+                    )
                 
                 return {
                     "filename": file.filename,
                     "blob_name": unique_filename,
                     "file_size": len(file_content),
                     "content_type": file.content_type,
-                    "blob_url": blob_client.url
+                    "blob_url": blob_client.url,
+                    "content_hash": content_hash
                 }
             else:
                 # Modo desarrollo: guardar localmente
@@ -124,7 +157,8 @@ class InvoiceUploadService:
                     "file_size": len(file_content),
                     "content_type": file.content_type,
                     "blob_url": blob_url,
-                    "local_path": local_file_path
+                    "local_path": local_file_path,
+                    "content_hash": content_hash
                 }
             
         except AzureError as e:
@@ -170,6 +204,7 @@ class InvoiceUploadService:
                 filename=file_info["filename"],
                 status="pending",
                 blob_url=file_info["blob_url"],
+                content_hash=file_info.get("content_hash"),
                 owner=owner,
                 invoice_direction=invoice_direction,
                 movimiento_cuenta=movimiento_cuenta,
@@ -179,15 +214,27 @@ class InvoiceUploadService:
             await session.commit()
             await session.refresh(invoice)
             
-            # Inicializar el agente con la sesión
+            # Inicializar el agente con la sesión (import diferido: SDKs de Azure/OpenAI)
+            from src.agents.enhanced_invoice_processing_agent import EnhancedInvoiceProcessingAgent
             agent = EnhancedInvoiceProcessingAgent(session=session)
             
-            # Procesar la factura con el agente mejorado
-            result = await agent.process_invoice(
-                blob_url=file_info["blob_url"],
-                user_id=user_id,
-                invoice_id=invoice.id
-            )
+            # Procesar la factura con el agente mejorado (slot de IA con prioridad alta)
+            async with ai_slot(PRIORITY_UPLOAD):
+                result = await agent.process_invoice(
+                    blob_url=file_info["blob_url"],
+                    user_id=user_id,
+                    invoice_id=invoice.id,
+                    content_hash=file_info.get("content_hash"),
+                    invoice_direction=invoice_direction
+                )
+            
+            # Guardar solo el resumen normalizado; el resultado crudo vive en raw_extractions
+            invoice.extracted_data = build_summary(result.get("extracted_data") or {})
+            apply_summary(invoice, invoice.extracted_data)
+            await PartnerResolver(session).link_invoice(invoice)
+            invoice.status = result.get("status", "completed")
+            invoice.pipeline_version = PIPELINE_VERSION
+            await session.commit()
             
             return {
                 "invoice_id": invoice.id,
@@ -207,8 +254,23 @@ class InvoiceUploadService:
             )
 
 
-# Instancia global del servicio
-upload_service = InvoiceUploadService()
+# Instancia global del servicio, creada en el primer uso
+_upload_service: Optional[InvoiceUploadService] = None
+
+
+def get_upload_service() -> InvoiceUploadService:
+    """Devuelve la instancia global del servicio de subida."""
+    global _upload_service
+    if _upload_service is None:
+        _upload_service = InvoiceUploadService()
+    return _upload_service
+
+
+def __getattr__(name: str):
+    # Compatibilidad con `from ...invoice_upload import upload_service`
+    if name == "upload_service":
+        return get_upload_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @router.post("/upload")
@@ -265,6 +327,7 @@ async def upload_invoice(
     
     try:
         # 1. Subir archivo a Azure Blob Storage
+        upload_service = get_upload_service()
         upload_result = await upload_service.upload_file_to_azure(file, current_user.id)
         
         # 2. Procesar con agente de IA
@@ -320,3 +383,66 @@ async def get_upload_status(
         "status": "processing",
         "message": "El procesamiento está en curso"
     }
+
+
+@router.post("/reprocess", status_code=status.HTTP_202_ACCEPTED)
+async def reprocess_invoices(
+    request: ReprocessRequest,
+    current_user: Principal = Depends(require_admin),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Lanza el reprocesamiento en segundo plano de facturas con IA.
+    
+    Las facturas se seleccionan por estado, rango de fechas, socio y versión
+    del pipeline. El trabajo corre con prioridad baja en la cola de IA, por
+    lo que nunca demora las subidas nuevas.
+    
+    Args:
+        request: Filtros de selección
+        current_user: Usuario administrador
+        session: Sesión de base de datos
+        
+    Returns:
+        Trabajo creado con su ID para consultar el progreso
+    """
+    filters = request.model_dump(mode="json", exclude={"dry_run"})
+    invoice_ids = await InvoiceReprocessor(session).select_invoice_ids(
+        statuses=request.statuses,
+        date_from=request.date_from,
+        date_to=request.date_to,
+        owner=request.owner,
+        pipeline_version_below=request.pipeline_version_below,
+        limit=request.limit
+    )
+    
+    job = start_reprocess_job(invoice_ids, filters, requested_by=current_user.id, dry_run=request.dry_run)
+    return job.to_dict(include_diffs=False)
+
+
+@router.get("/reprocess/{job_id}")
+async def get_reprocess_status(
+    job_id: str,
+    include_diffs: bool = True,
+    current_user: Principal = Depends(require_admin)
+):
+    """
+    Consulta el progreso de un trabajo de reprocesamiento.
+    
+    Al finalizar incluye el diff de campos modificados por factura.
+    
+    Args:
+        job_id: ID del trabajo
+        include_diffs: Incluir el detalle de cambios por factura
+        current_user: Usuario administrador
+        
+    Returns:
+        Estado, progreso y diferencias del trabajo
+    """
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo de reprocesamiento no encontrado"
+        )
+    return job.to_dict(include_diffs=include_diffs)
@@ -3,9 +3,10 @@
 Router para operaciones relacionadas con facturas.
 """
 
+import hashlib
 from typing import List, Optional
 from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
 =======
 from fastapi import APIRouter, Depends, HTTPException, Query
 >>>>>>> refs/remotes/origin/master
@@ -14,12 +15,18 @@ from sqlalchemy import select, and_
 from typing import List, Optional
 from datetime import date, datetime
 
-from src.core.database import get_session
+from src.core.database import get_session, get_read_session
 from src.core.permissions import require_permission, Permission
+from src.core.principal import Principal
 from src.core.security import get_current_user
 from src.models.user import User
 from src.models.invoice import Invoice, TipoFactura, MovimientoCuenta
 from src.services.financial_calculator import FinancialCalculator
+from src.services.duplicate_detector import DuplicateDetector
+from src.services.partner_resolver import PartnerResolver
+from src.services.invoice_extraction import map_analyze_result
+from src.services.raw_extraction_store import RawExtractionStore
+from src.repositories.returning import column_values, insert_returning, update_returning
 
 router = APIRouter()
 
@@ -32,7 +39,7 @@ async def list_invoices(
     fecha_desde: Optional[date] = None,
     fecha_hasta: Optional[date] = None,
     include_deleted: bool = False,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
     """Lista todas las facturas con filtros"""
@@ -117,7 +124,7 @@ async def create_invoice(
         if fecha_vencimiento and isinstance(fecha_vencimiento, str):
             fecha_vencimiento = datetime.strptime(fecha_vencimiento, '%Y-%m-%d').date()
         
-        new_invoice = Invoice(
+        new_invoice = await insert_returning(session, Invoice, dict(
             user_id=current_user.id,
             filename=invoice_data.get('filename', 'manual.pdf'),
             status=invoice_data.get('status', 'completed'),
@@ -138,11 +145,11 @@ async def create_invoice(
             es_compensacion_iva=invoice_data.get('es_compensacion_iva', False),
             metodo_pago=invoice_data.get('metodo_pago', 'transferencia'),
             partner_id=invoice_data.get('partner_id')
-        )
+        ), commit=False)
         
-        session.add(new_invoice)
+        # Vincular con el partner por CUIT, igual que en la carga de archivos
+        await PartnerResolver(session).link_invoice(new_invoice)
         await session.commit()
-        await session.refresh(new_invoice)
         
         return new_invoice
         
@@ -165,15 +172,16 @@ async def update_invoice(
     Actualiza una factura existente.
     """
     try:
-        invoice_query = select(Invoice).where(
+        invoice = await update_returning(
+            session,
+            Invoice,
             and_(
                 Invoice.id == invoice_id,
                 Invoice.user_id == current_user.id,
                 Invoice.is_deleted == False
-            )
+            ),
+            column_values(Invoice, invoice_data)
         )
-        result = await session.execute(invoice_query)
-        invoice = result.scalar_one_or_none()
         
         if not invoice:
             raise HTTPException(
@@ -181,13 +189,6 @@ async def update_invoice(
                 detail="Factura no encontrada"
             )
         
-        for key, value in invoice_data.items():
-            if hasattr(invoice, key):
-                setattr(invoice, key, value)
-        
-        await session.commit()
-        await session.refresh(invoice)
-        
         return invoice
         
     except HTTPException:
@@ -240,7 +241,7 @@ async def delete_invoice(
 @router.get("/{invoice_id}")
 async def get_invoice(
     invoice_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
     """Obtiene una factura por ID"""
@@ -263,28 +264,24 @@ async def get_invoice(
 async def create_invoice(
     invoice_data: dict,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_permission(Permission.INVOICE_CREATE))
 ):
     """Crea una nueva factura"""
-    # Validar permisos
-    from src.core.permissions import has_permission
-    if not has_permission(current_user, Permission.INVOICE_CREATE):
-        raise HTTPException(status_code=403, detail="Sin permisos para crear facturas")
-    
-    # Crear invoice
-    invoice = Invoice(**invoice_data, user_id=current_user.id)
+    values = {**invoice_data, "user_id": current_user.id}
     
-    # Validar coherencia de montos
-    validacion = FinancialCalculator.validar_coherencia_montos(invoice)
+    # Validar coherencia de montos (sobre una instancia sin persistir)
+    validacion = FinancialCalculator.validar_coherencia_montos(Invoice(**values))
     if not validacion["es_coherente"]:
         raise HTTPException(
             status_code=400, 
             detail=f"Montos incoherentes: {validacion['mensaje']}"
         )
     
-    session.add(invoice)
+    invoice = await insert_returning(session, Invoice, values, commit=False)
+    
+    # Vincular con el partner por CUIT, igual que en la carga de archivos
+    await PartnerResolver(session).link_invoice(invoice)
     await session.commit()
-    await session.refresh(invoice)
     
     return {"invoice": invoice, "message": "Factura creada exitosamente"}
 
@@ -293,7 +290,7 @@ async def update_invoice(
     invoice_id: int,
     invoice_data: dict,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_permission(Permission.INVOICE_EDIT))
 ):
 <<<<<<< HEAD
     """
@@ -301,18 +298,14 @@ async def update_invoice(
     """
     try:
         # Crear nueva factura
-        new_invoice = Invoice(
+        new_invoice = await insert_returning(session, Invoice, dict(
             user_id=current_user.id,
             filename=f"manual_{invoice_data.get('invoice_number', 'unknown')}.json",
             status="completed",
             extracted_data=invoice_data,
             owner=invoice_data.get('owner'),
             blob_url=None
-        )
-        
-        session.add(new_invoice)
-        await session.commit()
-        await session.refresh(new_invoice)
+        ))
         
         return {
             "message": "Factura creada exitosamente",
@@ -337,38 +330,49 @@ async def update_invoice(
 
 @router.post("/check-duplicate", summary="Verificar factura duplicada")
 async def check_duplicate_invoice(
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    cuit: Optional[str] = Form(None),
+    tipo_factura: Optional[str] = Form(None),
+    numero_factura: Optional[str] = Form(None),
+    razon_social: Optional[str] = Form(None),
+    total: Optional[float] = Form(None),
+    fecha_emision: Optional[date] = Form(None),
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
     Verifica si una factura es duplicada comparando con facturas existentes.
+    
+    1. Coincidencia exacta por hash del archivo (si se envía archivo)
+    2. Búsqueda indexada por bloque (CUIT, tipo, número)
+    3. Puntaje difuso sobre razón social, total y fecha dentro del bloque
+    
+    Si solo se envía el archivo y ya fue analizado antes, los datos se toman
+    del resultado crudo guardado; nunca se llama a Azure desde este endpoint.
     """
     try:
-        # Leer contenido del archivo
-        content = await file.read()
-        
-        # Aquí implementarías la lógica de detección de duplicados
-        # Por ahora, simulamos la verificación
-        
-        # Ejemplo de lógica de duplicados:
-        # 1. Extraer datos de la factura usando Document Intelligence
-        # 2. Comparar número de factura, CUIT, fecha y monto total
-        # 3. Devolver resultado
-        
-        # Simulación de verificación
-        duplicate_check = {
-            "is_duplicate": False,
-            "confidence": 0.0,
-            "similar_invoices": []
+        content_hash = None
+        fields = {
+            "cuit_proveedor": cuit,
+            "tipo_factura": tipo_factura,
+            "numero_factura": numero_factura,
+            "proveedor": razon_social,
+            "total": total,
+            "fecha_emision": fecha_emision,
         }
         
-        # En una implementación real, aquí harías:
-        # - Procesar el archivo con Document Intelligence
-        # - Buscar facturas similares en la base de datos
-        # - Calcular nivel de similitud
+        if file is not None:
+            content = await file.read()
+            content_hash = hashlib.sha256(content).hexdigest()
+            
+            # Completar campos faltantes desde un análisis previo del mismo archivo
+            if not (cuit and numero_factura):
+                raw = await RawExtractionStore(session).get(content_hash)
+                if raw is not None:
+                    mapped = map_analyze_result(raw)
+                    fields = {key: value if value is not None else mapped.get(key) for key, value in fields.items()}
         
-        return duplicate_check
+        return await DuplicateDetector(session).check_extracted(fields, content_hash=content_hash)
         
     except Exception as e:
         raise HTTPException(
@@ -377,34 +381,28 @@ async def check_duplicate_invoice(
         )
 =======
     """Actualiza una factura"""
-    from src.core.permissions import has_permission
-    if not has_permission(current_user, Permission.INVOICE_EDIT):
-        raise HTTPException(status_code=403, detail="Sin permisos para editar")
-    
-    query = select(Invoice).where(Invoice.id == invoice_id)
-    result = await session.execute(query)
-    invoice = result.scalar_one_or_none()
+    # Actualizar campos (UPDATE ... RETURNING, sin confirmar todavía)
+    invoice = await update_returning(
+        session,
+        Invoice,
+        Invoice.id == invoice_id,
+        {**column_values(Invoice, invoice_data), "updated_at": datetime.utcnow()},
+        commit=False
+    )
     
     if not invoice:
         raise HTTPException(status_code=404, detail="Factura no encontrada")
     
-    # Actualizar campos
-    for key, value in invoice_data.items():
-        if hasattr(invoice, key):
-            setattr(invoice, key, value)
-    
-    invoice.updated_at = datetime.utcnow()
-    
     # Validar coherencia
     validacion = FinancialCalculator.validar_coherencia_montos(invoice)
     if not validacion["es_coherente"]:
+        await session.rollback()
         raise HTTPException(
             status_code=400, 
             detail=f"Montos incoherentes: {validacion['mensaje']}"
         )
     
     await session.commit()
-    await session.refresh(invoice)
     
     return {"invoice": invoice, "message": "Factura actualizada"}
 
@@ -412,74 +410,60 @@ async def check_duplicate_invoice(
 async def soft_delete_invoice(
     invoice_id: int,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_permission(Permission.INVOICE_DELETE))
 ):
     """Soft delete de una factura"""
-    from src.core.permissions import has_permission
-    if not has_permission(current_user, Permission.INVOICE_DELETE):
-        raise HTTPException(status_code=403, detail="Sin permisos para eliminar")
-    
-    query = select(Invoice).where(Invoice.id == invoice_id)
-    result = await session.execute(query)
-    invoice = result.scalar_one_or_none()
+    invoice = await update_returning(
+        session,
+        Invoice,
+        Invoice.id == invoice_id,
+        {"is_deleted": True, "deleted_at": datetime.utcnow()}
+    )
     
     if not invoice:
         raise HTTPException(status_code=404, detail="Factura no encontrada")
     
-    invoice.is_deleted = True
-    invoice.deleted_at = datetime.utcnow()
-    await session.commit()
-    
     return {"message": "Factura eliminada (soft delete)"}
 
 @router.post("/{invoice_id}/restore")
 async def restore_invoice(
     invoice_id: int,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_permission(Permission.INVOICE_RESTORE))
 ):
     """Restaura una factura eliminada"""
-    from src.core.permissions import has_permission
-    if not has_permission(current_user, Permission.INVOICE_RESTORE):
-        raise HTTPException(status_code=403, detail="Sin permisos para restaurar")
-    
-    query = select(Invoice).where(Invoice.id == invoice_id)
-    result = await session.execute(query)
-    invoice = result.scalar_one_or_none()
+    invoice = await update_returning(
+        session,
+        Invoice,
+        Invoice.id == invoice_id,
+        {"is_deleted": False, "deleted_at": None}
+    )
     
     if not invoice:
         raise HTTPException(status_code=404, detail="Factura no encontrada")
     
-    invoice.is_deleted = False
-    invoice.deleted_at = None
-    await session.commit()
-    
     return {"message": "Factura restaurada"}
 
 @router.post("/{invoice_id}/approve")
 async def approve_invoice(
     invoice_id: int,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_permission(Permission.INVOICE_APPROVE))
 ):
     """Aprueba una factura"""
-    from src.core.permissions import has_permission
-    if not has_permission(current_user, Permission.INVOICE_APPROVE):
-        raise HTTPException(status_code=403, detail="Sin permisos para aprobar")
-    
-    query = select(Invoice).where(Invoice.id == invoice_id)
-    result = await session.execute(query)
-    invoice = result.scalar_one_or_none()
+    invoice = await update_returning(
+        session,
+        Invoice,
+        Invoice.id == invoice_id,
+        {
+            "payment_status": "approved",
+            "approver_id": current_user.id,
+            "approved_at": datetime.utcnow()
+        }
+    )
     
     if not invoice:
         raise HTTPException(status_code=404, detail="Factura no encontrada")
     
-    invoice.payment_status = "approved"
-    invoice.approver_id = current_user.id
-    invoice.approved_at = datetime.utcnow()
-    
-    await session.commit()
-    await session.refresh(invoice)
-    
     return {"invoice": invoice, "message": "Factura aprobada"}
 >>>>>>> refs/remotes/origin/master
@@ -1,18 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 
-from src.core.database import get_session
+from src.core.database import get_session, get_read_session
 from src.core.security import get_current_user
 from src.models.user import User
 from src.models.partner import Partner
+from src.services.partner_resolver import get_backfill_job, partner_index, start_backfill_job
+from src.repositories.returning import column_values, insert_returning, update_returning
 
 router = APIRouter()
 
 @router.get("/")
 async def list_partners(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
 <<<<<<< HEAD
@@ -66,7 +68,7 @@ async def list_partners(
 @router.get("/{partner_id}")
 async def get_partner(
     partner_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
     """Obtiene un socio por ID"""
@@ -86,10 +88,8 @@ async def create_partner(
     current_user: User = Depends(get_current_user)
 ):
     """Crea un nuevo socio"""
-    partner = Partner(**partner_data)
-    session.add(partner)
-    await session.commit()
-    await session.refresh(partner)
+    partner = await insert_returning(session, Partner, column_values(Partner, partner_data))
+    partner_index.put(partner.cuit, partner.id)
     return {"partner": partner, "message": "Socio creado"}
 
 @router.put("/{partner_id}")
@@ -100,17 +100,49 @@ async def update_partner(
     current_user: User = Depends(get_current_user)
 ):
     """Actualiza un socio"""
-    query = select(Partner).where(Partner.id == partner_id)
-    result = await session.execute(query)
-    partner = result.scalar_one_or_none()
+    partner = await update_returning(
+        session, Partner, Partner.id == partner_id, column_values(Partner, partner_data)
+    )
     
     if not partner:
         raise HTTPException(status_code=404, detail="Socio no encontrado")
     
-    for key, value in partner_data.items():
-        if hasattr(partner, key):
-            setattr(partner, key, value)
+    if "cuit" in partner_data:
+        # El CUIT anterior puede seguir apuntando a este partner
+        partner_index.invalidate()
+    return {"partner": partner, "message": "Socio actualizado"}
+
+
+@router.post("/backfill-invoices", status_code=202)
+async def backfill_invoice_partners(
+    batch_size: int = 500,
+    auto_create: Optional[bool] = None,
+    dry_run: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Lanza en segundo plano la vinculación por CUIT de las facturas sin socio asignado"""
+    if current_user.role not in ["admin", "superadmin"]:
+        raise HTTPException(status_code=403, detail="No tienes permisos para vincular facturas")
+    
+    job = start_backfill_job(
+        batch_size=batch_size,
+        auto_create=auto_create,
+        dry_run=dry_run,
+        requested_by=current_user.id
+    )
+    return job.to_dict()
+
+
+@router.get("/backfill-invoices/{job_id}")
+async def get_backfill_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Consulta el progreso de una vinculación de facturas"""
+    if current_user.role not in ["admin", "superadmin"]:
+        raise HTTPException(status_code=403, detail="No tienes permisos para vincular facturas")
     
-    await session.commit()
-    await session.refresh(partner)
-    return {"partner": partner, "message": "Socio actualizado"}
\ No newline at end of file
+    job = get_backfill_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo de vinculación no encontrado")
+    return job.to_dict()
@@ -2,15 +2,24 @@
 Endpoints para configuraciones del sistema.
 """
 
-from typing import Dict, Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
-from ...core.database import get_session
+from ...core.config import settings
+from ...core.database import get_session, read_router
+from ...core.pool_metrics import pool_metrics
+from ...core.profiler import profile_store
 from ...core.security import get_current_user
+from ...core.principal_cache import principal_cache
+from ...core.settings_cache import settings_cache
+from ...core.principal import Principal, get_current_principal, token_versions
+from ...services.audit_writer import audit_writer
 from ...models.user import User
 from ...services.system_settings_service import SystemSettingsService
+from ...services.backup_service import FREQUENCIES
 
 router = APIRouter()
 
@@ -41,6 +50,7 @@ class BackupSettingsRequest(BaseModel):
     backup_time: str  # "HH:MM" formato 24h
     retention_days: int
     backup_path: str
+    frequency: Optional[str] = None  # "hourly", "daily", "weekly", "disabled" (sin valor: según daily_backup)
 
 
 class UISettingsRequest(BaseModel):
@@ -58,6 +68,19 @@ class FormatCurrencyRequest(BaseModel):
     amount: float
 
 
+# Valores máximos por petición en los endpoints de formateo en lote
+MAX_FORMAT_BATCH = 10000
+
+
+class FormatNumbersRequest(BaseModel):
+    numbers: List[float] = Field(..., max_length=MAX_FORMAT_BATCH)
+    decimal_places: Optional[int] = None
+
+
+class FormatCurrenciesRequest(BaseModel):
+    amounts: List[float] = Field(..., max_length=MAX_FORMAT_BATCH)
+
+
 @router.get("/currency")
 async def get_currency_settings(
     db: AsyncSession = Depends(get_session),
@@ -71,7 +94,7 @@ async def get_currency_settings(
         )
     
     settings_service = SystemSettingsService(db)
-    return settings_service.get_currency_settings()
+    return await settings_service.get_currency_settings()
 
 
 @router.put("/currency")
@@ -90,7 +113,7 @@ async def set_currency_settings(
     settings_service = SystemSettingsService(db)
     
     try:
-        setting = settings_service.set_currency_settings(currency_settings.dict())
+        setting = await settings_service.set_currency_settings(currency_settings.dict())
         return {"message": "Configuraciones de moneda actualizadas correctamente", "setting": setting}
     except Exception as e:
         raise HTTPException(
@@ -112,7 +135,7 @@ async def get_number_format_settings(
         )
     
     settings_service = SystemSettingsService(db)
-    return settings_service.get_number_format_settings()
+    return await settings_service.get_number_format_settings()
 
 
 @router.put("/number-format")
@@ -131,7 +154,7 @@ async def set_number_format_settings(
     settings_service = SystemSettingsService(db)
     
     try:
-        setting = settings_service.set_number_format_settings(format_settings.dict())
+        setting = await settings_service.set_number_format_settings(format_settings.dict())
         return {"message": "Configuraciones de formato actualizadas correctamente", "setting": setting}
     except Exception as e:
         raise HTTPException(
@@ -150,7 +173,7 @@ async def format_number(
     settings_service = SystemSettingsService(db)
     
     try:
-        formatted = settings_service.format_number(request.number, request.decimal_places)
+        formatted = await settings_service.format_number(request.number, request.decimal_places)
         return {"formatted_number": formatted}
     except Exception as e:
         raise HTTPException(
@@ -169,7 +192,7 @@ async def format_currency(
     settings_service = SystemSettingsService(db)
     
     try:
-        formatted = settings_service.format_currency(request.amount)
+        formatted = await settings_service.format_currency(request.amount)
         return {"formatted_currency": formatted}
     except Exception as e:
         raise HTTPException(
@@ -178,6 +201,44 @@ async def format_currency(
         )
 
 
+@router.post("/format/number/batch")
+async def format_numbers(
+    request: FormatNumbersRequest,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Formatear un lote de números según configuración del sistema (mismo orden)."""
+    settings_service = SystemSettingsService(db)
+    
+    try:
+        formatted = await settings_service.format_numbers(request.numbers, request.decimal_places)
+        return {"formatted_numbers": formatted}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al formatear números: {str(e)}"
+        )
+
+
+@router.post("/format/currency/batch")
+async def format_currencies(
+    request: FormatCurrenciesRequest,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Formatear un lote de montos como moneda según configuración del sistema (mismo orden)."""
+    settings_service = SystemSettingsService(db)
+    
+    try:
+        formatted = await settings_service.format_currencies(request.amounts)
+        return {"formatted_currencies": formatted}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al formatear montos: {str(e)}"
+        )
+
+
 @router.get("/fiscal-year/current")
 async def get_current_fiscal_year(
     db: AsyncSession = Depends(get_session),
@@ -186,7 +247,7 @@ async def get_current_fiscal_year(
     """Obtener año fiscal actual."""
     settings_service = SystemSettingsService(db)
     
-    fiscal_year = settings_service.get_current_fiscal_year()
+    fiscal_year = await settings_service.get_current_fiscal_year()
     if not fiscal_year:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -212,7 +273,7 @@ async def create_fiscal_year(
     settings_service = SystemSettingsService(db)
     
     try:
-        fiscal_year = settings_service.create_fiscal_year(
+        fiscal_year = await settings_service.create_fiscal_year(
             year=fiscal_year_data.year,
             start_date=fiscal_year_data.start_date,
             end_date=fiscal_year_data.end_date
@@ -241,7 +302,7 @@ async def set_current_fiscal_year(
     settings_service = SystemSettingsService(db)
     
     try:
-        fiscal_year = settings_service.set_current_fiscal_year(year)
+        fiscal_year = await settings_service.set_current_fiscal_year(year)
         return {"message": f"Año fiscal {year} establecido como actual", "fiscal_year": fiscal_year}
     except ValueError as e:
         raise HTTPException(
@@ -268,7 +329,7 @@ async def get_backup_settings(
         )
     
     settings_service = SystemSettingsService(db)
-    return settings_service.get_backup_settings()
+    return await settings_service.get_backup_settings()
 
 
 @router.put("/backup/settings")
@@ -284,10 +345,16 @@ async def set_backup_settings(
             detail="No tienes permisos para modificar las configuraciones de backup"
         )
     
+    if backup_settings.frequency is not None and backup_settings.frequency not in FREQUENCIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Frecuencia inválida. Use: {', '.join(FREQUENCIES)}"
+        )
+    
     settings_service = SystemSettingsService(db)
     
     try:
-        setting = settings_service.set_backup_settings(backup_settings.dict())
+        setting = await settings_service.set_backup_settings(backup_settings.dict(exclude_none=True))
         return {"message": "Configuraciones de backup actualizadas correctamente", "setting": setting}
     except Exception as e:
         raise HTTPException(
@@ -301,7 +368,7 @@ async def perform_backup(
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Realizar backup manual."""
+    """Lanzar un backup manual en segundo plano (el progreso se consulta en /backup/logs)."""
     if current_user.role not in ["admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -311,7 +378,7 @@ async def perform_backup(
     settings_service = SystemSettingsService(db)
     
     try:
-        backup_log = settings_service.perform_backup()
+        backup_log = await settings_service.perform_backup()
         return {"message": "Backup iniciado correctamente", "backup_log": backup_log}
     except Exception as e:
         raise HTTPException(
@@ -320,6 +387,31 @@ async def perform_backup(
         )
 
 
+@router.post("/backup/{backup_log_id}/verify")
+async def verify_backup(
+    backup_log_id: int,
+    db: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Restaurar un backup en una base temporal y comparar las filas por tabla."""
+    if current_user.role not in ["admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para verificar backups"
+        )
+    
+    settings_service = SystemSettingsService(db)
+    
+    try:
+        verify_log = await settings_service.verify_backup(backup_log_id)
+        return {"message": "Verificación iniciada correctamente", "backup_log": verify_log}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.get("/backup/logs")
 async def get_backup_logs(
     limit: int = 50,
@@ -336,7 +428,7 @@ async def get_backup_logs(
     settings_service = SystemSettingsService(db)
     
     try:
-        logs = settings_service.get_backup_logs(limit)
+        logs = await settings_service.get_backup_logs(limit)
         return {"logs": logs}
     except Exception as e:
         raise HTTPException(
@@ -352,7 +444,7 @@ async def get_ui_settings(
 ):
     """Obtener configuraciones de interfaz."""
     settings_service = SystemSettingsService(db)
-    return settings_service.get_ui_settings()
+    return await settings_service.get_ui_settings()
 
 
 @router.put("/ui")
@@ -371,10 +463,109 @@ async def set_ui_settings(
     settings_service = SystemSettingsService(db)
     
     try:
-        setting = settings_service.set_ui_settings(ui_settings.dict())
+        setting = await settings_service.set_ui_settings(ui_settings.dict())
         return {"message": "Configuraciones de interfaz actualizadas correctamente", "setting": setting}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al actualizar configuraciones de interfaz: {str(e)}"
         )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Obtener estadísticas de las cachés en memoria del proceso."""
+    if current_user.role not in ["admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a las estadísticas del sistema"
+        )
+    
+    return {
+        "principal": principal_cache.stats(),
+        "token_versions": token_versions.stats(),
+        "settings": settings_cache.stats()
+    }
+
+
+@router.get("/audit/stats")
+async def get_audit_writer_stats(
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Obtener throughput y latencia de escritura del log de actividades."""
+    if current_user.role not in ["admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a las estadísticas del sistema"
+        )
+    
+    return audit_writer.stats()
+
+
+@router.get("/database/read-replica")
+async def get_read_replica_stats(
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Obtener estado de la réplica de lectura y contadores de ruteo."""
+    if current_user.role not in ["admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a las estadísticas del sistema"
+        )
+    
+    return read_router.stats()
+
+
+@router.get("/database/pool")
+async def get_database_pool_stats(
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Obtener uso del pool de conexiones y latencia de checkout."""
+    if current_user.role not in ["admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a las estadísticas del sistema"
+        )
+    
+    return pool_metrics.stats()
+
+
+@router.get("/profiles")
+async def list_profiles(
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Listar los perfiles de peticiones guardados (PROFILER_ENABLED)."""
+    if current_user.role not in ["admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a los perfiles de peticiones"
+        )
+    
+    return {"enabled": settings.PROFILER_ENABLED, "profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    format: str = Query("prof", pattern="^(prof|text)$"),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Descargar un perfil (.prof de pstats) o ver su resumen en texto (?format=text)."""
+    if current_user.role not in ["admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a los perfiles de peticiones"
+        )
+    
+    path = profile_store.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil no encontrado"
+        )
+    
+    if format == "text":
+        return PlainTextResponse(profile_store.summary(profile_id))
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
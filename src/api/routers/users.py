@@ -9,6 +9,8 @@ from pydantic import BaseModel, EmailStr
 from datetime import date, datetime
 from ...core.database import get_session
 from ...core.security import get_current_user
+from ...core.principal_cache import principal_cache
+from ...core.principal import token_versions
 from ...models.user import User
 from ...services.user_service import UserService
 
@@ -98,8 +100,7 @@ async def get_users(
     user_service = UserService(db)
     skip = (page - 1) * limit
     
-    users = user_service.get_all_users(skip=skip, limit=limit)
-    total_users = db.query(User).count()
+    users, total_users = await user_service.get_users_with_total(skip=skip, limit=limit)
     
     return UserListResponse(
         users=users,
@@ -132,7 +133,7 @@ async def get_user(
         )
     
     user_service = UserService(db)
-    user = user_service.get_user_by_id(user_id)
+    user = await user_service.get_user_by_id(user_id)
     
     if not user:
         raise HTTPException(
@@ -159,7 +160,7 @@ async def create_user(
     user_service = UserService(db)
     
     try:
-        user = user_service.create_user(user_data.dict())
+        user = await user_service.create_user(user_data.dict())
         return user
     except HTTPException:
         raise
@@ -194,7 +195,11 @@ async def update_user(
             # Los usuarios no-admin no pueden cambiar su rol
             update_data.pop("role", None)
         
-        user = user_service.update_user(user_id, update_data)
+        user = await user_service.update_user(user_id, update_data)
+        principal_cache.invalidate_user(user_id)
+        if {"role", "email", "password", "is_active"} & update_data.keys():
+            # Los tokens emitidos llevan rol y permisos: dejan de ser válidos
+            await token_versions.revoke(db, user_id)
         return user
     except HTTPException:
         raise
@@ -227,7 +232,9 @@ async def delete_user(
     user_service = UserService(db)
     
     try:
-        success = user_service.delete_user(user_id)
+        success = await user_service.delete_user(user_id)
+        principal_cache.invalidate_user(user_id)
+        await token_versions.revoke(db, user_id)
         if success:
             return {"message": "Usuario eliminado correctamente"}
         else:
@@ -260,7 +267,9 @@ async def restore_user(
     user_service = UserService(db)
     
     try:
-        success = user_service.restore_user(user_id)
+        success = await user_service.restore_user(user_id)
+        principal_cache.invalidate_user(user_id)
+        await token_versions.revoke(db, user_id)
         if success:
             return {"message": "Usuario restaurado correctamente"}
         else:
@@ -295,7 +304,8 @@ async def upload_profile_photo(
     user_service = UserService(db)
     
     try:
-        photo_url = user_service.upload_profile_photo(user_id, photo)
+        photo_url = await user_service.upload_profile_photo(user_id, photo)
+        principal_cache.invalidate_user(user_id)
         return {"message": "Foto de perfil subida correctamente", "photo_url": photo_url}
     except HTTPException:
         raise
@@ -323,7 +333,8 @@ async def delete_profile_photo(
     user_service = UserService(db)
     
     try:
-        success = user_service.delete_profile_photo(user_id)
+        success = await user_service.delete_profile_photo(user_id)
+        principal_cache.invalidate_user(user_id)
         if success:
             return {"message": "Foto de perfil eliminada correctamente"}
         else:
@@ -358,7 +369,8 @@ async def update_user_preferences(
     user_service = UserService(db)
     
     try:
-        user = user_service.update_user_preferences(user_id, preferences)
+        user = await user_service.update_user_preferences(user_id, preferences)
+        principal_cache.invalidate_user(user_id)
         return {"message": "Preferencias actualizadas correctamente", "user": user}
     except HTTPException:
         raise
@@ -386,7 +398,7 @@ async def get_user_statistics(
     user_service = UserService(db)
     
     try:
-        stats = user_service.get_user_statistics(user_id)
+        stats = await user_service.get_user_statistics(user_id)
         return stats
     except HTTPException:
         raise
@@ -32,6 +32,19 @@ class Settings:
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10080"))  # 7 días por defecto
     
+    # Hash de contraseñas (bcrypt). Al cambiar BCRYPT_ROUNDS los hashes se
+    # actualizan solos en el próximo login de cada usuario.
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))  # Más allá de esto se responde 503
+    
+    # Caché del usuario autenticado (máxima demora en ver cambios hechos desde otro worker)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+    
+    # Revocación de tokens: cada cuánto se recarga el mapa en memoria usuario -> token_version
+    TOKEN_VERSION_REFRESH_SECONDS: float = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "30"))
+    
     # Configuración de la Base de Datos (PostgreSQL)
     # Priorizar DATABASE_URL de Replit si existe, sino construir desde partes
     _DATABASE_URL_ENV: str = os.getenv("DATABASE_URL", "")
@@ -48,15 +61,54 @@ class Settings:
             return self._DATABASE_URL_ENV
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
-    @property
-    def ASYNC_DATABASE_URL(self) -> str:
-        base_url = self.DATABASE_URL
+    @staticmethod
+    def _to_async_url(base_url: str) -> str:
         if base_url.startswith("postgresql://"):
             base_url = base_url.replace("postgresql://", "postgresql+asyncpg://")
             if "?sslmode=" in base_url:
                 base_url = base_url.split("?sslmode=")[0] + "?ssl=require"
         return base_url
     
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return self._to_async_url(self.DATABASE_URL)
+    
+    # ====== Pool de conexiones ======
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    # Segundos de espera por una conexión libre antes de TimeoutError
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "3600"))
+    DB_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "30"))
+    DB_COMMAND_TIMEOUT_SECONDS: float = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS", "60"))
+    # Sentencias preparadas cacheadas por conexión en asyncpg (0 = desactivado, ej: detrás de PgBouncer)
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # statement_timeout (ms) de las rutas de reportes y análisis
+    REPORT_STATEMENT_TIMEOUT_MS: int = int(os.getenv("REPORT_STATEMENT_TIMEOUT_MS", "30000"))
+    
+    # ====== Caché de configuraciones del sistema ======
+    # Ventana máxima para ver cambios de otro worker si LISTEN/NOTIFY no está disponible (0 = sin vencimiento)
+    SETTINGS_CACHE_TTL_SECONDS: float = float(os.getenv("SETTINGS_CACHE_TTL_SECONDS", "300"))
+    # Escuchar NOTIFY de Postgres para invalidar la caché entre workers
+    SETTINGS_CACHE_LISTEN: bool = os.getenv("SETTINGS_CACHE_LISTEN", "true").lower() == "true"
+    
+    # ====== Réplica de lectura ======
+    # Opcional: si está vacía, reportes y listados leen del primario
+    READ_DATABASE_URL: str = os.getenv("READ_DATABASE_URL", "")
+    # Lag máximo tolerado antes de volver al primario
+    READ_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("READ_REPLICA_MAX_LAG_SECONDS", "30"))
+    # Cada cuánto se vuelve a medir salud y lag de la réplica
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = float(os.getenv("READ_REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+    
+    @property
+    def ASYNC_READ_DATABASE_URL(self) -> str:
+        return self._to_async_url(self.READ_DATABASE_URL)
+    
+    # ====== Migraciones (Alembic) ======
+    # Al arrancar: "upgrade" migra a la cabeza bajo un advisory lock, "check" rechaza
+    # el arranque si la base está atrasada (migrar en el deploy), "off" no verifica
+    DB_MIGRATIONS_ON_STARTUP: str = os.getenv("DB_MIGRATIONS_ON_STARTUP", "upgrade").lower()
+    
     # CORS
     ALLOWED_HOSTS: List[str] = os.getenv("ALLOWED_HOSTS", "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000,http://127.0.0.1:5173").split(",")
     
@@ -79,6 +131,55 @@ class Settings:
     AZURE_STORAGE_ACCOUNT_NAME: str = os.getenv("AZURE_STORAGE_ACCOUNT_NAME", "")
     AZURE_STORAGE_ACCOUNT_KEY: str = os.getenv("AZURE_STORAGE_ACCOUNT_KEY", "")
     AZURE_STORAGE_CONTAINER_NAME: str = os.getenv("AZURE_STORAGE_CONTAINER_NAME", "invoices")  # Contenedor para facturas
+
+    # ====== Resultados crudos de Document Intelligence ======
+    RAW_EXTRACTION_CODEC: str = os.getenv("RAW_EXTRACTION_CODEC", "zstd")  # 'zstd' (si está instalado) o 'gzip'
+
+    # ====== Cola de procesamiento con IA ======
+    AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "4"))  # Extracciones simultáneas
+    REPROCESS_MAX_CONCURRENCY: int = int(os.getenv("REPROCESS_MAX_CONCURRENCY", "1"))  # Slots máximos para reprocesos
+    REPROCESS_DELAY_SECONDS: float = float(os.getenv("REPROCESS_DELAY_SECONDS", "0.5"))  # Pausa entre reprocesos
+
+    # ====== Detección de duplicados ======
+    DUPLICATE_THRESHOLD: float = float(os.getenv("DUPLICATE_THRESHOLD", "0.85"))  # Confianza mínima para marcar duplicado
+
+    # ====== Vinculación CUIT -> Partner ======
+    PARTNER_INDEX_TTL_SECONDS: int = int(os.getenv("PARTNER_INDEX_TTL_SECONDS", "300"))  # Refresco del índice en memoria
+    PARTNER_AUTO_CREATE: bool = os.getenv("PARTNER_AUTO_CREATE", "false").lower() == "true"  # Crear partners para CUITs desconocidos
+
+    # ====== Idempotencia (cabecera Idempotency-Key) ======
+    IDEMPOTENCY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))  # Ventana de reintentos
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", "300"))  # Bloqueos huérfanos
+
+    # ====== Log de actividades (escritura en lotes) ======
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0"))  # Demora máxima antes de escribir
+    AUDIT_FLUSH_MAX_BATCH: int = int(os.getenv("AUDIT_FLUSH_MAX_BATCH", "500"))  # Filas por INSERT
+    AUDIT_BUFFER_MAX: int = int(os.getenv("AUDIT_BUFFER_MAX", "10000"))  # Con el buffer lleno se espera a escribir
+    ACTIVITY_LOG_PARTITIONS_AHEAD: int = int(os.getenv("ACTIVITY_LOG_PARTITIONS_AHEAD", "2"))  # Particiones mensuales creadas por adelantado
+    ACTIVITY_LOG_MAINTENANCE_INTERVAL_HOURS: float = float(os.getenv("ACTIVITY_LOG_MAINTENANCE_INTERVAL_HOURS", "24"))  # Particiones y retención
+    
+    # ====== Backups (pg_dump en formato directorio) ======
+    BACKUP_PARALLEL_JOBS: int = int(os.getenv("BACKUP_PARALLEL_JOBS", "2"))  # -j de pg_dump / pg_restore
+    BACKUP_COMPRESSION: str = os.getenv("BACKUP_COMPRESSION", "6")  # --compress de pg_dump (ej: "6" o "zstd:3" en PG16+)
+    BACKUP_TIMEZONE: str = os.getenv("BACKUP_TIMEZONE", "America/Argentina/Buenos_Aires")  # Zona de backup_time
+    BACKUP_SCHEDULER_ENABLED: bool = os.getenv("BACKUP_SCHEDULER_ENABLED", "true").lower() == "true"
+    BACKUP_SCHEDULER_INTERVAL_SECONDS: float = float(os.getenv("BACKUP_SCHEDULER_INTERVAL_SECONDS", "60"))  # Cada cuánto se revisa si toca backup
+    BACKUP_PROGRESS_INTERVAL_SECONDS: float = float(os.getenv("BACKUP_PROGRESS_INTERVAL_SECONDS", "2"))  # Frecuencia de escritura del progreso
+    
+    # ====== Métricas (GET /metrics, formato Prometheus) ======
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")  # Si se define, exige "Authorization: Bearer <token>"
+    
+    # ====== Consultas por petición (N+1) ======
+    QUERY_STATS_ENABLED: bool = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+    QUERY_LOG_MAX_COUNT: int = int(os.getenv("QUERY_LOG_MAX_COUNT", "20"))  # Más consultas que esto se registra con las sentencias
+    QUERY_LOG_MAX_MS: float = float(os.getenv("QUERY_LOG_MAX_MS", "500"))  # Tiempo total en la base por petición
+    
+    # ====== Profiler de peticiones (cProfile, opcional) ======
+    PROFILER_ENABLED: bool = os.getenv("PROFILER_ENABLED", "false").lower() == "true"  # Desactivado no agrega middleware
+    PROFILER_SAMPLE_RATE: float = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))  # Fracción de peticiones perfiladas al azar (0-1)
+    PROFILER_DIR: str = os.getenv("PROFILER_DIR", "profiles")
+    PROFILER_MAX_FILES: int = int(os.getenv("PROFILER_MAX_FILES", "100"))  # Perfiles conservados en disco
     
     # AFIP
     AFIP_TAX_ID: str = os.getenv("AFIP_TAX_ID", "")
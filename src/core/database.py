@@ -2,47 +2,85 @@
 Configuración de la base de datos y sesiones SQLAlchemy.
 """
 
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from urllib.parse import urlparse, parse_qs
 from src.core.config import settings
-from src.models.base import Base
-
-
-# Configurar connect_args con SSL seguro
-connect_args_config = {
-    "server_settings": {"jit": "off"},
-    "command_timeout": 60,
-    "timeout": 30
-}
-
-# Parsear URL para detectar configuración SSL explícita
-parsed_url = urlparse(settings.ASYNC_DATABASE_URL)
-query_params = parse_qs(parsed_url.query)
-
-# Solo forzar SSL si NO hay ningún parámetro SSL explícito en la URL
-has_ssl_config = (
-    "ssl" in query_params or
-    "sslmode" in query_params or
-    "ssl=" in settings.ASYNC_DATABASE_URL.lower() or
-    "sslmode=" in settings.ASYNC_DATABASE_URL.lower()
-)
+from src.core.pool_metrics import InstrumentedQueuePool, pool_metrics
+
+
+def build_connect_args(database_url: str) -> dict:
+    """
+    Arma los connect_args de asyncpg con SSL seguro para una URL.
+    
+    Args:
+        database_url: URL async de la base
+        
+    Returns:
+        Diccionario de connect_args para create_async_engine
+    """
+    connect_args = {
+        "server_settings": {"jit": "off"},
+        "command_timeout": settings.DB_COMMAND_TIMEOUT_SECONDS,
+        "timeout": settings.DB_CONNECT_TIMEOUT_SECONDS,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+    }
+    
+    # Parsear URL para detectar configuración SSL explícita
+    query_params = parse_qs(urlparse(database_url).query)
+    
+    # Solo forzar SSL si NO hay ningún parámetro SSL explícito en la URL
+    has_ssl_config = (
+        "ssl" in query_params or
+        "sslmode" in query_params or
+        "ssl=" in database_url.lower() or
+        "sslmode=" in database_url.lower()
+    )
+    
+    if not has_ssl_config:
+        # Usar ssl=True para habilitar SSL con verificación predeterminada
+        connect_args["ssl"] = True
+    
+    return connect_args
+
+
+
+
+def build_engine(database_url: str, name: str):
+    """
+    Crea un engine async con el pool configurado en Settings e instrumentado.
+    
+    Args:
+        database_url: URL async de la base
+        name: Nombre del pool en las métricas ("primary", "replica")
+        
+    Returns:
+        AsyncEngine registrado en `pool_metrics`
+    """
+    new_engine = create_async_engine(
+        database_url,
+        echo=settings.DEBUG,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        connect_args=build_connect_args(database_url)
+    )
+    pool_metrics.register(name, new_engine)
+    return new_engine
 
-if not has_ssl_config:
-    # Usar ssl=True para habilitar SSL con verificación predeterminada
-    connect_args_config["ssl"] = True
 
 # Crear motor asíncrono de SQLAlchemy con pool de conexiones
-engine = create_async_engine(
-    settings.ASYNC_DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    connect_args=connect_args_config
-)
+engine = build_engine(settings.ASYNC_DATABASE_URL, "primary")
 
 # Crear factory de sesiones asíncronas
 AsyncSessionLocal = async_sessionmaker(
@@ -63,15 +101,206 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def init_db():
+# Motor opcional de solo lectura (réplica). Sin READ_DATABASE_URL todo va al primario.
+read_engine = None
+ReadSessionLocal = None
+
+if settings.READ_DATABASE_URL:
+    read_engine = build_engine(settings.ASYNC_READ_DATABASE_URL, "replica")
+    ReadSessionLocal = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+
+# Lag de replicación en segundos. Un standby al día (todo el WAL recibido ya
+# aplicado) cuenta como 0 aunque el primario esté ocioso; una base que no está
+# en recovery (ej: una segunda instancia local) también es lag 0.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReadReplicaRouter:
     """
-    Inicializa la base de datos creando todas las tablas.
+    Decide si las lecturas van a la réplica o al primario.
+    
+    La salud y el lag de la réplica se miden como mucho una vez cada
+    `check_interval` segundos (una consulta compartida por todas las
+    peticiones); si la réplica no responde o su lag supera `max_lag`, las
+    lecturas vuelven al primario hasta la próxima medición. Los contadores
+    de cada decisión quedan en `stats()`.
     """
-    async with engine.begin() as conn:
-        # Importar todos los modelos aquí para que se registren en Base
-        from src.models import user, invoice, partner, system_settings, activity_log  # noqa
+    
+    def __init__(self, engine=None, max_lag: float = 30.0, check_interval: float = 5.0, check_timeout: float = 2.0):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._lock = asyncio.Lock()
+        self._checked_at = 0.0
+        self._state = "unknown"
+        self._lag: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._decisions = {"replica": 0, "primary_no_replica": 0, "primary_down": 0, "primary_lagging": 0}
+        self._checks = 0
+        self._check_failures = 0
+    
+    async def _measure(self) -> None:
+        self._checks += 1
+        try:
+            async with self.engine.connect() as conn:
+                lag = await asyncio.wait_for(conn.scalar(REPLICA_LAG_SQL), timeout=self.check_timeout)
+            self._lag = float(lag or 0)
+            self._state = "ok" if self._lag <= self.max_lag else "lagging"
+            self._last_error = None
+        except Exception as e:
+            self._check_failures += 1
+            self._lag = None
+            self._state = "down"
+            self._last_error = str(e)
+        self._checked_at = time.monotonic()
+    
+    async def route(self) -> str:
+        """
+        Devuelve el destino de la próxima lectura: "replica" o "primary".
+        """
+        if self.engine is None:
+            self._decisions["primary_no_replica"] += 1
+            return "primary"
         
-        print("🔧 Creando tablas en la base de datos...")
-        # Crear todas las tablas usando Base de SQLAlchemy
-        await conn.run_sync(Base.metadata.create_all)
-        print("✅ Tablas creadas exitosamente")
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            async with self._lock:
+                # Otra petición pudo medir mientras esperábamos el lock
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    await self._measure()
+        
+        if self._state == "ok":
+            self._decisions["replica"] += 1
+            return "replica"
+        self._decisions["primary_down" if self._state == "down" else "primary_lagging"] += 1
+        return "primary"
+    
+    def mark_down(self, error: Exception) -> None:
+        """Marca la réplica como caída tras un error de conexión en una petición."""
+        self._state = "down"
+        self._lag = None
+        self._last_error = str(error)
+        self._checked_at = time.monotonic()
+    
+    def stats(self) -> dict:
+        """Estado de la réplica y contadores de ruteo."""
+        return {
+            "configured": self.engine is not None,
+            "state": self._state if self.engine is not None else "disabled",
+            "lag_seconds": self._lag,
+            "max_lag_seconds": self.max_lag,
+            "last_error": self._last_error,
+            "checks": self._checks,
+            "check_failures": self._check_failures,
+            "decisions": dict(self._decisions)
+        }
+
+
+read_router = ReadReplicaRouter(
+    read_engine,
+    max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.READ_REPLICA_CHECK_INTERVAL_SECONDS
+)
+
+
+async def apply_statement_timeout(session: AsyncSession, timeout_ms: int) -> None:
+    """
+    Limita la duración de cada sentencia de la transacción actual de la sesión.
+    
+    Usa SET LOCAL, así que vale hasta el próximo commit/rollback. En bases que
+    no son PostgreSQL (ej: SQLite en pruebas) no hace nada.
+    
+    Args:
+        session: Sesión de base de datos
+        timeout_ms: Milisegundos máximos por sentencia
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    await session.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+
+
+@asynccontextmanager
+async def read_session_scope(statement_timeout_ms: Optional[int] = None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Abre una sesión de solo lectura en la réplica o en el primario.
+    
+    Args:
+        statement_timeout_ms: statement_timeout opcional para la sesión
+    """
+    if await read_router.route() == "primary":
+        async with AsyncSessionLocal() as session:
+            if statement_timeout_ms:
+                await apply_statement_timeout(session, statement_timeout_ms)
+            yield session
+        return
+    
+    async with ReadSessionLocal() as session:
+        try:
+            if statement_timeout_ms:
+                await apply_statement_timeout(session, statement_timeout_ms)
+            yield session
+        except (DBAPIError, OSError) as e:
+            # Si la réplica se cayó a mitad de la petición, las siguientes van al primario
+            if isinstance(e, OSError) or e.connection_invalidated:
+                read_router.mark_down(e)
+            raise
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency para obtener una sesión de solo lectura.
+    
+    Usa la réplica si está configurada, sana y al día; si no, el primario.
+    Solo para rutas que no escriben: la réplica rechaza INSERT/UPDATE.
+    """
+    async with read_session_scope() as session:
+        yield session
+
+
+def read_session_with_timeout(timeout_ms: int):
+    """
+    Crea una dependency de sesión de lectura con statement_timeout propio.
+    
+    Para rutas con consultas pesadas: una consulta que se pasa del límite
+    se cancela en el servidor y libera la conexión del pool.
+    
+    Args:
+        timeout_ms: Milisegundos máximos por sentencia
+        
+    Returns:
+        Dependency para usar con Depends()
+    """
+    async def dependency() -> AsyncGenerator[AsyncSession, None]:
+        async with read_session_scope(timeout_ms) as session:
+            yield session
+    
+    return dependency
+
+
+# Sesión de lectura de reportes y análisis (statement_timeout de Settings)
+get_report_session = read_session_with_timeout(settings.REPORT_STATEMENT_TIMEOUT_MS)
+
+
+async def init_db():
+    """
+    Inicializa la base de datos aplicando las migraciones de Alembic pendientes.
+    
+    Lo usan los scripts de instalación y deploy; la aplicación solo verifica la
+    revisión al arrancar (ver `src.core.migrations.ensure_schema`).
+    """
+    from src.core.migrations import ensure_schema
+    
+    print("🔧 Aplicando migraciones en la base de datos...")
+    revision = await ensure_schema(engine, mode="upgrade")
+    print(f"✅ Base de datos en la revisión {revision}")
@@ -0,0 +1,314 @@
+"""
+Middleware de idempotencia para endpoints de creación.
+
+Los clientes pueden enviar la cabecera `Idempotency-Key` en los POST de
+subida y creación de facturas. La primera petición se procesa normalmente y
+su respuesta se guarda junto con la huella de la petición; los reintentos
+con la misma clave (dentro de la ventana configurada) reciben la respuesta
+original sin volver a escribir en storage ni llamar a la IA. Mientras la
+primera petición sigue en curso, los reintentos reciben 409.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+# Endpoints que aceptan Idempotency-Key
+DEFAULT_IDEMPOTENT_PATHS = (
+    "/api/invoices",
+    "/api/v1/invoices/upload",
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    """Algunos drivers devuelven fechas sin zona horaria; se asumen UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _user_scope(scope) -> Optional[str]:
+    """Obtiene el usuario (sub del JWT) sin consultar la base de datos."""
+    authorization = _header(scope, b"authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
+def _fingerprint(scope, body: bytes) -> str:
+    """
+    Huella SHA-256 de método + ruta + cuerpo.
+
+    En multipart se descarta el boundary, que el navegador genera al azar en
+    cada reintento aunque el archivo y los campos sean los mismos.
+    """
+    content_type = _header(scope, b"content-type") or ""
+    if content_type.startswith("multipart/") and "boundary=" in content_type:
+        boundary = content_type.split("boundary=", 1)[1].split(";", 1)[0].strip().strip('"')
+        if boundary:
+            body = body.replace(boundary.encode("latin-1"), b"")
+    digest = hashlib.sha256(f"{scope['method']} {scope['path'].rstrip('/')}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+async def _send_json(send, status_code: int, content: dict, extra_headers: Iterable = ()) -> None:
+    body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *extra_headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """
+    Middleware ASGI que aplica `Idempotency-Key` a los POST configurados.
+
+    Las peticiones sin cabecera, sin token válido o a otras rutas pasan sin
+    cambios. Si la base de datos no está disponible la petición se procesa
+    sin idempotencia.
+    """
+
+    def __init__(self, app, paths: Iterable[str] = DEFAULT_IDEMPOTENT_PATHS):
+        self.app = app
+        self.paths = {path.rstrip("/") for path in paths}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"].rstrip("/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        key = _header(scope, IDEMPOTENCY_HEADER)
+        user_scope = _user_scope(scope) if key else None
+        if not key or not user_scope:
+            await self.app(scope, receive, send)
+            return
+
+        if len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": "Idempotency-Key demasiado larga (máximo 255 caracteres)"})
+            return
+
+        # Leer el cuerpo completo para calcular la huella y re-entregarlo a la app
+        messages: List[dict] = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request" or not message.get("more_body", False):
+                break
+        fingerprint = _fingerprint(scope, b"".join(m.get("body", b"") for m in messages))
+
+        try:
+            record = await self._claim(key, user_scope, fingerprint, scope)
+        except Exception as e:
+            logger.warning(f"Idempotencia no disponible, procesando sin clave: {str(e)}")
+            record = None
+            claimed = False
+        else:
+            claimed = record is None
+
+        if record is not None:
+            await self._reply_existing(record, fingerprint, send)
+            return
+
+        async def replay_receive():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        if not claimed:
+            await self.app(scope, replay_receive, send)
+            return
+
+        response = {"status": 500, "content_type": None, "body": bytearray()}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        response["content_type"] = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                response["body"].extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except Exception:
+            await self._release(key, user_scope)
+            raise
+
+        if response["status"] >= 500:
+            # Error del servidor: liberar la clave para permitir reintentos
+            await self._release(key, user_scope)
+        else:
+            await self._complete(key, user_scope, response)
+
+    async def _claim(self, key: str, user_scope: str, fingerprint: str, scope) -> Optional[IdempotencyKey]:
+        """
+        Intenta reservar la clave para esta petición.
+
+        Returns:
+            None si la clave quedó reservada para esta petición, o el registro
+            existente si ya hay otra petición (en curso o terminada) con la misma clave
+        """
+        now = _utcnow()
+        async with AsyncSessionLocal() as session:
+            for _ in range(2):
+                session.add(IdempotencyKey(
+                    key=key,
+                    user_scope=user_scope,
+                    fingerprint=fingerprint,
+                    method=scope["method"],
+                    path=scope["path"][:255],
+                    status="processing",
+                    locked_at=now,
+                    expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+                ))
+                try:
+                    await session.commit()
+                    return None
+                except IntegrityError:
+                    await session.rollback()
+
+                result = await session.execute(
+                    select(IdempotencyKey).where(
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.user_scope == user_scope
+                    )
+                )
+                existing = result.scalar_one_or_none()
+                if existing is None:
+                    continue
+
+                if _aware(existing.expires_at) <= now:
+                    # Ventana vencida: la clave puede reutilizarse
+                    await session.delete(existing)
+                    await session.commit()
+                    continue
+
+                stale_before = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+                if (existing.status == "processing"
+                        and existing.fingerprint == fingerprint
+                        and _aware(existing.locked_at) < stale_before):
+                    # La petición original murió sin terminar: tomar el bloqueo
+                    taken = await session.execute(
+                        update(IdempotencyKey)
+                        .where(
+                            IdempotencyKey.id == existing.id,
+                            IdempotencyKey.status == "processing",
+                            IdempotencyKey.locked_at == existing.locked_at
+                        )
+                        .values(locked_at=now)
+                    )
+                    await session.commit()
+                    if taken.rowcount == 1:
+                        return None
+
+                return existing
+
+        raise RuntimeError("No se pudo reservar la clave de idempotencia")
+
+    async def _reply_existing(self, record: IdempotencyKey, fingerprint: str, send) -> None:
+        """Responde a un reintento con la respuesta original o con un error."""
+        if record.fingerprint != fingerprint:
+            await _send_json(send, 422, {
+                "detail": "La Idempotency-Key ya se utilizó con una petición diferente"
+            })
+            return
+
+        if record.status != "completed":
+            await _send_json(send, 409, {
+                "detail": "La petición original con esta Idempotency-Key todavía se está procesando"
+            }, extra_headers=[(b"retry-after", b"2")])
+            return
+
+        body = record.response_body or b""
+        headers = [
+            (b"content-length", str(len(body)).encode()),
+            (b"idempotent-replayed", b"true"),
+        ]
+        if record.response_content_type:
+            headers.append((b"content-type", record.response_content_type.encode("latin-1")))
+        await send({"type": "http.response.start", "status": record.response_status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _complete(self, key: str, user_scope: str, response: dict) -> None:
+        """Guarda la respuesta final de la petición original."""
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.key == key, IdempotencyKey.user_scope == user_scope)
+                    .values(
+                        status="completed",
+                        response_status=response["status"],
+                        response_content_type=response["content_type"],
+                        response_body=bytes(response["body"])
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error guardando respuesta idempotente: {str(e)}")
+
+    async def _release(self, key: str, user_scope: str) -> None:
+        """Elimina la reserva para que el cliente pueda reintentar."""
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.user_scope == user_scope
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error liberando clave de idempotencia: {str(e)}")
+
+
+async def purge_expired_keys() -> int:
+    """
+    Elimina las claves de idempotencia vencidas.
+
+    Returns:
+        Cantidad de claves eliminadas
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at < _utcnow())
+        )
+        await session.commit()
+        return result.rowcount
@@ -0,0 +1,376 @@
+"""
+Métricas en formato de texto de Prometheus (`GET /metrics`).
+
+Registro mínimo de contadores, gauges e histogramas en memoria del proceso
+(sin dependencias externas). En el camino de cada petición solo se toma el
+tiempo y se suman contadores; el estado del pool, la réplica, la cola de IA
+y las cachés se lee recién al exportar, a través de los colectores.
+
+Con varios workers cada proceso tiene sus propias métricas: Prometheus debe
+apuntar a cada worker o agregarlas con la etiqueta de instancia.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Límites (segundos) de los histogramas de latencia HTTP
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Llamadas a Azure: Document Intelligence puede tardar decenas de segundos
+AZURE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Familia de métricas de un colector: (nombre, tipo, ayuda, [(etiquetas, valor)])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base de las métricas con etiquetas."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    """Contador monótono por combinación de etiquetas."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Suma `amount` a la serie de las etiquetas indicadas (en orden de `labelnames`)."""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self._labels(labels))} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Valor que sube y baja (ej: peticiones en curso)."""
+
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Histograma acumulativo con límites fijos (`le`), suma y cantidad."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por serie: conteos por bucket (el último es +Inf), suma y cantidad
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Registra una observación (ej: segundos de una petición)."""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = self._labels(labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels({**base, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(base)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(base)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Métricas del proceso y colectores que se leen al exportar."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """
+        Agrega una función que devuelve familias de métricas al exportar.
+
+        Args:
+            collector: Callable sin argumentos que devuelve (nombre, tipo, ayuda, muestras)
+        """
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                # Un colector roto no debe dejar sin métricas al resto
+                lines.append(f"# colector {getattr(collector, '__name__', collector)} falló: {_escape(e)}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+# Registro compartido por todo el proceso
+metrics = MetricsRegistry()
+
+http_requests_total = metrics.counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status")
+)
+http_request_duration_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route", "status")
+)
+http_requests_in_flight = metrics.gauge("http_requests_in_flight", "Peticiones HTTP en curso")
+
+azure_request_duration_seconds = metrics.histogram(
+    "azure_request_duration_seconds", "Latencia de las llamadas a servicios de Azure",
+    ("service", "operation", "outcome"), buckets=AZURE_BUCKETS
+)
+azure_throttled_total = metrics.counter(
+    "azure_throttled_total", "Llamadas a Azure rechazadas por límite de tasa (HTTP 429)", ("service", "operation")
+)
+
+
+def route_template(scope) -> str:
+    """
+    Plantilla de la ruta que atendió la petición (ej: /api/invoices/{invoice_id}).
+
+    Las rutas inexistentes se agrupan en "unmatched" para no crear una serie
+    por cada URL escaneada.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else "unmatched"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que cuenta peticiones y mide su latencia por ruta y estado."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            labels = (scope["method"], route_template(scope), str(status[0]))
+            http_requests_total.inc(*labels)
+            http_request_duration_seconds.observe(elapsed, *labels)
+
+
+def is_throttled(error: BaseException) -> bool:
+    """Si el error es un rechazo por límite de tasa (Azure SDK u OpenAI)."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code == 429
+
+
+@contextmanager
+def track_azure(service: str, operation: str):
+    """
+    Mide una llamada a Azure y cuenta los rechazos por límite de tasa.
+
+    Sirve tanto para llamadas síncronas del SDK como para `await` dentro del bloque.
+
+    Args:
+        service: doc_intelligence, openai o blob_storage
+        operation: Operación (ej: analyze_invoice, chat_completion)
+    """
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException as e:
+        outcome = "error"
+        if is_throttled(e):
+            outcome = "throttled"
+            azure_throttled_total.inc(service, operation)
+        raise
+    finally:
+        azure_request_duration_seconds.observe(time.perf_counter() - started, service, operation, outcome)
+
+
+def _gauge(name: str, documentation: str, samples: List[Tuple[Dict[str, str], float]]) -> MetricFamily:
+    return (name, "gauge", documentation, samples)
+
+
+def _counter(name: str, documentation: str, samples: List[Tuple[Dict[str, str], float]]) -> MetricFamily:
+    return (name, "counter", documentation, samples)
+
+
+def collect_database() -> List[MetricFamily]:
+    """Pool de conexiones (por engine) y estado de la réplica de lectura."""
+    from src.core.database import read_router
+    from src.core.pool_metrics import pool_metrics
+
+    pools = pool_metrics.stats()
+    families = [
+        _counter("db_pool_checkouts_total", "Conexiones entregadas por el pool",
+                 [({"pool": name}, data["checkouts"]) for name, data in pools.items()]),
+        _counter("db_pool_timeouts_total", "Checkouts que terminaron en TimeoutError (pool agotado)",
+                 [({"pool": name}, data["timeouts"]) for name, data in pools.items()]),
+        _gauge("db_pool_checkout_p95_seconds", "Percentil 95 de la espera por una conexión",
+               [({"pool": name}, data["checkout_ms"]["p95"] / 1000) for name, data in pools.items()]),
+    ]
+    for key, name, documentation in (
+        ("pool_size", "db_pool_size", "Tamaño configurado del pool"),
+        ("in_use", "db_pool_in_use", "Conexiones en uso"),
+        ("idle", "db_pool_idle", "Conexiones libres en el pool"),
+        ("overflow", "db_pool_overflow", "Conexiones abiertas por encima de pool_size"),
+    ):
+        families.append(_gauge(name, documentation,
+                               [({"pool": name}, data[key]) for name, data in pools.items() if key in data]))
+
+    replica = read_router.stats()
+    families.append(_gauge("db_read_replica_up", "Réplica de lectura disponible y al día (1) o no (0)",
+                           [({}, 1 if replica["state"] == "ok" else 0)]))
+    if replica["lag_seconds"] is not None:
+        families.append(_gauge("db_read_replica_lag_seconds", "Lag medido de la réplica de lectura",
+                               [({}, replica["lag_seconds"])]))
+    families.append(_counter("db_read_routing_total", "Destino de las lecturas ruteadas",
+                             [({"decision": decision}, count) for decision, count in replica["decisions"].items()]))
+    return families
+
+
+def collect_processing_queue() -> List[MetricFamily]:
+    """Slots y profundidad de la cola de extracción con IA."""
+    from src.services import processing_queue
+
+    queue = processing_queue.stats()
+    return [
+        _gauge("ai_queue_slots", "Slots de extracción con IA", [({}, queue["limit"])]),
+        _gauge("ai_queue_in_use", "Extracciones con IA en curso", [({}, queue["in_use"])]),
+        _gauge("ai_queue_waiting", "Extracciones esperando un slot", [
+            ({"priority": "upload"}, queue["waiting_uploads"]),
+            ({"priority": "reprocess"}, queue["waiting_reprocess"]),
+        ]),
+    ]
+
+
+def collect_caches() -> List[MetricFamily]:
+    """Aciertos y tamaño de las cachés en memoria y pendientes del log de auditoría."""
+    from src.core.principal_cache import principal_cache
+    from src.core.settings_cache import settings_cache
+    from src.services.audit_writer import audit_writer
+
+    principal = principal_cache.stats()
+    settings_stats = settings_cache.stats()
+    audit = audit_writer.stats()
+    return [
+        _counter("cache_hits_total", "Aciertos de las cachés en memoria", [
+            ({"cache": "principal"}, principal["hits"]),
+            ({"cache": "settings"}, settings_stats["hits"]),
+        ]),
+        _counter("cache_misses_total", "Fallos (cargas desde la base) de las cachés en memoria", [
+            ({"cache": "principal"}, principal["misses"]),
+            ({"cache": "settings"}, settings_stats["loads"]),
+        ]),
+        _gauge("cache_entries", "Entradas en las cachés en memoria", [
+            ({"cache": "principal"}, principal["size"]),
+            ({"cache": "settings"}, settings_stats["keys"]),
+        ]),
+        _gauge("audit_writer_pending", "Eventos de auditoría esperando escritura", [({}, audit["pending"])]),
+        _counter("audit_writer_written_total", "Eventos de auditoría escritos", [({}, audit["written"])]),
+        _counter("audit_writer_dropped_total", "Eventos de auditoría descartados con el buffer lleno", [({}, audit["dropped"])]),
+    ]
+
+
+def register_default_collectors(registry: Optional[MetricsRegistry] = None) -> None:
+    """Registra los colectores de base de datos, cola de IA y cachés."""
+    registry = registry or metrics
+    for collector in (collect_database, collect_processing_queue, collect_caches):
+        registry.register_collector(collector)
@@ -0,0 +1,135 @@
+"""
+Verificación del esquema de la base contra las migraciones de Alembic.
+
+En el arranque ya no se crean tablas con `create_all`: se compara la revisión
+de `alembic_version` con la cabeza de `alembic/versions` (una sola consulta
+cuando la base está al día) y, según DB_MIGRATIONS_ON_STARTUP, se rechaza el
+arranque o se migra bajo un advisory lock para que un solo worker lo haga.
+"""
+
+import logging
+import os
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.core.config import settings
+from src.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
+# check: rechazar el arranque si falta migrar; upgrade: migrar; off: no verificar
+MIGRATION_MODES = ("check", "upgrade", "off")
+
+_ADVISORY_LOCK_ID = 0x0A1E_3B1C
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """La base no está en la revisión cabeza de las migraciones."""
+
+
+def alembic_config():
+    """Config de Alembic del proyecto (alembic.ini en la raíz del repositorio)."""
+    # Alembic se importa recién al verificar el esquema (no en `import src.main`)
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    return config
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> str:
+    """Revisión cabeza de `alembic/versions` (se lee una vez por proceso)."""
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision(conn: AsyncConnection) -> Optional[str]:
+    """
+    Revisión registrada en la base.
+
+    Args:
+        conn: Conexión a la base
+
+    Returns:
+        version_num de `alembic_version`, o None si la base nunca se migró
+    """
+    try:
+        result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+    except DBAPIError:
+        # Sin tabla alembic_version; en PostgreSQL la transacción quedó abortada
+        await conn.rollback()
+        return None
+    return result.scalar_one_or_none()
+
+
+async def _locked_revision(conn: AsyncConnection) -> Optional[str]:
+    """Como `current_revision`, pero en un savepoint para no soltar el advisory lock."""
+    try:
+        async with conn.begin_nested():
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            return result.scalar_one_or_none()
+    except DBAPIError:
+        return None
+
+
+def _upgrade(sync_conn) -> None:
+    from alembic import command
+
+    config = alembic_config()
+    config.attributes["connection"] = sync_conn
+    command.upgrade(config, "head")
+
+
+async def ensure_schema(db_engine: AsyncEngine = engine, mode: Optional[str] = None) -> Optional[str]:
+    """
+    Deja la base en la revisión cabeza o rechaza el arranque.
+
+    Con la base al día cuesta una consulta. Para migrar se toma un advisory
+    lock transaccional: los demás workers esperan y, al obtenerlo, vuelven a
+    leer la revisión y encuentran la base ya migrada. En PostgreSQL el DDL es
+    transaccional, así que una migración que falla no deja el esquema a medias.
+
+    Args:
+        db_engine: Engine de la base (por defecto el primario)
+        mode: check, upgrade u off (por defecto DB_MIGRATIONS_ON_STARTUP)
+
+    Returns:
+        Revisión en la que quedó la base, o None si la verificación está desactivada
+
+    Raises:
+        SchemaOutOfDateError: En modo check, si la base no está en la cabeza
+    """
+    mode = mode or settings.DB_MIGRATIONS_ON_STARTUP
+    if mode not in MIGRATION_MODES:
+        raise ValueError(f"DB_MIGRATIONS_ON_STARTUP inválido: {mode} (usar {', '.join(MIGRATION_MODES)})")
+    if mode == "off":
+        return None
+
+    head = head_revision()
+    async with db_engine.connect() as conn:
+        current = await current_revision(conn)
+        if current == head:
+            return current
+        if mode == "check":
+            raise SchemaOutOfDateError(
+                f"La base está en la revisión {current or '(sin migrar)'} y el código espera {head}: "
+                f"ejecutar `alembic upgrade head` antes de iniciar"
+            )
+
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+            # Otro worker pudo haber migrado mientras se esperaba el lock
+            current = await _locked_revision(conn)
+        if current != head:
+            logger.info(f"Migrando la base de {current or '(sin migrar)'} a {head}")
+            await conn.run_sync(_upgrade)
+        await conn.commit()
+    return head
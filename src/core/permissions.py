@@ -4,11 +4,12 @@ Sistema de permisos y control de acceso del sistema Open Doors.
 Franco es el ÚNICO superadmin con control total.
 """
 
+from enum import Enum
 from functools import wraps
 from fastapi import HTTPException, status, Depends
 from src.models.user import User
-from src.core.security import get_current_user
-from typing import List, Callable
+from src.core.principal import Principal, get_current_principal
+from typing import Dict, List, Callable, Union
 
 # Jerarquía de roles (de mayor a menor privilegio)
 ROLE_HIERARCHY = {
@@ -22,6 +23,72 @@ ROLE_HIERARCHY = {
 # Email del ÚNICO superadmin
 SUPERADMIN_EMAIL = "cortsfranco@hotmail.com"
 
+
+class Permission(str, Enum):
+    """Permisos del sistema; cada uno ocupa un bit de la máscara del token."""
+    # Usuarios
+    USER_VIEW = "user:view"
+    USER_CREATE = "user:create"
+    USER_EDIT = "user:edit"
+    USER_DELETE = "user:delete"
+
+    # Facturas
+    INVOICE_VIEW = "invoice:view"
+    INVOICE_CREATE = "invoice:create"
+    INVOICE_EDIT = "invoice:edit"
+    INVOICE_DELETE = "invoice:delete"
+    INVOICE_APPROVE = "invoice:approve"
+    INVOICE_RESTORE = "invoice:restore"
+
+    # Reportes
+    REPORT_VIEW = "report:view"
+    REPORT_EXPORT = "report:export"
+
+    # Configuración
+    SETTINGS_VIEW = "settings:view"
+    SETTINGS_EDIT = "settings:edit"
+
+
+ROLE_PERMISSIONS = {
+    'superadmin': list(Permission),
+    'admin': list(Permission),
+    'accountant': [
+        Permission.INVOICE_VIEW, Permission.INVOICE_APPROVE,
+        Permission.REPORT_VIEW, Permission.REPORT_EXPORT
+    ],
+    'partner': [Permission.INVOICE_VIEW, Permission.REPORT_VIEW],
+    'viewer': [Permission.INVOICE_VIEW]
+}
+
+# Bit asignado a cada permiso y máscara compilada por rol
+PERMISSION_BITS: Dict[Permission, int] = {
+    permission: 1 << index for index, permission in enumerate(Permission)
+}
+
+ROLE_MASKS: Dict[str, int] = {
+    role: sum(PERMISSION_BITS[permission] for permission in set(permissions))
+    for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+
+def role_mask(role: str) -> int:
+    """Máscara de permisos de un rol (0 si el rol no existe)."""
+    return ROLE_MASKS.get(role, 0)
+
+
+def has_permission(user: Union[User, Principal], permission: Permission) -> bool:
+    """
+    Verifica un permiso con una operación de bits.
+
+    Acepta tanto el usuario ORM como el `Principal` construido desde el token.
+    """
+    if not user.is_active:
+        return False
+    mask = getattr(user, "permission_mask", None)
+    if mask is None:
+        mask = role_mask(user.role)
+    return bool(mask & PERMISSION_BITS[permission])
+
 class PermissionError(Exception):
     """Excepción personalizada para errores de permisos."""
     pass
@@ -42,7 +109,7 @@ def check_role_level(user: User, required_level: int) -> bool:
     return user_level >= required_level
 
 
-def is_superadmin(user: User) -> bool:
+def is_superadmin(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario es el superadmin (Franco).
     Solo Franco puede ser superadmin.
@@ -56,7 +123,7 @@ def is_superadmin(user: User) -> bool:
     return user.role == 'superadmin' and user.email == SUPERADMIN_EMAIL
 
 
-def is_admin_or_higher(user: User) -> bool:
+def is_admin_or_higher(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario es admin o superadmin.
     
@@ -66,10 +133,10 @@ def is_admin_or_higher(user: User) -> bool:
     Returns:
         True si es admin o superadmin
     """
-    return user.role in ['admin', 'superadmin']
+    return has_permission(user, Permission.USER_EDIT)
 
 
-def can_edit_invoices(user: User) -> bool:
+def can_edit_invoices(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario puede editar facturas.
     Permitido para: superadmin, admin
@@ -80,10 +147,10 @@ def can_edit_invoices(user: User) -> bool:
     Returns:
         True si puede editar facturas
     """
-    return user.role in ['superadmin', 'admin']
+    return has_permission(user, Permission.INVOICE_EDIT)
 
 
-def can_approve_invoices(user: User) -> bool:
+def can_approve_invoices(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario puede aprobar facturas.
     Permitido para: superadmin, admin, accountant
@@ -94,10 +161,10 @@ def can_approve_invoices(user: User) -> bool:
     Returns:
         True si puede aprobar facturas
     """
-    return user.role in ['superadmin', 'admin', 'accountant']
+    return has_permission(user, Permission.INVOICE_APPROVE)
 
 
-def can_delete_invoices(user: User) -> bool:
+def can_delete_invoices(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario puede eliminar facturas.
     Permitido para: superadmin, admin
@@ -108,10 +175,10 @@ def can_delete_invoices(user: User) -> bool:
     Returns:
         True si puede eliminar facturas
     """
-    return user.role in ['superadmin', 'admin']
+    return has_permission(user, Permission.INVOICE_DELETE)
 
 
-def can_manage_users(user: User) -> bool:
+def can_manage_users(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario puede gestionar otros usuarios.
     Permitido SOLO para: superadmin (Franco)
@@ -125,7 +192,7 @@ def can_manage_users(user: User) -> bool:
     return is_superadmin(user)
 
 
-def can_change_roles(user: User) -> bool:
+def can_change_roles(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario puede cambiar roles de otros usuarios.
     Permitido SOLO para: superadmin (Franco)
@@ -139,7 +206,7 @@ def can_change_roles(user: User) -> bool:
     return is_superadmin(user)
 
 
-def can_view_financial_reports(user: User) -> bool:
+def can_view_financial_reports(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario puede ver reportes financieros.
     Permitido para: todos excepto viewer
@@ -150,10 +217,10 @@ def can_view_financial_reports(user: User) -> bool:
     Returns:
         True si puede ver reportes financieros
     """
-    return user.role in ['superadmin', 'admin', 'accountant', 'partner']
+    return has_permission(user, Permission.REPORT_VIEW)
 
 
-def can_access_system_settings(user: User) -> bool:
+def can_access_system_settings(user: Union[User, Principal]) -> bool:
     """
     Verifica si el usuario puede acceder a configuración del sistema.
     Permitido SOLO para: superadmin (Franco)
@@ -169,7 +236,7 @@ def can_access_system_settings(user: User) -> bool:
 
 # ===== DECORADORES PARA ENDPOINTS =====
 
-def require_superadmin(current_user: User = Depends(get_current_user)) -> User:
+def require_superadmin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Decorator/dependency que requiere rol superadmin.
     SOLO Franco puede pasar esta verificación.
@@ -187,7 +254,7 @@ def require_superadmin(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Decorator/dependency que requiere rol admin o superior.
     
@@ -204,7 +271,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def require_invoice_editor(current_user: User = Depends(get_current_user)) -> User:
+def require_invoice_editor(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Decorator/dependency que requiere permisos para editar facturas.
     
@@ -221,7 +288,7 @@ def require_invoice_editor(current_user: User = Depends(get_current_user)) -> Us
     return current_user
 
 
-def require_invoice_approver(current_user: User = Depends(get_current_user)) -> User:
+def require_invoice_approver(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Decorator/dependency que requiere permisos para aprobar facturas.
     
@@ -238,7 +305,7 @@ def require_invoice_approver(current_user: User = Depends(get_current_user)) ->
     return current_user
 
 
-def require_financial_access(current_user: User = Depends(get_current_user)) -> User:
+def require_financial_access(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Decorator/dependency que requiere acceso a reportes financieros.
     
@@ -255,6 +322,26 @@ def require_financial_access(current_user: User = Depends(get_current_user)) ->
     return current_user
 
 
+def require_permission(permission: Permission):
+    """
+    Dependency que exige un permiso usando solo los claims del token
+    (no consulta la base de datos).
+
+    Usage:
+        @router.delete("/{invoice_id}")
+        async def delete(principal: Principal = Depends(require_permission(Permission.INVOICE_DELETE))):
+            ...
+    """
+    async def dependency(principal: Principal = Depends(get_current_principal)) -> Principal:
+        if not has_permission(principal, permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para realizar esta acción"
+            )
+        return principal
+    return dependency
+
+
 def get_user_permissions(user: User) -> dict:
     """
     Obtiene un diccionario con todos los permisos del usuario.
@@ -277,13 +364,16 @@ def get_user_permissions(user: User) -> dict:
         'can_view_financial_reports': can_view_financial_reports(user),
         'can_access_system_settings': can_access_system_settings(user),
         'role': user.role,
-        'role_level': ROLE_HIERARCHY.get(user.role, 0)
+        'role_level': ROLE_HIERARCHY.get(user.role, 0),
+        'permission_mask': role_mask(user.role)
     }
 =======
 Sistema de permisos para Open Doors Billing
 """
 from enum import Enum
-from typing import List
+from typing import Dict, List, Union
+from fastapi import Depends, HTTPException, status
+from src.core.principal import Principal, get_current_principal
 from src.models.user import User, UserRole
 
 class Permission(str, Enum):
@@ -348,33 +438,56 @@ ROLE_PERMISSIONS = {
     ]
 }
 
-def has_permission(user: User, permission: Permission) -> bool:
+# Bit asignado a cada permiso y máscara compilada por rol (clave: valor del rol)
+PERMISSION_BITS: Dict[Permission, int] = {
+    permission: 1 << index for index, permission in enumerate(Permission)
+}
+
+ROLE_MASKS: Dict[str, int] = {
+    role.value: sum(PERMISSION_BITS[permission] for permission in set(permissions))
+    for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+def role_mask(role: str) -> int:
     """
-    Verifica si un usuario tiene un permiso específico
+    Máscara de permisos de un rol (0 si el rol no existe)
+    """
+    return ROLE_MASKS.get(role, 0)
+
+def has_permission(user: Union[User, Principal], permission: Permission) -> bool:
+    """
+    Verifica si un usuario tiene un permiso específico (operación de bits)
     """
     if not user.is_active:
         return False
     
-    user_permissions = ROLE_PERMISSIONS.get(user.role, [])
-    return permission in user_permissions
+    mask = getattr(user, "permission_mask", None)
+    if mask is None:
+        mask = role_mask(user.role)
+    return bool(mask & PERMISSION_BITS[permission])
 
-def get_user_permissions(user: User) -> List[Permission]:
+def get_user_permissions(user: Union[User, Principal]) -> List[Permission]:
     """
     Obtiene todos los permisos de un usuario
     """
-    if not user.is_active:
-        return []
-    
-    return ROLE_PERMISSIONS.get(user.role, [])
+    return [permission for permission in Permission if has_permission(user, permission)]
 
 def require_permission(permission: Permission):
     """
-    Decorator para requerir un permiso específico
+    Dependency que exige un permiso usando solo los claims del token
+    (no consulta la base de datos)
+    
+    Usage:
+        @router.delete("/{invoice_id}")
+        async def delete(principal: Principal = Depends(require_permission(Permission.INVOICE_DELETE))):
+            ...
     """
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            # Esta función se implementará en los routers
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
+    async def dependency(principal: Principal = Depends(get_current_principal)) -> Principal:
+        if not has_permission(principal, permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para realizar esta acción"
+            )
+        return principal
+    return dependency
 >>>>>>> refs/remotes/origin/master
@@ -0,0 +1,116 @@
+"""
+Métricas del pool de conexiones.
+
+`InstrumentedQueuePool` es el pool por defecto de los engines async con
+una medición alrededor de `connect()`: cuánto espera cada checkout (cola
+del pool + apertura de conexión + pre-ping) y cuántos terminan en
+`TimeoutError` por pool agotado. Las muestras se agrupan por el
+`pool_logging_name` del engine ("primary", "replica"), que se conserva
+cuando el pool se recrea tras un `dispose()`.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Muestras de latencia guardadas por pool para calcular percentiles
+LATENCY_SAMPLES = 1000
+
+
+class _PoolCounters:
+    """Contadores acumulados de un pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+
+class PoolMetrics:
+    """Registro de engines y de la latencia de checkout de sus pools."""
+
+    def __init__(self):
+        self._engines: Dict[str, object] = {}
+        self._counters: Dict[str, _PoolCounters] = {}
+
+    def register(self, name: str, engine) -> None:
+        """
+        Registra un engine para reportar el estado de su pool.
+
+        Args:
+            name: Nombre del pool (el mismo `pool_logging_name` del engine)
+            engine: Engine async o sync
+        """
+        self._engines[name] = engine
+        self._counters.setdefault(name, _PoolCounters())
+
+    def observe(self, name: str, elapsed: float, timed_out: bool = False) -> None:
+        """Registra un checkout (o un timeout) de `elapsed` segundos."""
+        counters = self._counters.setdefault(name, _PoolCounters())
+        if timed_out:
+            counters.timeouts += 1
+            return
+        counters.checkouts += 1
+        counters.total_wait += elapsed
+        counters.max_wait = max(counters.max_wait, elapsed)
+        counters.samples.append(elapsed)
+
+    @staticmethod
+    def _percentile(ordered, fraction: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def stats(self) -> dict:
+        """Estado actual y latencia de checkout de cada pool registrado."""
+        result = {}
+        for name, counters in self._counters.items():
+            ordered = sorted(counters.samples)
+            data = {
+                "checkouts": counters.checkouts,
+                "timeouts": counters.timeouts,
+                "checkout_ms": {
+                    "avg": round(counters.total_wait / counters.checkouts * 1000, 3) if counters.checkouts else 0.0,
+                    "p50": round(self._percentile(ordered, 0.50) * 1000, 3),
+                    "p95": round(self._percentile(ordered, 0.95) * 1000, 3),
+                    "p99": round(self._percentile(ordered, 0.99) * 1000, 3),
+                    "max": round(counters.max_wait * 1000, 3),
+                }
+            }
+            engine = self._engines.get(name)
+            if engine is not None:
+                pool = getattr(engine, "sync_engine", engine).pool
+                data.update({
+                    "pool_size": pool.size(),
+                    "in_use": pool.checkedout(),
+                    "idle": pool.checkedin(),
+                    # QueuePool cuenta el overflow desde -pool_size
+                    "overflow": max(0, pool.overflow()),
+                    "max_overflow": pool._max_overflow,
+                    "timeout_seconds": pool.timeout(),
+                })
+            result[name] = data
+        return result
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool async que mide la latencia de cada checkout."""
+
+    def connect(self):
+        name = getattr(self, "logging_name", None) or "default"
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_metrics.observe(name, time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe(name, time.perf_counter() - started)
+        return connection
@@ -0,0 +1,193 @@
+"""
+Principal autenticado a partir de los claims del token JWT.
+
+El token lleva el rol, la máscara de permisos y la versión del usuario
+(`users.token_version`), de modo que las rutas que solo necesitan verificar
+permisos no consultan la base de datos. La revocación (cambio de rol o
+contraseña, desactivación) se controla con un mapa en memoria
+usuario -> versión vigente que se recarga periódicamente.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import Depends, HTTPException, status
+from jose import JWTError, jwt
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import get_session
+from src.core.security import get_current_user, oauth2_scheme
+from src.models.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuario autenticado tal como lo describe el token (sin instancia ORM)."""
+
+    id: int
+    email: str
+    role: str
+    permission_mask: int
+    token_version: int = 0
+    is_active: bool = True
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        from src.core.permissions import role_mask
+
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            permission_mask=role_mask(user.role),
+            token_version=user.token_version or 0,
+            is_active=user.is_active
+        )
+
+
+def build_token_claims(user: User) -> Dict[str, Any]:
+    """
+    Claims a firmar en el token de acceso de un usuario.
+
+    Args:
+        user: Usuario autenticado
+
+    Returns:
+        Diccionario con sub (email), uid, role, perm (máscara) y ver
+    """
+    from src.core.permissions import role_mask
+
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": user.role,
+        "perm": role_mask(user.role),
+        "ver": user.token_version or 0,
+    }
+
+
+class TokenVersionMap:
+    """
+    Mapa en memoria usuario activo -> token_version vigente.
+
+    Un token es válido si su claim `ver` es mayor o igual a la versión
+    vigente del usuario. Los usuarios inactivos no están en el mapa.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[int, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Recarga las versiones de todos los usuarios activos."""
+        result = await session.execute(
+            select(User.id, User.token_version).where(User.is_active.is_(True))
+        )
+        self._versions = {user_id: version or 0 for user_id, version in result.all()}
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        """Recarga el mapa si venció el intervalo de refresco."""
+        if self.is_stale:
+            async with self._lock:
+                if self.is_stale:
+                    await self.refresh(session)
+
+    async def is_valid(self, session: AsyncSession, user_id: int, version: int) -> bool:
+        """Verifica que un token con esa versión no haya sido revocado."""
+        await self.ensure_fresh(session)
+        current = self._versions.get(user_id)
+        if current is None:
+            # Usuario creado después de la última recarga (o inactivo)
+            result = await session.execute(
+                select(User.token_version).where(User.id == user_id, User.is_active.is_(True))
+            )
+            current = result.scalar_one_or_none()
+            if current is None:
+                return False
+            self._versions[user_id] = current
+        return version >= current
+
+    def put(self, user_id: int, version: int) -> None:
+        """Registra la versión vigente de un usuario (ej: al iniciar sesión)."""
+        self._versions[user_id] = version or 0
+
+    async def revoke(self, session: AsyncSession, user_id: int) -> None:
+        """
+        Invalida todos los tokens emitidos hasta ahora para el usuario (hace commit).
+        """
+        result = await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+            .returning(User.token_version, User.is_active)
+        )
+        row = result.one_or_none()
+        await session.commit()
+        if row is None or not row.is_active:
+            self._versions.pop(user_id, None)
+        else:
+            self._versions[user_id] = row.token_version
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._versions),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+        }
+
+
+# Mapa compartido por todo el proceso
+token_versions = TokenVersionMap(settings.TOKEN_VERSION_REFRESH_SECONDS)
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_session)
+) -> Principal:
+    """
+    Obtiene el principal a partir de los claims del token.
+
+    No consulta la tabla `users` salvo para recargar el mapa de versiones.
+    Los tokens emitidos antes de incluir los claims se resuelven con
+    `get_current_user`.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="No se pudieron validar las credenciales",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+
+    if "perm" not in payload or "uid" not in payload:
+        user = await get_current_user(token, session)
+        return Principal.from_user(user)
+
+    try:
+        principal = Principal(
+            id=int(payload["uid"]),
+            email=payload["sub"],
+            role=payload["role"],
+            permission_mask=int(payload["perm"]),
+            token_version=int(payload.get("ver", 0))
+        )
+    except (KeyError, TypeError, ValueError):
+        raise credentials_exception
+
+    if not await token_versions.is_valid(session, principal.id, principal.token_version):
+        raise credentials_exception
+
+    return principal
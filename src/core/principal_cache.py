@@ -0,0 +1,112 @@
+"""
+Caché en memoria del usuario autenticado (principal).
+
+Evita consultar la tabla `users` en cada petición autenticada. Las entradas
+se indexan por el `sub` del token, expiran después de un TTL configurable y
+se invalidan explícitamente cuando el usuario cambia (rol, activación,
+eliminación/restauración). Con varios workers cada proceso tiene su propia
+caché: el TTL es la ventana máxima en la que un cambio hecho en otro worker
+puede no verse.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.config import settings
+from src.models.user import User
+
+# Columnas que no se guardan en la caché
+_EXCLUDED_COLUMNS = {"hashed_password"}
+
+
+class PrincipalCache:
+    """
+    Caché LRU acotada con TTL de usuarios autenticados.
+
+    Guarda una copia de las columnas del usuario (no la instancia ORM, que
+    pertenece a la sesión de la petición que la cargó) y devuelve una
+    instancia nueva en cada acierto.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        # subject -> (vencimiento en time.monotonic, columnas del usuario)
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._subject_by_user_id: Dict[int, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        """Obtiene el usuario para un subject, o None si no está o venció."""
+        entry = self._entries.get(subject)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(subject)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return User(**entry[1])
+
+    def set(self, subject: str, user: User) -> None:
+        """Guarda una copia de las columnas del usuario."""
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+        snapshot = {
+            column.key: getattr(user, column.key)
+            for column in User.__table__.columns
+            if column.key not in _EXCLUDED_COLUMNS
+        }
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, snapshot)
+        self._entries.move_to_end(subject)
+        self._subject_by_user_id[user.id] = subject
+        while len(self._entries) > self.max_size:
+            oldest, (_, oldest_snapshot) = self._entries.popitem(last=False)
+            self._forget_user(oldest_snapshot["id"], oldest)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Elimina de la caché al usuario indicado (tras modificarlo)."""
+        subject = self._subject_by_user_id.get(user_id)
+        if subject is not None:
+            self._remove(subject)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Vacía la caché."""
+        self._entries.clear()
+        self._subject_by_user_id.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos para monitoreo."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, subject: str) -> None:
+        entry = self._entries.pop(subject, None)
+        if entry is not None:
+            self._forget_user(entry[1]["id"], subject)
+
+    def _forget_user(self, user_id: int, subject: str) -> None:
+        if self._subject_by_user_id.get(user_id) == subject:
+            del self._subject_by_user_id[user_id]
+
+
+# Instancia compartida por todo el proceso
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE
+)
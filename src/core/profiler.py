@@ -0,0 +1,201 @@
+"""
+Profiler de peticiones opcional (cProfile).
+
+Solo se instala con PROFILER_ENABLED=true; desactivado no agrega ningún
+middleware. Activado, se perfila una petición cuando:
+
+- un admin envía la cabecera `X-Profile: 1` (se valida el JWT y su versión), o
+- la petición cae en el muestreo aleatorio (PROFILER_SAMPLE_RATE).
+
+Cada perfil se guarda en PROFILER_DIR como `<id>.prof` (formato de pstats,
+abrible con snakeviz o `python -m pstats`) junto a `<id>.json` con la ruta,
+el estado y la duración. Se conservan los últimos PROFILER_MAX_FILES.
+
+cProfile mide el hilo completo: mientras una petición se perfila, el
+trabajo de otras tareas del event loop también aparece en el perfil. Por
+eso se perfila una sola petición a la vez y las demás pasan sin medir.
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from jose import JWTError, jwt
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+# Identificadores generados por `_new_profile_id` (evita rutas arbitrarias al descargar)
+PROFILE_ID_PATTERN = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _new_profile_id() -> str:
+    # Ordenable por nombre: fecha con microsegundos y sufijo aleatorio
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+
+
+async def _is_admin_request(scope) -> bool:
+    """Verifica que el token de la petición sea de un admin vigente."""
+    authorization = _header(scope, b"authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        user_id = int(payload["uid"])
+        version = int(payload.get("ver", 0))
+    except (JWTError, KeyError, TypeError, ValueError):
+        return False
+    if payload.get("role") not in ["admin"]:
+        return False
+
+    from src.core.database import AsyncSessionLocal
+    from src.core.principal import token_versions
+
+    try:
+        async with AsyncSessionLocal() as session:
+            return await token_versions.is_valid(session, user_id, version)
+    except Exception as e:
+        logger.warning(f"No se pudo validar el token para perfilar: {str(e)}")
+        return False
+
+
+class ProfileStore:
+    """Perfiles guardados en disco con su metadata."""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def _path(self, profile_id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, profiler: cProfile.Profile, metadata: Dict[str, Any]) -> str:
+        """Guarda el perfil y su metadata; devuelve el id."""
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = _new_profile_id()
+        profiler.dump_stats(self._path(profile_id, "prof"))
+        with open(self._path(profile_id, "json"), "w") as f:
+            json.dump({"id": profile_id, **metadata}, f, ensure_ascii=False)
+        self.prune()
+        return profile_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata de los perfiles guardados, del más reciente al más antiguo."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def prune(self) -> None:
+        """Borra los perfiles más antiguos por encima de `max_files`."""
+        for metadata in self.list()[self.max_files:]:
+            for extension in ("prof", "json"):
+                try:
+                    os.remove(self._path(metadata["id"], extension))
+                except OSError:
+                    pass
+
+    def profile_path(self, profile_id: str) -> Optional[str]:
+        """Ruta del `.prof`, o None si el id no es válido o no existe."""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self._path(profile_id, "prof")
+        return path if os.path.exists(path) else None
+
+    def summary(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """Resumen de texto de pstats (las `limit` funciones más costosas)."""
+        path = self.profile_path(profile_id)
+        if path is None:
+            return None
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+profile_store = ProfileStore(settings.PROFILER_DIR, settings.PROFILER_MAX_FILES)
+
+
+class ProfilerMiddleware:
+    """Middleware ASGI que perfila peticiones a pedido de un admin o por muestreo."""
+
+    def __init__(self, app, store: ProfileStore = profile_store, sample_rate: Optional[float] = None):
+        self.app = app
+        self.store = store
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE if sample_rate is None else sample_rate
+        self._busy = False
+
+    async def _reason(self, scope) -> Optional[str]:
+        if _header(scope, PROFILE_HEADER) in ("1", "true") and await _is_admin_request(scope):
+            return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await self._reason(scope)
+        if reason is None or self._busy:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        self._busy = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profiler.disable()
+            self._busy = False
+            route = getattr(scope.get("route"), "path", None)
+            metadata = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status[0],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "reason": reason,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                profile_id = await asyncio.to_thread(self.store.save, profiler, metadata)
+                logger.info(f"Perfil {profile_id}: {metadata['method']} {route or metadata['path']} {metadata['duration_ms']} ms")
+            except Exception as e:
+                logger.error(f"Error guardando perfil: {str(e)}")
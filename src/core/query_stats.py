@@ -0,0 +1,175 @@
+"""
+Conteo de consultas SQL por petición y detección de N+1.
+
+Los eventos `before/after_cursor_execute` de SQLAlchemy (registrados sobre
+`Engine`, así cubren el primario, la réplica y los engines de prueba) suman
+cada sentencia al `QueryStats` de la petición en curso, que viaja en una
+ContextVar: SQLAlchemy async ejecuta el driver en un greenlet que hereda el
+contexto de la tarea, así que cada petición solo ve sus propias consultas.
+
+`QueryStatsMiddleware` agrega `Server-Timing` en modo DEBUG y registra las
+peticiones que superan QUERY_LOG_MAX_COUNT consultas o QUERY_LOG_MAX_MS de
+base de datos, con las sentencias repetidas (candidatas a N+1) primero.
+En las pruebas, `assert_max_queries(n)` falla si un bloque ejecuta más de n.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sentencias guardadas por petición para el log (el conteo y el tiempo no se cortan)
+MAX_RECORDED_STATEMENTS = 200
+# Una misma sentencia repetida esta cantidad de veces se informa como posible N+1
+REPEATED_STATEMENT_THRESHOLD = 5
+
+_STARTED_KEY = "query_stats_started"
+
+
+class QueryStats:
+    """Consultas ejecutadas dentro de una petición (o de un bloque de prueba)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append((statement, elapsed))
+
+    def repeated(self, threshold: int = REPEATED_STATEMENT_THRESHOLD) -> List[Tuple[str, int]]:
+        """Sentencias idénticas ejecutadas `threshold` veces o más (típico de un N+1)."""
+        counts = Counter(statement for statement, _ in self.statements)
+        return [(statement, times) for statement, times in counts.most_common() if times >= threshold]
+
+    def summary(self, limit: int = 10) -> str:
+        """Texto para el log: repetidas primero y luego las más lentas."""
+        lines = [f"  N+1? x{times}: {_shorten(statement)}" for statement, times in self.repeated()]
+        slowest = sorted(self.statements, key=lambda item: item[1], reverse=True)[:limit]
+        lines += [f"  {elapsed * 1000:.1f} ms: {_shorten(statement)}" for statement, elapsed in slowest]
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _shorten(statement: str, length: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "..."
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get(_STARTED_KEY)
+    if stats is None or not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
+
+
+def install_query_listeners() -> None:
+    """Registra los eventos de conteo en todos los engines (una sola vez por proceso)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """QueryStats de la petición en curso, o None fuera de una petición medida."""
+    return _current.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Cuenta las consultas ejecutadas dentro del bloque (también con `await` adentro)."""
+    install_query_listeners()
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """
+    Helper de pruebas: falla si el bloque ejecuta más de `limit` consultas.
+
+    Ejemplo:
+        with assert_max_queries(3):
+            await service.get_balance_general()
+
+    Args:
+        limit: Cantidad máxima de sentencias SQL permitidas
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        raise AssertionError(
+            f"Se ejecutaron {stats.count} consultas (máximo {limit}):\n{stats.summary(limit=stats.count)}"
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI que mide las consultas de cada petición.
+
+    En DEBUG agrega `Server-Timing: db;dur=<ms>;desc="<n> queries", app;dur=<ms>`
+    (visible en la pestaña de red del navegador). Siempre registra un warning
+    si la petición supera los umbrales configurados.
+    """
+
+    def __init__(self, app, max_count: Optional[int] = None, max_ms: Optional[float] = None,
+                 server_timing: Optional[bool] = None):
+        self.app = app
+        self.max_count = settings.QUERY_LOG_MAX_COUNT if max_count is None else max_count
+        self.max_ms = settings.QUERY_LOG_MAX_MS if max_ms is None else max_ms
+        self.server_timing = settings.DEBUG if server_timing is None else server_timing
+        install_query_listeners()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                app_ms = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'db;dur={stats.total_seconds * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={app_ms:.1f}"
+                )
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            db_ms = stats.total_seconds * 1000
+            if stats.count > self.max_count or db_ms > self.max_ms or stats.repeated():
+                logger.warning(
+                    f"{scope['method']} {scope['path']}: {stats.count} consultas, {db_ms:.1f} ms en la base\n"
+                    f"{stats.summary()}"
+                )
@@ -2,7 +2,9 @@
 Módulo de seguridad para autenticación y autorización.
 """
 
-from typing import Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,6 +17,7 @@ import hashlib
 
 from src.core.database import get_session
 from src.core.config import settings
+from src.core.principal_cache import principal_cache
 from src.models.user import User
 
 # Configuración para hash de contraseñas con bcrypt robusto
@@ -26,7 +29,7 @@ def get_password_hash(password: str) -> str:
             password = password[:72]
         
         # Generar salt aleatorio
-        salt = bcrypt.gensalt(rounds=12)
+        salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
         # Hash la contraseña con el salt
         password_bytes = password.encode('utf-8')
         hashed = bcrypt.hashpw(password_bytes, salt)
@@ -47,6 +50,67 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return False
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Indica si el hash fue generado con un costo distinto al configurado."""
+    try:
+        # Formato bcrypt: $2b$<costo>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError, AttributeError):
+        return False
+
+
+# ====== Hash de contraseñas fuera del event loop ======
+# bcrypt libera el GIL mientras calcula, así que un pool de threads alcanza
+# para que un pico de logins no bloquee al resto de las peticiones.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_pending_password_jobs = 0
+
+T = TypeVar("T")
+
+
+async def _run_password_job(func: Callable[..., T], *args) -> T:
+    """
+    Ejecuta una operación de bcrypt en el pool dedicado.
+
+    Raises:
+        HTTPException: 503 si hay demasiadas operaciones en cola
+    """
+    global _pending_password_jobs
+    if _pending_password_jobs >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiados inicios de sesión simultáneos, intente nuevamente en unos segundos",
+            headers={"Retry-After": "1"},
+        )
+    _pending_password_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _pending_password_jobs -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Versión asíncrona de `get_password_hash` (no bloquea el event loop)."""
+    return await _run_password_job(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Versión asíncrona de `verify_password` (no bloquea el event loop)."""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+def password_pool_stats() -> dict:
+    """Estado del pool de hash de contraseñas."""
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "pending": _pending_password_jobs,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+    }
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)) -> User:
@@ -65,11 +129,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSe
     except JWTError:
         raise credentials_exception
     
-    query = select(User).where(User.email == email)
-    result = await session.execute(query)
-    user = result.scalar_one_or_none()
-    
+    user = principal_cache.get(email)
     if user is None:
+        query = select(User).where(User.email == email)
+        result = await session.execute(query)
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            raise credentials_exception
+        principal_cache.set(email, user)
+    
+    # Usuarios desactivados (soft delete) no pueden autenticarse
+    if not user.is_active:
         raise credentials_exception
+
+    # Tokens revocados (cambio de rol, contraseña o desactivación)
+    if "uid" in payload:
+        from src.core.principal import token_versions
+
+        try:
+            version = int(payload.get("ver", 0))
+        except (TypeError, ValueError):
+            raise credentials_exception
+        if payload["uid"] != user.id or not await token_versions.is_valid(session, user.id, version):
+            raise credentials_exception
     
     return user
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Caché en memoria de las configuraciones del sistema (tabla `system_settings`).
+
+Moneda, formato de números, UI y backup se leen en cada formateo que pide el
+frontend; con la caché caliente esas lecturas no tocan la base. La caché
+guarda todas las configuraciones activas y lleva un contador de versión:
+`set_setting` lo incrementa al guardar y la próxima lectura recarga la tabla
+completa (son pocas filas).
+
+Con varios workers, `set_setting` además emite `NOTIFY` en el canal
+`system_settings_changed` dentro de la misma transacción; cada proceso
+escucha ese canal con una conexión reservada del pool e incrementa su versión al
+recibir el aviso. Si LISTEN no está disponible (SQLite, conexión caída),
+el TTL es la ventana máxima en la que un cambio de otro worker puede no
+verse.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.models.system_settings import SystemSettings
+
+logger = logging.getLogger(__name__)
+
+# Canal de Postgres para avisar cambios entre workers
+NOTIFY_CHANNEL = "system_settings_changed"
+
+
+class SettingsCache:
+    """Caché versionada de configuraciones activas (clave -> valor)."""
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._values: Dict[str, Any] = {}
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.listening = False
+        self.hits = 0
+        self.loads = 0
+        self.notifications = 0
+
+    def is_fresh(self) -> bool:
+        """Indica si el contenido cargado corresponde a la versión actual."""
+        if self._loaded_version != self.version:
+            return False
+        return self.ttl_seconds <= 0 or time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    async def load(self, session: AsyncSession) -> None:
+        """Carga todas las configuraciones activas desde la base."""
+        version = self.version
+        result = await session.execute(
+            select(SystemSettings.key, SystemSettings.value).where(SystemSettings.is_active == True)
+        )
+        self._values = {key: value for key, value in result.all()}
+        # Si hubo un cambio durante la carga, la versión ya avanzó y se recarga de nuevo
+        self._loaded_version = version
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+
+    async def get(self, session: AsyncSession, key: str, default: Any = None) -> Any:
+        """
+        Obtiene el valor de una configuración, recargando solo si cambió la versión.
+
+        El valor devuelto es compartido entre peticiones: no modificarlo.
+
+        Args:
+            session: Sesión para recargar si hace falta
+            key: Clave de la configuración
+            default: Valor si la configuración no existe o está inactiva
+        """
+        if not self.is_fresh():
+            async with self._lock:
+                if not self.is_fresh():
+                    await self.load(session)
+        else:
+            self.hits += 1
+        return self._values.get(key, default)
+
+    def bump(self) -> None:
+        """Incrementa la versión: la próxima lectura recarga desde la base."""
+        self.version += 1
+
+    async def notify_change(self, session: AsyncSession, key: str) -> None:
+        """
+        Avisa el cambio de una configuración a los demás workers.
+
+        Se ejecuta antes del commit: Postgres entrega el NOTIFY al confirmar
+        la transacción (y lo descarta si hay rollback).
+        """
+        if session.get_bind().dialect.name != "postgresql":
+            return
+        await session.execute(select(func.pg_notify(NOTIFY_CHANNEL, key)))
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self.notifications += 1
+        self.bump()
+
+    async def listen(self, engine, retry_seconds: float = 5.0) -> None:
+        """
+        Tarea de fondo: escucha NOTIFY en una conexión reservada y reconecta si se cae.
+
+        Args:
+            engine: Engine async de la base primaria
+            retry_seconds: Espera antes de reconectar
+        """
+        if engine.dialect.name != "postgresql":
+            return
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    terminated = asyncio.Event()
+                    driver.add_termination_listener(lambda _: terminated.set())
+                    await driver.add_listener(NOTIFY_CHANNEL, self._on_notification)
+                    self.listening = True
+                    # Pudo haber cambios mientras no escuchábamos
+                    self.bump()
+                    try:
+                        await terminated.wait()
+                    finally:
+                        self.listening = False
+                        if not driver.is_closed():
+                            await driver.remove_listener(NOTIFY_CHANNEL, self._on_notification)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"LISTEN {NOTIFY_CHANNEL} no disponible: {e}")
+            await asyncio.sleep(retry_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado de la caché."""
+        return {
+            "version": self.version,
+            "fresh": self.is_fresh(),
+            "keys": len(self._values),
+            "listening": self.listening,
+            "hits": self.hits,
+            "loads": self.loads,
+            "notifications": self.notifications,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+settings_cache = SettingsCache(ttl_seconds=settings.SETTINGS_CACHE_TTL_SECONDS)
+
+
+async def warm_settings_cache() -> int:
+    """Carga la caché al iniciar la aplicación. Devuelve la cantidad de claves."""
+    async with AsyncSessionLocal() as session:
+        await settings_cache.load(session)
+    return len(settings_cache._values)
@@ -3,27 +3,63 @@ Punto de entrada principal de la aplicación FastAPI.
 Configura la aplicación y registra todos los routers.
 """
 
-from fastapi import FastAPI
+import asyncio
+import secrets
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from src.core.config import settings
 from src.core.database import engine
-from src.api.routers import auth, users, companies, invoices, clients, invoice_upload, analysis, approval, partners, system_settings, financial_reports
-from src.core.database import init_db
+from src.api.routers import auth, users, companies, invoices, clients, invoice_upload, analysis, approval, partners, system_settings, financial_reports, activity_logs
+from src.core.migrations import SchemaOutOfDateError, ensure_schema
+from src.core.metrics import CONTENT_TYPE, MetricsMiddleware, metrics, register_default_collectors
+from src.core.query_stats import QueryStatsMiddleware
+from src.core.profiler import ProfilerMiddleware
+from src.core.idempotency import IdempotencyMiddleware, purge_expired_keys
+from src.services.audit_writer import audit_writer
+from src.core.settings_cache import settings_cache, warm_settings_cache
+from src.services.activity_log_maintenance import activity_log_maintenance_loop, run_activity_log_maintenance
+from src.services.backup_service import backup_scheduler_loop
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestiona el ciclo de vida de la aplicación."""
     # Inicializar base de datos (opcional - solo si está disponible)
+    database_available = False
     try:
-        await init_db()
+        # Esquema por migraciones de Alembic: una consulta si la base está al día
+        await ensure_schema()
+        database_available = True
+    except SchemaOutOfDateError:
+        # Con la base atrasada la aplicación no arranca (DB_MIGRATIONS_ON_STARTUP=check)
+        raise
     except Exception as e:
         print(f"Warning: Database not available - {e}")
         print("Running in development mode without database.")
+
+    if database_available:
+        # Pasos independientes: si uno falla, los demás igual se ejecutan
+        for startup_step in (purge_expired_keys, run_activity_log_maintenance, warm_settings_cache):
+            try:
+                await startup_step()
+            except Exception as e:
+                print(f"Warning: {startup_step.__name__} failed on startup - {e}")
+    await audit_writer.start()
+    maintenance_task = asyncio.create_task(activity_log_maintenance_loop())
+    # Invalidación de la caché de configuraciones entre workers (LISTEN/NOTIFY)
+    settings_listener = asyncio.create_task(settings_cache.listen(engine)) if settings.SETTINGS_CACHE_LISTEN else None
+    backup_scheduler = asyncio.create_task(backup_scheduler_loop()) if settings.BACKUP_SCHEDULER_ENABLED else None
     yield
-    # Cleanup (si es necesario)
+    maintenance_task.cancel()
+    if backup_scheduler:
+        backup_scheduler.cancel()
+    if settings_listener:
+        settings_listener.cancel()
+    # Escribir los eventos de auditoría pendientes antes de salir
+    await audit_writer.stop()
 
 
 app = FastAPI(
@@ -33,6 +69,14 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Profiler opcional: el primer middleware agregado es el más interno (perfila el handler)
+if settings.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
+# Idempotency-Key en subida y creación de facturas (dentro de CORS para que
+# las respuestas repetidas también lleven las cabeceras CORS)
+app.add_middleware(IdempotencyMiddleware)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +86,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Consultas SQL por petición: log de N+1 / peticiones pesadas y Server-Timing en DEBUG
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Métricas por ruta (el último middleware agregado es el más externo: mide la petición completa)
+if settings.METRICS_ENABLED:
+    register_default_collectors()
+    app.add_middleware(MetricsMiddleware)
+
 # Registrar routers
 app.include_router(auth.router, prefix="/api/auth", tags=["autenticación"])
 app.include_router(users.router, prefix="/api/users", tags=["usuarios"])
@@ -54,6 +107,7 @@ app.include_router(approval.router, prefix="/api/v1/approval", tags=["aprobació
 app.include_router(partners.router, prefix="/api/v1/partners", tags=["socios y proveedores"])
 app.include_router(system_settings.router, prefix="/api/v1/system", tags=["configuraciones del sistema"])
 app.include_router(financial_reports.router, prefix="/api/v1", tags=["reportes financieros"])
+app.include_router(activity_logs.router, prefix="/api/v1/activity-logs", tags=["log de actividades"])
 
 
 @app.get("/")
@@ -70,3 +124,17 @@ async def root():
 async def health_check():
     """Endpoint de verificación de salud."""
     return {"status": "healthy"}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint(authorization: Optional[str] = Header(None)):
+        """Métricas del proceso en formato de texto de Prometheus."""
+        if settings.METRICS_TOKEN and not secrets.compare_digest(
+            authorization or "", f"Bearer {settings.METRICS_TOKEN}"
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token de métricas inválido"
+            )
+        return Response(metrics.render(), media_type=CONTENT_TYPE)
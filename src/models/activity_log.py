@@ -2,7 +2,9 @@
 Modelo de log de actividades para auditoría.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, ForeignKey, Index, JSON, PrimaryKeyConstraint, Sequence, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -11,27 +13,49 @@ from .base import Base
 class ActivityLog(Base):
     """
     Modelo de log de actividades del sistema.
-    
+
+    En PostgreSQL la tabla está particionada por rango mensual sobre
+    `timestamp` (ver `ActivityLogMaintenance`), por eso la clave primaria
+    incluye la columna de partición y el id sale de una secuencia propia
+    (una clave compuesta no puede ser SERIAL). En SQLite (desarrollo y
+    pruebas) la clave es solo `id`, alias del rowid, que se autoincrementa.
+
     Campos:
-    - id: Identificador único (PK)
+    - id: Identificador (PK junto con timestamp)
     - user_id: ID del usuario que realizó la acción (FK)
     - action: Tipo de acción realizada
-    - details: Detalles de la acción en formato JSON/texto
+    - details: Detalles de la acción (JSONB)
     - ip_address: Dirección IP del usuario
     - timestamp: Momento en que se realizó la acción
     """
-    
+
     __tablename__ = "activity_logs"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    __table_args__ = (
+        # Búsquedas con paginación keyset (timestamp, id) descendente
+        Index("ix_activity_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_activity_logs_user_timestamp", "user_id", "timestamp", "id"),
+        Index("ix_activity_logs_action_timestamp", "action", "timestamp", "id"),
+        Index("ix_activity_logs_invoice_timestamp", text("(details ->> 'invoice_id')"), "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)", "info": {"sqlite_rowid_pk": True}},
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), Sequence("activity_logs_id_seq"), primary_key=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     action = Column(String(100), nullable=False)  # CARGA_FACTURA, EDICION_CLIENTE, etc.
-    details = Column(Text, nullable=True)  # Detalles de la acción
+    details = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)  # Detalles de la acción
     ip_address = Column(String(45), nullable=True)  # IPv4 o IPv6
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    
+
     # Relación con User
     user = relationship("User")
-    
+
     def __repr__(self):
         return f"<ActivityLog(id={self.id}, action='{self.action}', user_id={self.user_id})>"
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _sqlite_primary_key(constraint, compiler, **kw):
+    """En SQLite la clave de las tablas marcadas es solo `id` (autoincremental)."""
+    if constraint.table.info.get("sqlite_rowid_pk"):
+        return "PRIMARY KEY (id)"
+    return compiler.visit_primary_key_constraint(constraint, **kw)
@@ -0,0 +1,49 @@
+"""
+Modelo para claves de idempotencia de endpoints de creación.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, UniqueConstraint
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Registro de una petición con cabecera `Idempotency-Key`.
+
+    Permite que los reintentos del frontend reciban la respuesta original en
+    lugar de crear otra factura y repetir la extracción con IA.
+
+    Campos:
+    - key / user_scope: Clave enviada por el cliente y usuario (sub del JWT) al que pertenece
+    - fingerprint: SHA-256 de método + ruta + cuerpo de la petición original
+    - status: 'processing' mientras la primera petición está en curso, 'completed' al terminar
+    - response_*: Respuesta guardada para repetir en los reintentos
+    - locked_at: Inicio del procesamiento (para recuperar bloqueos huérfanos)
+    - expires_at: Fin de la ventana de idempotencia
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(255), nullable=False)
+    user_scope = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    method = Column(String(10), nullable=False)
+    path = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default="processing")
+
+    response_status = Column(Integer, nullable=True)
+    response_content_type = Column(String(100), nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("key", "user_scope", name="uq_idempotency_key_scope"),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key='{self.key}', scope='{self.user_scope}', status='{self.status}')>"
@@ -4,9 +4,9 @@ Alineado con la lógica fiscal argentina de Joni/Hernán.
 """
 
 <<<<<<< HEAD
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean, DECIMAL, Date, CheckConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean, DECIMAL, Date, CheckConstraint, Index
 =======
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean, Float, Date, Numeric, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean, Float, Date, Numeric, Index, Enum as SQLEnum
 >>>>>>> refs/remotes/origin/master
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -166,6 +166,8 @@ class Invoice(Base):
     
     extracted_data = Column(JSON, nullable=True)  # Datos extraídos por Azure Document Intelligence
     blob_url = Column(String(500), nullable=True)  # URL en Azure Blob Storage
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 del archivo (ver raw_extractions)
+    pipeline_version = Column(Integer, nullable=True, index=True)  # Versión del pipeline de extracción que la procesó
     
     # ===== SOFT DELETE =====
     
@@ -188,6 +190,8 @@ class Invoice(Base):
         CheckConstraint("tipo_factura IN ('A', 'B', 'C') OR tipo_factura IS NULL", name="chk_tipo_factura"),
         CheckConstraint("invoice_direction IN ('emitida', 'recibida')", name="chk_direccion"),
         CheckConstraint("payment_status IN ('pending_approval', 'approved', 'paid', 'rejected')", name="chk_payment_status"),
+        # Bloque de búsqueda para la detección de duplicados
+        Index("ix_invoices_duplicate_block", "cuit", "numero_factura", "tipo_factura"),
     )
     
     def __repr__(self):
@@ -0,0 +1,38 @@
+"""
+Modelo para el almacenamiento lateral de resultados crudos de Azure Document Intelligence.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class RawExtraction(Base):
+    """
+    Resultado crudo del análisis de Document Intelligence, comprimido.
+
+    Se guarda fuera de la tabla `invoices` y se indexa por el hash SHA-256 del
+    archivo, de modo que el mismo documento nunca se analiza dos veces y el
+    mapeo local se puede volver a ejecutar sin llamar a Azure.
+
+    Campos:
+    - content_hash: SHA-256 (hex) del archivo original
+    - model_id: Modelo de Document Intelligence utilizado (prebuilt-invoice)
+    - codec: Compresión del payload ('zstd' o 'gzip')
+    - payload: JSON del AnalyzeResult comprimido
+    - raw_size / compressed_size: Tamaños en bytes antes y después de comprimir
+    """
+
+    __tablename__ = "raw_extractions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    model_id = Column(String(100), nullable=False)
+    codec = Column(String(10), nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    raw_size = Column(Integer, nullable=True)
+    compressed_size = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<RawExtraction(hash='{self.content_hash[:12]}', codec='{self.codec}', size={self.compressed_size})>"
@@ -2,7 +2,7 @@
 Modelo de configuraciones del sistema Open Doors.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, Text
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, DateTime, JSON, Text
 from sqlalchemy.sql import func
 from .base import Base
 
@@ -69,10 +69,13 @@ class BackupLog(Base):
     
     Campos:
     - id: Identificador único (PK)
-    - backup_type: Tipo de backup (daily, manual, etc.)
-    - file_path: Ruta del archivo de backup
+    - backup_type: Tipo de backup (daily, manual, etc.) o "verify" para una restauración de prueba
+    - file_path: Ruta del backup (directorio de pg_dump en formato directorio)
     - file_size: Tamaño del archivo en bytes
     - status: Estado del backup (success, failed, in_progress)
+    - progress: Porcentaje de avance (0-100) mientras corre
+    - tables_total / tables_done: Tablas a volcar (o restaurar) y ya procesadas
+    - details: Datos del trabajo (filas por tabla del snapshot, resultado de la verificación)
     - started_at: Fecha de inicio
     - completed_at: Fecha de finalización
     - error_message: Mensaje de error si falló
@@ -83,8 +86,12 @@ class BackupLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     backup_type = Column(String(50), nullable=False)  # daily, manual, scheduled
     file_path = Column(String(500), nullable=False)
-    file_size = Column(Integer, nullable=True)  # en bytes
+    file_size = Column(BigInteger, nullable=True)  # en bytes
     status = Column(String(20), nullable=False)  # success, failed, in_progress
+    progress = Column(Integer, nullable=False, default=0, server_default="0")
+    tables_total = Column(Integer, nullable=True)
+    tables_done = Column(Integer, nullable=True)
+    details = Column(JSON, nullable=True)
     started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     error_message = Column(Text, nullable=True)
@@ -45,6 +45,9 @@ class User(Base):
     
     is_active = Column(Boolean, default=True, nullable=False)
     
+    # Se incrementa al cambiar rol/contraseña o desactivar: invalida los tokens emitidos antes
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # Información personal
     profile_photo_url = Column(String(500), nullable=True)  # URL de foto de perfil
     phone = Column(String(20), nullable=True)
@@ -4,13 +4,16 @@ Proporciona una interfaz común para todos los repositorios.
 """
 
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Type, Optional, List, Dict, Any
+from typing import Generic, TypeVar, Type, Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, func
 from sqlalchemy.orm import selectinload
 from sqlmodel import SQLModel
 from pydantic import BaseModel
 
+from src.repositories.filters import compile_filters
+from src.repositories.returning import column_values, insert_returning, update_returning
+
 # Tipos genéricos para el patrón Repository
 T = TypeVar('T', bound=SQLModel)  # Modelo de base de datos
 CreateSchema = TypeVar('CreateSchema', bound=BaseModel)  # Schema de creación
@@ -73,7 +76,7 @@ class BaseRepository(ABC, Generic[T, CreateSchema, UpdateSchema]):
         Args:
             skip: Número de registros a omitir
             limit: Número máximo de registros a retornar
-            filters: Diccionario de filtros a aplicar
+            filters: Filtros `campo` o `campo__operador` (ver `repositories.filters`)
             
         Returns:
             Lista de objetos encontrados
@@ -112,20 +115,17 @@ class BaseRepository(ABC, Generic[T, CreateSchema, UpdateSchema]):
         Cuenta el número de objetos que coinciden con los filtros.
         
         Args:
-            filters: Diccionario de filtros a aplicar
+            filters: Filtros `campo` o `campo__operador` (ver `repositories.filters`)
             
         Returns:
             Número de objetos que coinciden
         """
-        query = select(self.model)
-        
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    query = query.where(getattr(self.model, key) == value)
+        query = select(func.count()).select_from(self.model).where(
+            *compile_filters(self.model, filters)
+        )
         
         result = await self.session.execute(query)
-        return len(result.scalars().all())
+        return result.scalar_one()
 
 
 class SQLAlchemyRepository(BaseRepository[T, CreateSchema, UpdateSchema]):
@@ -137,12 +137,7 @@ class SQLAlchemyRepository(BaseRepository[T, CreateSchema, UpdateSchema]):
         """Crea un nuevo objeto en la base de datos."""
         # Convertir el schema a diccionario y crear instancia del modelo
         obj_data = obj_in.dict() if hasattr(obj_in, 'dict') else obj_in
-        db_obj = self.model(**obj_data)
-        
-        self.session.add(db_obj)
-        await self.session.commit()
-        await self.session.refresh(db_obj)
-        return db_obj
+        return await insert_returning(self.session, self.model, obj_data)
     
     async def get(self, id: Any) -> Optional[T]:
         """Obtiene un objeto por su ID."""
@@ -158,16 +153,7 @@ class SQLAlchemyRepository(BaseRepository[T, CreateSchema, UpdateSchema]):
         filters: Optional[Dict[str, Any]] = None
     ) -> List[T]:
         """Obtiene múltiples objetos con paginación y filtros."""
-        query = select(self.model)
-        
-        # Aplicar filtros
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    if isinstance(value, list):
-                        query = query.where(getattr(self.model, key).in_(value))
-                    else:
-                        query = query.where(getattr(self.model, key) == value)
+        query = select(self.model).where(*compile_filters(self.model, filters))
         
         # Aplicar paginación
         query = query.offset(skip).limit(limit)
@@ -175,23 +161,49 @@ class SQLAlchemyRepository(BaseRepository[T, CreateSchema, UpdateSchema]):
         result = await self.session.execute(query)
         return result.scalars().all()
     
-    async def update(self, id: Any, obj_in: UpdateSchema) -> Optional[T]:
-        """Actualiza un objeto existente."""
-        # Obtener el objeto existente
-        db_obj = await self.get(id)
-        if not db_obj:
-            return None
+    async def get_multi_with_count(
+        self, 
+        skip: int = 0, 
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[T], int]:
+        """
+        Obtiene una página de objetos y el total sin paginar en una sola consulta.
         
-        # Actualizar los campos
-        obj_data = obj_in.dict(exclude_unset=True) if hasattr(obj_in, 'dict') else obj_in
-        for field, value in obj_data.items():
-            if hasattr(db_obj, field):
-                setattr(db_obj, field, value)
+        El total se calcula con `count(*) OVER ()`, que se evalúa antes del
+        LIMIT/OFFSET. Solo si la página viene vacía (skip más allá del final)
+        se hace un COUNT aparte.
         
-        self.session.add(db_obj)
-        await self.session.commit()
-        await self.session.refresh(db_obj)
-        return db_obj
+        Args:
+            skip: Número de registros a omitir
+            limit: Número máximo de registros a retornar
+            filters: Filtros `campo` o `campo__operador` (ver `repositories.filters`)
+            
+        Returns:
+            Tupla (objetos de la página, total de objetos que coinciden)
+        """
+        query = (
+            select(self.model, func.count().over().label("total_count"))
+            .where(*compile_filters(self.model, filters))
+            .offset(skip)
+            .limit(limit)
+        )
+        
+        result = await self.session.execute(query)
+        rows = result.all()
+        if not rows:
+            return [], (await self.count(filters) if skip else 0)
+        return [row[0] for row in rows], rows[0].total_count
+    
+    async def update(self, id: Any, obj_in: UpdateSchema) -> Optional[T]:
+        """Actualiza un objeto existente (un solo UPDATE ... RETURNING)."""
+        obj_data = obj_in.dict(exclude_unset=True) if hasattr(obj_in, 'dict') else obj_in
+        return await update_returning(
+            self.session,
+            self.model,
+            self.model.id == id,
+            column_values(self.model, obj_data)
+        )
     
     async def delete(self, id: Any) -> bool:
         """Elimina un objeto por su ID."""
@@ -0,0 +1,80 @@
+"""
+Mini-DSL de filtros para los repositorios.
+
+Las claves siguen la forma `campo` o `campo__operador`:
+
+    {"status": "approved"}                 -> status = 'approved'
+    {"status": ["pending", "sent"]}        -> status IN (...)
+    {"issue_date__gte": date(2025, 1, 1)}  -> issue_date >= ...
+    {"client_name__ilike": "%acme%"}       -> client_name ILIKE ...
+    {"deleted_at__isnull": True}           -> deleted_at IS NULL
+
+La interpretación de las claves (columna + operador) se compila una vez por
+(modelo, forma del filtro) y se cachea; en cada consulta solo se aplican
+los valores.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.sql.elements import ColumnElement
+
+# Operador -> constructor de la expresión (columna, valor)
+OPERATORS: Dict[str, Callable[[Any, Any], ColumnElement]] = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "in": lambda column, value: column.in_(value),
+    "ilike": lambda column, value: column.ilike(value),
+    "isnull": lambda column, value: column.is_(None) if value else column.is_not(None),
+}
+
+# Plan compilado: (clave original, columna, constructor) por cada filtro aplicable
+FilterPlan = Tuple[Tuple[str, Any, Callable[[Any, Any], ColumnElement]], ...]
+
+
+def _split_key(key: str) -> Tuple[str, str]:
+    field, separator, operator = key.rpartition("__")
+    if separator and operator in OPERATORS:
+        return field, operator
+    return key, "eq"
+
+
+@lru_cache(maxsize=512)
+def _compile_plan(model: type, shape: Tuple[Tuple[str, bool], ...]) -> FilterPlan:
+    plan = []
+    for key, is_list in shape:
+        field, operator = _split_key(key)
+        column = getattr(model, field, None)
+        if column is None:
+            # Igual que antes: los campos que el modelo no tiene se ignoran
+            continue
+        if operator == "eq" and is_list:
+            operator = "in"
+        plan.append((key, column, OPERATORS[operator]))
+    return tuple(plan)
+
+
+def compile_filters(model: type, filters: Optional[Dict[str, Any]]) -> List[ColumnElement]:
+    """
+    Convierte un diccionario de filtros en expresiones de SQLAlchemy.
+
+    Args:
+        model: Clase del modelo
+        filters: Filtros con claves `campo` o `campo__operador`
+
+    Returns:
+        Lista de condiciones para `query.where(*condiciones)`
+    """
+    if not filters:
+        return []
+    shape = tuple(sorted((key, isinstance(value, (list, tuple, set))) for key, value in filters.items()))
+    return [build(column, filters[key]) for key, column, build in _compile_plan(model, shape)]
+
+
+def filter_cache_info():
+    """Estadísticas de la caché de planes compilados."""
+    return _compile_plan.cache_info()
@@ -0,0 +1,102 @@
+"""
+Escrituras con RETURNING.
+
+`session.add()` + `commit()` + `refresh()` cuesta un INSERT y un SELECT
+extra para leer los valores generados por la base (id, created_at, ...), y
+una edición típica agrega además el SELECT previo de la fila. Estos helpers
+hacen la escritura y la lectura en una sola sentencia:
+
+    INSERT INTO ... VALUES (...) RETURNING *
+    UPDATE ... SET ... WHERE ... RETURNING *
+
+El objeto devuelto queda en la sesión con todas sus columnas cargadas
+(incluidos los server defaults y `onupdate`), así que no hace falta
+`refresh()` después del commit (las sesiones usan `expire_on_commit=False`).
+"""
+
+from typing import Any, Dict, Optional, Type, TypeVar
+
+from sqlalchemy import insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+M = TypeVar("M")
+
+
+def column_values(model: Type[M], data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Filtra un diccionario a las columnas del modelo (ignora el resto).
+
+    Args:
+        model: Clase del modelo
+        data: Datos recibidos (ej: body de la petición)
+
+    Returns:
+        Diccionario solo con claves que son columnas del modelo
+    """
+    columns = inspect(model).columns.keys()
+    return {key: value for key, value in data.items() if key in columns}
+
+
+async def insert_returning(
+    session: AsyncSession,
+    model: Type[M],
+    values: Dict[str, Any],
+    commit: bool = True
+) -> M:
+    """
+    Inserta una fila y devuelve la instancia con todas sus columnas.
+
+    Args:
+        session: Sesión de base de datos
+        model: Clase del modelo
+        values: Valores de las columnas
+        commit: Confirmar la transacción al terminar
+
+    Returns:
+        Instancia del modelo creada (presente en la sesión)
+    """
+    result = await session.execute(
+        insert(model).values(**values).returning(model)
+    )
+    obj = result.scalar_one()
+    if commit:
+        await session.commit()
+    return obj
+
+
+async def update_returning(
+    session: AsyncSession,
+    model: Type[M],
+    where: ColumnElement,
+    values: Dict[str, Any],
+    commit: bool = True
+) -> Optional[M]:
+    """
+    Actualiza una fila y devuelve la instancia con los valores finales.
+
+    Args:
+        session: Sesión de base de datos
+        model: Clase del modelo
+        where: Condición que identifica la fila (ej: `Invoice.id == 5`)
+        values: Valores a asignar
+        commit: Confirmar la transacción al terminar
+
+    Returns:
+        Instancia actualizada, o None si ninguna fila cumple la condición
+    """
+    if not values:
+        result = await session.execute(select(model).where(where))
+        return result.scalar_one_or_none()
+
+    result = await session.execute(
+        update(model)
+        .where(where)
+        .values(**values)
+        .returning(model)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    obj = result.scalar_one_or_none()
+    if commit and obj is not None:
+        await session.commit()
+    return obj
@@ -0,0 +1,321 @@
+"""
+Mantenimiento de la tabla particionada `activity_logs` (PostgreSQL).
+
+- Crea por adelantado las particiones mensuales (y una partición DEFAULT que
+  recibe cualquier fila fuera de rango).
+- Aplica la retención configurada en `SystemSettings` (clave
+  `activity_log_retention`): las particiones más viejas se eliminan
+  (`drop`) o se desacoplan y comprimen (`compress`).
+- Migra una tabla `activity_logs` previa (sin particionar, `details` en
+  texto) al esquema particionado.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal, engine
+from src.models.activity_log import ActivityLog
+from src.models.system_settings import SystemSettings
+
+logger = logging.getLogger(__name__)
+
+TABLE = "activity_logs"
+DEFAULT_PARTITION = "activity_logs_default"
+LEGACY_TABLE = "activity_logs_legacy"
+RETENTION_SETTING_KEY = "activity_log_retention"
+DEFAULT_RETENTION = {"months": 24, "mode": "drop"}  # mode: drop | compress
+RETENTION_MODES = ("drop", "compress")
+
+# Evita que dos workers hagan DDL sobre la tabla al mismo tiempo
+_ADVISORY_LOCK_ID = 0x0AC7_1061
+
+_PARTITION_NAME = re.compile(r"^activity_logs_(\d{4})_(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    """Primer día del mes de una fecha."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Suma (o resta) meses a una fecha que es primer día de mes."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Nombre de la partición de un mes (ej: activity_logs_2025_03)."""
+    return f"{TABLE}_{month.year}_{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Mes que cubre una partición según su nombre, o None si no es mensual."""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+class ActivityLogMaintenance:
+    """
+    Servicio de particiones y retención del log de actividades.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def is_partitioned(self) -> bool:
+        """Indica si `activity_logs` ya es una tabla particionada."""
+        result = await self.session.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = :name AND relkind IN ('r', 'p')"),
+            {"name": TABLE}
+        )
+        return result.scalar_one_or_none() == "p"
+
+    async def list_partitions(self) -> List[str]:
+        """Nombres de las particiones actuales."""
+        result = await self.session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits i "
+                "JOIN pg_class child ON child.oid = i.inhrelid "
+                "JOIN pg_class parent ON parent.oid = i.inhparent "
+                "WHERE parent.relname = :name ORDER BY child.relname"
+            ),
+            {"name": TABLE}
+        )
+        return [row[0] for row in result.all()]
+
+    async def ensure_partitions(
+        self,
+        months_ahead: Optional[int] = None,
+        from_month: Optional[date] = None
+    ) -> List[str]:
+        """
+        Crea las particiones mensuales faltantes (no hace commit).
+
+        Args:
+            months_ahead: Meses futuros a crear (por defecto ACTIVITY_LOG_PARTITIONS_AHEAD)
+            from_month: Primer mes a cubrir (por defecto el mes actual)
+
+        Returns:
+            Nombres de las particiones creadas
+        """
+        if months_ahead is None:
+            months_ahead = settings.ACTIVITY_LOG_PARTITIONS_AHEAD
+        current = month_start(datetime.now(timezone.utc).date())
+        month = month_start(from_month) if from_month else current
+        last = add_months(current, months_ahead)
+
+        await self.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"
+        ))
+
+        existing = set(await self.list_partitions())
+        created = []
+        while month <= last:
+            name = partition_name(month)
+            if name not in existing:
+                try:
+                    async with self.session.begin_nested():
+                        await self.session.execute(text(
+                            f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                        ))
+                    created.append(name)
+                except Exception as e:
+                    # Ej: la partición DEFAULT ya tiene filas de ese mes
+                    logger.warning(f"No se pudo crear la partición {name}: {e}")
+            month = add_months(month, 1)
+
+        if created:
+            logger.info(f"Particiones de {TABLE} creadas: {', '.join(created)}")
+        return created
+
+    async def get_retention(self) -> Dict[str, Any]:
+        """Política de retención vigente (SystemSettings con valores por defecto)."""
+        result = await self.session.execute(
+            select(SystemSettings.value).where(
+                SystemSettings.key == RETENTION_SETTING_KEY,
+                SystemSettings.is_active == True
+            )
+        )
+        value = result.scalar_one_or_none() or {}
+        return {**DEFAULT_RETENTION, **value}
+
+    async def set_retention(self, months: int, mode: str) -> Dict[str, Any]:
+        """Guarda la política de retención (hace commit)."""
+        value = {"months": months, "mode": mode}
+        result = await self.session.execute(
+            select(SystemSettings).where(SystemSettings.key == RETENTION_SETTING_KEY)
+        )
+        setting = result.scalar_one_or_none()
+        if setting is None:
+            setting = SystemSettings(
+                key=RETENTION_SETTING_KEY,
+                value=value,
+                description="Retención del log de actividades (meses y acción: drop o compress)",
+                category="audit"
+            )
+            self.session.add(setting)
+        else:
+            setting.value = value
+            setting.is_active = True
+        await self.session.commit()
+        return value
+
+    async def apply_retention(self, dry_run: bool = False) -> List[Dict[str, str]]:
+        """
+        Elimina o comprime las particiones que quedaron fuera de la retención.
+
+        Una partición se procesa cuando todo su mes es anterior al límite
+        (mes actual menos `months`). En modo `compress` se desacopla de la
+        tabla, se renombra a `activity_logs_archive_AAAA_MM` y se reescribe
+        con compresión lz4 (PostgreSQL 14+).
+
+        Args:
+            dry_run: Solo informar qué se haría
+
+        Returns:
+            Lista de acciones: {"partition", "action"}
+        """
+        retention = await self.get_retention()
+        months = int(retention["months"])
+        mode = retention["mode"] if retention["mode"] in RETENTION_MODES else "drop"
+        cutoff = add_months(month_start(datetime.now(timezone.utc).date()), -months)
+
+        actions = []
+        for name in await self.list_partitions():
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > cutoff:
+                continue
+            actions.append({"partition": name, "action": mode})
+            if dry_run or not await self._try_lock():
+                continue
+
+            if mode == "drop":
+                await self.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                await self.session.commit()
+            else:
+                archive = name.replace(f"{TABLE}_", f"{TABLE}_archive_", 1)
+                await self.session.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+                await self.session.execute(text(f"ALTER TABLE {name} RENAME TO {archive}"))
+                await self.session.execute(text(f"ALTER TABLE {archive} ALTER COLUMN details SET COMPRESSION lz4"))
+                await self.session.commit()
+                # VACUUM FULL no puede correr dentro de una transacción
+                async with engine.connect() as conn:
+                    conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    await conn.execute(text(f"VACUUM FULL {archive}"))
+            logger.info(f"Retención de {TABLE}: {name} -> {mode}")
+
+        return actions
+
+    async def migrate_legacy_table(self, batch_size: int = 50000) -> Dict[str, Any]:
+        """
+        Convierte una tabla `activity_logs` sin particionar al esquema nuevo.
+
+        Renombra la tabla existente a `activity_logs_legacy`, crea la tabla
+        particionada con las particiones necesarias y copia las filas en
+        lotes (`details` de texto JSON a JSONB). La tabla legacy queda para
+        borrarla a mano después de verificar. Ejecutar con la aplicación
+        detenida.
+
+        Returns:
+            Estadísticas de la migración
+        """
+        result = await self.session.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = :name"), {"name": TABLE}
+        )
+        if result.scalar_one_or_none() != "r":
+            return {"migrated": False, "rows": 0}
+
+        # Renombrar la tabla y sus objetos para liberar los nombres
+        await self.session.execute(text(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}"))
+        await self.session.execute(text(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT {TABLE}_pkey TO {LEGACY_TABLE}_pkey"))
+        await self.session.execute(text(f"ALTER SEQUENCE IF EXISTS {TABLE}_id_seq RENAME TO {LEGACY_TABLE}_id_seq"))
+        for index in ("ix_activity_logs_id", "ix_activity_logs_user_id"):
+            await self.session.execute(text(f"ALTER INDEX IF EXISTS {index} RENAME TO {index.replace(TABLE, LEGACY_TABLE)}"))
+
+        await self.session.run_sync(lambda sync_session: ActivityLog.__table__.create(sync_session.connection()))
+
+        bounds = await self.session.execute(text(f"SELECT min(timestamp), min(id), max(id) FROM {LEGACY_TABLE}"))
+        first_timestamp, min_id, max_id = bounds.one()
+        await self.ensure_partitions(from_month=first_timestamp.date() if first_timestamp else None)
+        await self.session.commit()
+
+        rows = 0
+        if min_id is not None:
+            start = min_id
+            while start <= max_id:
+                copied = await self.session.execute(
+                    text(
+                        f"INSERT INTO {TABLE} (id, timestamp, user_id, action, details, ip_address) "
+                        f"SELECT id, timestamp, user_id, action, details::jsonb, ip_address "
+                        f"FROM {LEGACY_TABLE} WHERE id >= :start AND id < :end"
+                    ),
+                    {"start": start, "end": start + batch_size}
+                )
+                await self.session.commit()
+                rows += copied.rowcount
+                start += batch_size
+                logger.info(f"Migración de {TABLE}: {rows} filas copiadas")
+
+            await self.session.execute(text(f"SELECT setval('{TABLE}_id_seq', :max_id)"), {"max_id": max_id})
+            await self.session.commit()
+
+        return {"migrated": True, "rows": rows}
+
+    async def _try_lock(self) -> bool:
+        """Advisory lock de la transacción actual (se libera con el commit)."""
+        result = await self.session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID}
+        )
+        return bool(result.scalar())
+
+    async def run(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Crea particiones y aplica la retención.
+
+        Con varios workers solo uno hace el DDL: el resto saltea el paso.
+
+        Returns:
+            Particiones creadas y acciones de retención
+        """
+        if not await self.is_partitioned():
+            logger.warning(f"{TABLE} no está particionada: ejecutar scripts/maintain_activity_log.py --migrate-legacy")
+            return {"partitioned": False, "created": [], "retention": []}
+
+        if not await self._try_lock():
+            await self.session.rollback()
+            return {"partitioned": True, "created": [], "retention": [], "skipped": True}
+        created = await self.ensure_partitions()
+        await self.session.commit()
+
+        retention = await self.apply_retention(dry_run=dry_run)
+        await self.session.commit()
+        return {"partitioned": True, "created": created, "retention": retention}
+
+
+async def run_activity_log_maintenance() -> Dict[str, Any]:
+    """Ejecuta el mantenimiento con una sesión propia."""
+    if engine.dialect.name != "postgresql":
+        # Sin particiones fuera de PostgreSQL (SQLite en desarrollo y pruebas)
+        return {"partitioned": False, "created": [], "retention": []}
+    async with AsyncSessionLocal() as session:
+        return await ActivityLogMaintenance(session).run()
+
+
+async def activity_log_maintenance_loop() -> None:
+    """Tarea de fondo: mantenimiento periódico mientras corre la aplicación."""
+    while True:
+        await asyncio.sleep(settings.ACTIVITY_LOG_MAINTENANCE_INTERVAL_HOURS * 3600)
+        try:
+            await run_activity_log_maintenance()
+        except Exception as e:
+            logger.error(f"Error en el mantenimiento de {TABLE}: {e}")
@@ -2,12 +2,36 @@
 Servicio para logging de actividades del sistema.
 """
 
-import json
-from typing import Optional, Dict, Any
+import base64
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, literal_column, tuple_
 
 from src.models.activity_log import ActivityLog
+from src.services.audit_writer import audit_writer, build_activity_row
+
+
+# Mismo texto que el índice ix_activity_logs_invoice_timestamp para que el planner lo use
+INVOICE_ID_EXPR = literal_column("(activity_logs.details ->> 'invoice_id')")
+
+
+def encode_cursor(timestamp: datetime, log_id: int) -> str:
+    """Cursor opaco de paginación keyset a partir de (timestamp, id)."""
+    raw = f"{timestamp.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+    
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    timestamp, log_id = base64.urlsafe_b64decode(padded).decode().split("|")
+    return datetime.fromisoformat(timestamp), int(log_id)
 
 
 class ActivityLogger:
@@ -21,29 +45,31 @@ class ActivityLogger:
         user_id: int,
         action: str,
         details: Optional[Dict[str, Any]] = None,
-        ip_address: Optional[str] = None
+        ip_address: Optional[str] = None,
+        durable: bool = False
     ) -> None:
         """
         Registra una actividad en el log.
         
+        Por defecto el evento se encola y se escribe en lote en segundo plano.
+        Con `durable=True` (aprobaciones, rechazos) la fila se escribe en la
+        sesión de la petición y se confirma junto con el cambio auditado.
+        
         Args:
             user_id: ID del usuario que realizó la acción
             action: Tipo de acción (CARGA_FACTURA, EDICION_CLIENTE, etc.)
             details: Detalles de la acción en formato diccionario
             ip_address: Dirección IP del usuario
+            durable: Escribir de forma sincrónica en la transacción actual
         """
+        row = build_activity_row(user_id, action, details, ip_address)
+        
+        if not durable:
+            await audit_writer.enqueue(row)
+            return
+        
         try:
-            # Convertir detalles a JSON si es un diccionario
-            details_json = json.dumps(details, ensure_ascii=False) if details else None
-            
-            activity_log = ActivityLog(
-                user_id=user_id,
-                action=action,
-                details=details_json,
-                ip_address=ip_address
-            )
-            
-            self.session.add(activity_log)
+            self.session.add(ActivityLog(**row))
             await self.session.commit()
             
         except Exception as e:
@@ -82,6 +108,64 @@ class ActivityLogger:
         return result.scalars().all()
 
 
+    async def search(
+        self,
+        user_id: Optional[int] = None,
+        action: Optional[str] = None,
+        invoice_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[ActivityLog], Optional[str]]:
+        """
+        Busca actividades con paginación keyset (más recientes primero).
+        
+        La página siguiente se pide con el cursor devuelto, que apunta al
+        último (timestamp, id) leído: el costo no depende de cuántas filas
+        hay antes, a diferencia de OFFSET. El rango de fechas además acota
+        las particiones mensuales que se leen.
+        
+        Args:
+            user_id: Filtrar por usuario
+            action: Filtrar por tipo de acción
+            invoice_id: Filtrar por `details.invoice_id`
+            date_from: Desde (inclusive)
+            date_to: Hasta (exclusive)
+            cursor: Cursor de la página anterior
+            limit: Cantidad máxima de resultados
+            
+        Returns:
+            Tupla (actividades, cursor de la página siguiente o None)
+        """
+        query = select(ActivityLog)
+        
+        if user_id is not None:
+            query = query.where(ActivityLog.user_id == user_id)
+        if action:
+            query = query.where(ActivityLog.action == action)
+        if invoice_id is not None:
+            query = query.where(INVOICE_ID_EXPR == str(invoice_id))
+        if date_from:
+            query = query.where(ActivityLog.timestamp >= date_from)
+        if date_to:
+            query = query.where(ActivityLog.timestamp < date_to)
+        if cursor:
+            last_timestamp, last_id = decode_cursor(cursor)
+            query = query.where(tuple_(ActivityLog.timestamp, ActivityLog.id) < tuple_(last_timestamp, last_id))
+        
+        query = query.order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(limit + 1)
+        
+        result = await self.session.execute(query)
+        logs = result.scalars().all()
+        
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = encode_cursor(logs[-1].timestamp, logs[-1].id)
+        return logs, next_cursor
+
+
 # Función helper para inyectar el logger
 def get_activity_logger(session: AsyncSession) -> ActivityLogger:
     """Retorna una instancia del ActivityLogger."""
@@ -0,0 +1,223 @@
+"""
+Motor único de parseo de montos (formato argentino e inglés).
+
+Reemplaza las heurísticas duplicadas de `FinancialCalculator.normalizar_monto`
+y `CurrencyValidator.normalizar_a_decimal`/`detectar_formato`. Cada texto se
+recorre una sola vez con una expresión regular precompilada que reconoce
+signo, símbolo de moneda, parte entera (agrupada o no) y parte decimal; la
+decisión de qué separador es el decimal sale de los grupos capturados, sin
+`replace`/`rfind` adicionales:
+
+    "$ 1.234,56"  -> 1234.56   (miles con ".", decimal con ",")
+    "1,234.56"    -> 1234.56   (formato inglés, se acepta igual)
+    "1.500"       -> 1500      (un separador seguido de 3 dígitos = miles)
+    "1234,5"      -> 1234.5    (cualquier otro caso = decimal)
+    "1 234,56"    -> 1234.56   (espacio o espacio duro como separador de miles)
+
+El análisis, el Decimal y los centavos de cada texto se cachean (LRU; Decimal
+es inmutable, así que compartirlo es seguro): en importaciones masivas los
+mismos literales ("0,00", "21,00", ...) se repiten mucho. `parse_many` procesa
+un lote y devuelve centavos en un `array('q')` (int64) con un código
+de error por ítem, sin crear un Decimal por valor.
+"""
+
+import math
+import re
+from array import array
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Tuple
+
+# Códigos de error por ítem
+PARSE_OK = 0
+PARSE_EMPTY = 1        # Vacío, solo símbolo o solo signo (los parsers anteriores lo tomaban como 0)
+PARSE_INVALID = 2      # Caracteres o estructura no reconocidos
+PARSE_MALFORMED = 3    # Mismo separador para miles y decimales (ej: "1.234.56")
+PARSE_OVERFLOW = 4     # No entra en int64 de centavos
+
+ERROR_MESSAGES = {
+    PARSE_OK: "OK",
+    PARSE_EMPTY: "Valor vacío",
+    PARSE_INVALID: "Formato inválido. Use $1.234,56 (argentino) o $1,234.56 (inglés)",
+    PARSE_MALFORMED: "Separadores inconsistentes: el separador decimal no puede ser el de miles",
+    PARSE_OVERFLOW: "Monto fuera de rango",
+}
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+_CENT = Decimal("0.01")
+
+# Una sola pasada: signo, símbolo, entero agrupado (1.234.567 o 1 234 567,
+# con espacio común, duro o angosto) con decimal opcional de otro separador,
+# o entero simple con decimal opcional.
+_AMOUNT_PATTERN = re.compile(r"""
+    \s*(?P<sign>-)?\s*(?:\$|ARS)?\s*(?P<sign_after>-)?\s*
+    (?:
+        (?P<grouped>\d{1,3}(?P<group_sep>[.,\ \u00a0\u202f])\d{3}(?:(?P=group_sep)\d{3})*)
+        (?:(?P<grouped_dec>[.,])(?P<grouped_frac>\d*))?
+      |
+        (?P<plain>\d*)(?:(?P<plain_dec>[.,])(?P<plain_frac>\d*))?
+    )
+    \s*(?:ARS|\$)?\s*
+""", re.VERBOSE)
+
+# Separador decimal (o de miles, si no hay decimal) -> formato
+_STYLE_BY_DECIMAL = {",": "argentino", ".": "ingles", None: "argentino"}
+_STYLE_BY_GROUP = {".": "argentino", ",": "ingles", " ": "argentino", "\u00a0": "argentino", "\u202f": "argentino"}
+
+# Resultado del scanner: (código, negativo, dígitos enteros, dígitos decimales, formato)
+Scan = Tuple[int, bool, str, str, str]
+
+
+@lru_cache(maxsize=8192)
+def _scan(text: str) -> Scan:
+    match = _AMOUNT_PATTERN.fullmatch(text)
+    if match is None:
+        return PARSE_INVALID, False, "", "", "invalido"
+
+    negative = bool(match.group("sign") or match.group("sign_after"))
+    grouped = match.group("grouped")
+
+    if grouped is not None:
+        group_sep = match.group("group_sep")
+        decimal_sep = match.group("grouped_dec")
+        if decimal_sep == group_sep:
+            return PARSE_MALFORMED, negative, "", "", "invalido"
+        if decimal_sep is None:
+            if grouped[0] == "0" and grouped.count(group_sep) == 1 and group_sep in _STYLE_BY_DECIMAL:
+                # "0,123" no es un grupo de miles: es decimal
+                return PARSE_OK, negative, "0", grouped[2:], _STYLE_BY_DECIMAL[group_sep]
+            return PARSE_OK, negative, grouped.replace(group_sep, ""), "", _STYLE_BY_GROUP[group_sep]
+        return PARSE_OK, negative, grouped.replace(group_sep, ""), match.group("grouped_frac"), _STYLE_BY_DECIMAL[decimal_sep]
+
+    integer = match.group("plain")
+    fraction = match.group("plain_frac") or ""
+    if not integer and not fraction:
+        return PARSE_EMPTY, negative, "", "", "invalido"
+    return PARSE_OK, negative, integer or "0", fraction, _STYLE_BY_DECIMAL[match.group("plain_dec")]
+
+
+@lru_cache(maxsize=8192)
+def _text_to_cents(text: str) -> Tuple[int, int]:
+    code, negative, integer, fraction, _ = _scan(text)
+    if code != PARSE_OK:
+        return 0, code
+    cents = int(integer) * 100 + int((fraction[:2] + "00")[:2])
+    if len(fraction) > 2 and fraction[2] >= "5":
+        # Redondeo half-up (alejándose de cero), igual que ROUND_HALF_UP
+        cents += 1
+    if negative:
+        cents = -cents
+    if not _INT64_MIN <= cents <= _INT64_MAX:
+        return 0, PARSE_OVERFLOW
+    return cents, PARSE_OK
+
+
+@lru_cache(maxsize=8192)
+def _text_to_decimal(text: str) -> Tuple[Optional[Decimal], int]:
+    code, negative, integer, fraction, _ = _scan(text)
+    if code != PARSE_OK:
+        return None, code
+    literal = f"{integer}.{fraction}" if fraction else integer
+    return Decimal(f"-{literal}" if negative else literal), PARSE_OK
+
+
+def parse_amount(value: Any) -> Tuple[Optional[Decimal], int]:
+    """
+    Convierte un monto (texto o número) a Decimal, conservando sus decimales.
+
+    Args:
+        value: Monto como str, int, float o Decimal
+
+    Returns:
+        Tupla (Decimal o None si hay error, código de error)
+    """
+    if isinstance(value, Decimal):
+        return value, PARSE_OK
+    if isinstance(value, str):
+        return _text_to_decimal(value)
+    if isinstance(value, bool) or value is None:
+        return None, PARSE_EMPTY if value is None else PARSE_INVALID
+    if isinstance(value, int):
+        return Decimal(value), PARSE_OK
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None, PARSE_INVALID
+        return Decimal(repr(value)), PARSE_OK
+    return None, PARSE_INVALID
+
+
+def parse_cents(value: Any) -> Tuple[int, int]:
+    """
+    Convierte un monto a centavos enteros (redondeo half-up).
+
+    Args:
+        value: Monto como str, int, float o Decimal
+
+    Returns:
+        Tupla (centavos, código de error); 0 centavos si hay error
+    """
+    if isinstance(value, str):
+        return _text_to_cents(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        cents = value * 100
+    else:
+        amount, code = parse_amount(value)
+        if code != PARSE_OK:
+            return 0, code
+        try:
+            cents = int(amount.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+        except InvalidOperation:
+            return 0, PARSE_OVERFLOW
+    if not _INT64_MIN <= cents <= _INT64_MAX:
+        return 0, PARSE_OVERFLOW
+    return cents, PARSE_OK
+
+
+def parse_many(values: Iterable[Any]) -> Tuple[array, array]:
+    """
+    Parsea un lote de montos a centavos.
+
+    Args:
+        values: Montos (str, int, float, Decimal o None)
+
+    Returns:
+        Tupla (array('q') de centavos, array('B') de códigos de error),
+        ambos del mismo largo y orden que la entrada
+    """
+    cents = array("q")
+    codes = array("B")
+    append_cents = cents.append
+    append_code = codes.append
+    text_to_cents = _text_to_cents
+    for value in values:
+        if type(value) is str:
+            amount, code = text_to_cents(value)
+        else:
+            amount, code = parse_cents(value)
+        append_cents(amount)
+        append_code(code)
+    return cents, codes
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """Convierte centavos enteros a Decimal con 2 decimales."""
+    return Decimal(cents).scaleb(-2)
+
+
+def detect_format(text: str) -> str:
+    """
+    Indica el formato de un texto: 'argentino', 'ingles' o 'invalido'.
+
+    Sin separadores el valor es válido en ambos y se informa 'argentino'.
+    """
+    return _scan(text)[4]
+
+
+def parser_cache_info():
+    """Estadísticas de las cachés de literales."""
+    return {
+        "scan": _scan.cache_info(),
+        "decimal": _text_to_decimal.cache_info(),
+        "cents": _text_to_cents.cache_info(),
+    }
@@ -0,0 +1,193 @@
+"""
+Escritura en lotes del log de actividades.
+
+Los eventos se encolan en memoria y una tarea de fondo los escribe con un
+único INSERT multi-fila cuando se junta un lote (AUDIT_FLUSH_MAX_BATCH) o
+pasa el intervalo máximo (AUDIT_FLUSH_INTERVAL_SECONDS). Así el registro de
+actividad no agrega un INSERT ni alarga la transacción de cada petición.
+El buffer se vacía al apagar la aplicación (hook `lifespan`).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.models.activity_log import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+def build_activity_row(
+    user_id: int,
+    action: str,
+    details: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None
+) -> Dict[str, Any]:
+    """Arma la fila de `activity_logs` con el momento real del evento."""
+    return {
+        "user_id": user_id,
+        "action": action,
+        # Ida y vuelta por JSON para que fechas/decimales lleguen como texto a la columna JSONB
+        "details": json.loads(json.dumps(details, ensure_ascii=False, default=str)) if details else None,
+        "ip_address": ip_address,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+class AuditWriter:
+    """
+    Buffer en memoria de eventos de auditoría con flush por tamaño o tiempo.
+    """
+
+    def __init__(self, flush_interval: float, max_batch: int, max_buffer: int):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_buffer = max_buffer
+        # Cada entrada: (momento de encolado, fila)
+        self._buffer: List[tuple] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Contadores
+        self.enqueued = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self.latency_seconds_max = 0.0
+        self.latency_seconds_total = 0.0
+        self._started_at = time.monotonic()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Inicia la tarea de fondo que vacía el buffer."""
+        if self.running:
+            return
+        self._stopping = False
+        self._started_at = time.monotonic()
+        self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    async def stop(self) -> None:
+        """Detiene la tarea de fondo y escribe lo pendiente."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def enqueue(self, row: Dict[str, Any]) -> None:
+        """
+        Encola una fila para escribirla en el próximo lote.
+
+        Si el writer no está corriendo (scripts, tests) se escribe en el momento.
+        Si el buffer está lleno se espera a que se vacíe. Solo si la escritura
+        falla y mientras tanto el buffer se llenó se descartan eventos: quedan
+        contados en `dropped` y registrados en el log.
+        """
+        if len(self._buffer) >= self.max_buffer:
+            await self.flush()
+        self._buffer.append((time.monotonic(), row))
+        self.enqueued += 1
+
+        if not self.running:
+            await self.flush()
+        elif len(self._buffer) >= self.max_batch:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """
+        Escribe el contenido del buffer en lotes de hasta `max_batch` filas.
+
+        Returns:
+            Cantidad de filas escritas
+        """
+        written = 0
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.max_batch]
+                del self._buffer[:self.max_batch]
+                started = time.monotonic()
+                try:
+                    async with AsyncSessionLocal() as session:
+                        await session.execute(insert(ActivityLog).values([row for _, row in batch]))
+                        await session.commit()
+                except Exception as e:
+                    self.failed_flushes += 1
+                    logger.error(f"Error escribiendo {len(batch)} eventos de auditoría: {e}")
+                    # Reintentar en el próximo flush, sin superar el máximo del buffer
+                    room = max(self.max_buffer - len(self._buffer), 0)
+                    self._buffer[:0] = batch[:room]
+                    if len(batch) > room:
+                        self.dropped += len(batch) - room
+                        logger.error(
+                            f"Buffer de auditoría lleno: se descartaron {len(batch) - room} eventos "
+                            f"({self.dropped} en total)"
+                        )
+                    break
+
+                finished = time.monotonic()
+                duration = finished - started
+                self.flushes += 1
+                self.written += len(batch)
+                written += len(batch)
+                self.flush_seconds_total += duration
+                self.flush_seconds_max = max(self.flush_seconds_max, duration)
+                for enqueued_at, _ in batch:
+                    latency = finished - enqueued_at
+                    self.latency_seconds_total += latency
+                    self.latency_seconds_max = max(self.latency_seconds_max, latency)
+        return written
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error en el writer de auditoría: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de throughput y latencia de flush."""
+        uptime = time.monotonic() - self._started_at
+        return {
+            "running": self.running,
+            "pending": len(self._buffer),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "rows_per_second": round(self.written / uptime, 2) if uptime > 0 else 0.0,
+            "avg_batch_size": round(self.written / self.flushes, 1) if self.flushes else 0.0,
+            "avg_flush_ms": round(self.flush_seconds_total / self.flushes * 1000, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.flush_seconds_max * 1000, 2),
+            "avg_latency_ms": round(self.latency_seconds_total / self.written * 1000, 2) if self.written else 0.0,
+            "max_latency_ms": round(self.latency_seconds_max * 1000, 2),
+        }
+
+
+# Writer compartido por todo el proceso
+audit_writer = AuditWriter(
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_batch=settings.AUDIT_FLUSH_MAX_BATCH,
+    max_buffer=settings.AUDIT_BUFFER_MAX
+)
@@ -0,0 +1,521 @@
+"""
+Backups de PostgreSQL en segundo plano.
+
+- `pg_dump` en formato directorio (`-Fd`) con trabajos paralelos (`-j`) y
+  compresión, lanzado con `asyncio.create_subprocess_exec`: el worker sigue
+  atendiendo peticiones mientras corre el volcado.
+- El volcado usa un snapshot exportado (`pg_export_snapshot`) desde una
+  transacción REPEATABLE READ en la que también se cuentan las filas de cada
+  tabla, así los conteos guardados en `BackupLog.details` son exactamente los
+  del backup.
+- El progreso (tablas volcadas / total) se lee del stderr de `pg_dump -v` y se
+  escribe en la fila de `BackupLog` cada BACKUP_PROGRESS_INTERVAL_SECONDS.
+- La frecuencia sale de `backup_settings.frequency` (hourly, daily, weekly o
+  disabled) y la hora de `backup_time`, en la zona BACKUP_TIMEZONE.
+- La verificación restaura un backup en una base temporal con `pg_restore -j`
+  y compara las filas de cada tabla contra las del snapshot.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal, build_connect_args, engine
+from src.core.settings_cache import settings_cache
+from src.models.system_settings import BackupLog
+
+logger = logging.getLogger(__name__)
+
+BACKUP_SETTINGS_KEY = "backup_settings"
+DEFAULT_BACKUP_SETTINGS = {
+    "frequency": "daily",
+    "daily_backup": True,
+    "backup_time": "02:00",
+    "retention_days": 30,
+    "backup_path": "/backups"
+}
+FREQUENCIES = ("hourly", "daily", "weekly", "disabled")
+BACKUP_PREFIX = "opendoors_backup_"
+VERIFY_DATABASE_PREFIX = "opendoors_verify_"
+
+# Evita que dos workers lancen el mismo backup programado
+_ADVISORY_LOCK_ID = 0x0BAC_0F11
+
+# Líneas de `pg_dump -v` / `pg_restore -v` que marcan una tabla terminada
+_TABLE_DONE = re.compile(
+    r'(?:dumping contents of table|processing data for table|finished item \d+ TABLE DATA)\s+"?([^"\s]+)'
+)
+
+# Tablas con datos (incluye particiones; excluye catálogos del sistema)
+_TABLES_SQL = text(
+    "SELECT n.nspname, c.relname FROM pg_class c "
+    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+    "WHERE c.relkind = 'r' AND n.nspname NOT IN ('pg_catalog', 'information_schema') "
+    "AND n.nspname NOT LIKE 'pg_toast%' AND n.nspname NOT LIKE 'pg_temp%' "
+    "ORDER BY 1, 2"
+)
+
+
+def resolve_frequency(backup_settings: Dict[str, Any]) -> str:
+    """
+    Frecuencia efectiva de backup.
+
+    Configuraciones guardadas antes de existir `frequency` solo tienen
+    `daily_backup`: se interpretan como diaria o desactivada.
+    """
+    frequency = backup_settings.get("frequency")
+    if frequency in FREQUENCIES:
+        return frequency
+    return "daily" if backup_settings.get("daily_backup", True) else "disabled"
+
+
+def scheduled_slot(backup_settings: Dict[str, Any], now: datetime) -> Optional[datetime]:
+    """
+    Último horario programado anterior o igual a `now`.
+
+    Args:
+        backup_settings: Configuración de backup (frequency, backup_time)
+        now: Momento actual (con zona horaria)
+
+    Returns:
+        Horario en UTC, o None si los backups automáticos están desactivados
+    """
+    frequency = resolve_frequency(backup_settings)
+    if frequency == "disabled":
+        return None
+    hour, minute = (int(part) for part in backup_settings.get("backup_time", "02:00").split(":"))
+
+    if frequency == "hourly":
+        slot = now.replace(minute=minute, second=0, microsecond=0)
+        if slot > now:
+            slot -= timedelta(hours=1)
+        return slot.astimezone(timezone.utc)
+
+    local_now = now.astimezone(ZoneInfo(settings.BACKUP_TIMEZONE))
+    slot = local_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if slot > local_now:
+        slot -= timedelta(days=1)
+    return slot.astimezone(timezone.utc)
+
+
+def is_backup_due(backup_settings: Dict[str, Any], last_started: Optional[datetime], now: datetime) -> bool:
+    """
+    Indica si corresponde lanzar el backup programado.
+
+    Args:
+        backup_settings: Configuración de backup
+        last_started: Inicio del último backup programado (exitoso o no)
+        now: Momento actual (con zona horaria)
+    """
+    slot = scheduled_slot(backup_settings, now)
+    if slot is None:
+        return False
+    if last_started is None:
+        return True
+    if resolve_frequency(backup_settings) == "weekly":
+        # Semanal: el primer horario diario a partir de los 7 días del anterior
+        return last_started < slot - timedelta(days=6)
+    return last_started < slot
+
+
+def pg_connection(url: Any, database: Optional[str] = None) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Argumentos de conexión y entorno para pg_dump / pg_restore.
+
+    Args:
+        url: URL de SQLAlchemy (str o URL, cualquier driver)
+        database: Base a usar en lugar de la de la URL
+
+    Returns:
+        Tupla (argumentos de línea de comandos, variables de entorno)
+    """
+    parsed = make_url(url)
+    args = []
+    if parsed.host:
+        args.append(f"--host={parsed.host}")
+    if parsed.port:
+        args.append(f"--port={parsed.port}")
+    if parsed.username:
+        args.append(f"--username={parsed.username}")
+    args.append(f"--dbname={database or parsed.database}")
+    args.append("--no-password")
+
+    env = os.environ.copy()
+    if parsed.password:
+        env["PGPASSWORD"] = parsed.password
+    sslmode = parsed.query.get("sslmode") or parsed.query.get("ssl")
+    if isinstance(sslmode, str):
+        env["PGSSLMODE"] = sslmode
+    return args, env
+
+
+def directory_size(path: str) -> int:
+    """Tamaño total en bytes de un archivo o directorio de backup."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def remove_expired_backups(backup_path: str, retention_days: int, now: Optional[float] = None) -> List[str]:
+    """
+    Borra los backups (directorios o `.sql` anteriores) más viejos que la retención.
+
+    Returns:
+        Nombres de los backups borrados
+    """
+    if retention_days <= 0 or not os.path.isdir(backup_path):
+        return []
+    cutoff = (now or time.time()) - retention_days * 86400
+    removed = []
+    for name in sorted(os.listdir(backup_path)):
+        if not name.startswith(BACKUP_PREFIX):
+            continue
+        path = os.path.join(backup_path, name)
+        if os.path.getmtime(path) >= cutoff:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+        removed.append(name)
+    return removed
+
+
+async def count_rows(conn: AsyncConnection) -> Dict[str, int]:
+    """Filas exactas por tabla ("esquema.tabla") vistas por la transacción de `conn`."""
+    tables = (await conn.execute(_TABLES_SQL)).all()
+    quoted = conn.dialect.identifier_preparer.quote
+    counts = {}
+    for schema, table in tables:
+        result = await conn.execute(text(f"SELECT count(*) FROM {quoted(schema)}.{quoted(table)}"))
+        counts[f"{schema}.{table}"] = result.scalar()
+    return counts
+
+
+async def _run_pg_tool(
+    cmd: List[str],
+    env: Dict[str, str],
+    on_table_done: Callable[[str], Awaitable[None]]
+) -> Tuple[int, str]:
+    """
+    Ejecuta pg_dump / pg_restore sin bloquear el event loop.
+
+    Returns:
+        Tupla (código de salida, últimas líneas de stderr que no son progreso)
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd, env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    tail = deque(maxlen=20)
+    try:
+        async for raw_line in process.stderr:
+            line = raw_line.decode(errors="replace").rstrip()
+            match = _TABLE_DONE.search(line)
+            if match:
+                await on_table_done(match.group(1))
+            elif line:
+                tail.append(line)
+        return await process.wait(), "\n".join(tail)
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+
+class BackupRunner:
+    """
+    Ejecuta backups y restauraciones de prueba, reportando el avance en `BackupLog`.
+    """
+
+    def __init__(self, db_engine, session_factory):
+        self.engine = db_engine
+        self.session_factory = session_factory
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def _update_log(self, log_id: int, **values) -> None:
+        async with self.session_factory() as session:
+            await session.execute(update(BackupLog).where(BackupLog.id == log_id).values(**values))
+            await session.commit()
+
+    async def _finish_log(self, log_id: int, status: str, **values) -> None:
+        if status == "success":
+            values["progress"] = 100
+        await self._update_log(log_id, status=status, completed_at=datetime.now(timezone.utc), **values)
+
+    def _progress_reporter(self, log_id: int, total: int) -> Callable[[str], Awaitable[None]]:
+        """Callback por tabla terminada que escribe el avance como mucho cada N segundos."""
+        state = {"done": 0, "written_at": 0.0}
+
+        async def table_done(_table: str) -> None:
+            state["done"] += 1
+            now = time.monotonic()
+            if now - state["written_at"] < settings.BACKUP_PROGRESS_INTERVAL_SECONDS:
+                return
+            state["written_at"] = now
+            done = min(state["done"], total)
+            await self._update_log(
+                log_id,
+                tables_done=done,
+                progress=min(99, done * 100 // total) if total else 0
+            )
+
+        return table_done
+
+    async def create_log(self, backup_type: str, file_path: str, details: Optional[Dict[str, Any]] = None) -> BackupLog:
+        """Crea la fila `in_progress` de un trabajo."""
+        async with self.session_factory() as session:
+            backup_log = BackupLog(backup_type=backup_type, file_path=file_path, status="in_progress", progress=0, details=details)
+            session.add(backup_log)
+            await session.commit()
+            await session.refresh(backup_log)
+            return backup_log
+
+    async def backup(self, log_id: int, backup_dir: str) -> None:
+        """
+        Vuelca la base a `backup_dir` (formato directorio) desde un snapshot exportado.
+
+        Args:
+            log_id: Fila de BackupLog del trabajo
+            backup_dir: Directorio destino (no debe existir)
+        """
+        args, env = pg_connection(self.engine.url)
+        try:
+            os.makedirs(os.path.dirname(backup_dir) or ".", exist_ok=True)
+            async with self.engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+                async with conn.begin():
+                    snapshot = (await conn.execute(text("SELECT pg_export_snapshot()"))).scalar()
+                    row_counts = await count_rows(conn)
+                    await self._update_log(
+                        log_id,
+                        tables_total=len(row_counts),
+                        tables_done=0,
+                        details={"format": "directory", "row_counts": row_counts}
+                    )
+
+                    # pg_dump lee el mismo snapshot mientras esta transacción siga abierta
+                    cmd = [
+                        "pg_dump",
+                        *args,
+                        "--format=directory",
+                        f"--jobs={settings.BACKUP_PARALLEL_JOBS}",
+                        f"--compress={settings.BACKUP_COMPRESSION}",
+                        f"--snapshot={snapshot}",
+                        "--no-owner",
+                        "--no-privileges",
+                        "--verbose",
+                        f"--file={backup_dir}"
+                    ]
+                    returncode, stderr = await _run_pg_tool(cmd, env, self._progress_reporter(log_id, len(row_counts)))
+
+            if returncode != 0:
+                await asyncio.to_thread(shutil.rmtree, backup_dir, True)
+                await self._finish_log(log_id, "failed", error_message=stderr or "Error desconocido en el backup")
+                return
+
+            file_size = await asyncio.to_thread(directory_size, backup_dir)
+            await self._finish_log(log_id, "success", file_size=file_size, tables_done=len(row_counts))
+            logger.info(f"Backup {backup_dir} completado ({file_size} bytes)")
+        except asyncio.CancelledError:
+            await self._finish_log(log_id, "failed", error_message="Backup cancelado")
+            raise
+        except Exception as e:
+            logger.error(f"Error en el backup {backup_dir}: {e}")
+            await self._finish_log(log_id, "failed", error_message=str(e))
+
+    async def verify(self, log_id: int, source: BackupLog) -> None:
+        """
+        Restaura un backup en una base temporal y compara las filas por tabla.
+
+        Args:
+            log_id: Fila de BackupLog de la verificación
+            source: Backup exitoso a verificar
+        """
+        scratch = f"{VERIFY_DATABASE_PREFIX}{log_id}"
+        expected: Dict[str, int] = (source.details or {}).get("row_counts", {})
+        args, env = pg_connection(self.engine.url, database=scratch)
+        await self._update_log(log_id, tables_total=len(expected), tables_done=0)
+        try:
+            async with self.engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text(f'DROP DATABASE IF EXISTS "{scratch}"'))
+                await conn.execute(text(f'CREATE DATABASE "{scratch}"'))
+
+            cmd = [
+                "pg_restore",
+                *args,
+                f"--jobs={settings.BACKUP_PARALLEL_JOBS}",
+                "--no-owner",
+                "--no-privileges",
+                "--exit-on-error",
+                "--verbose",
+                source.file_path
+            ]
+            returncode, stderr = await _run_pg_tool(cmd, env, self._progress_reporter(log_id, len(expected)))
+            if returncode != 0:
+                await self._finish_log(log_id, "failed", error_message=stderr or "Error desconocido en la restauración")
+                return
+
+            scratch_engine = create_async_engine(
+                self.engine.url.set(database=scratch),
+                poolclass=NullPool,
+                connect_args=build_connect_args(self.engine.url.render_as_string(hide_password=False))
+            )
+            try:
+                async with scratch_engine.connect() as conn:
+                    restored = await count_rows(conn)
+            finally:
+                await scratch_engine.dispose()
+
+            mismatches = {
+                table: {"expected": rows, "restored": restored.get(table)}
+                for table, rows in expected.items()
+                if restored.get(table) != rows
+            }
+            details = {
+                "source_backup_id": source.id,
+                "tables": len(expected),
+                "rows": sum(expected.values()),
+                "mismatches": mismatches
+            }
+            if mismatches:
+                await self._finish_log(
+                    log_id, "failed", details=details,
+                    error_message=f"Conteo de filas distinto en {len(mismatches)} tabla(s)"
+                )
+            else:
+                await self._finish_log(log_id, "success", details=details, tables_done=len(expected))
+        except asyncio.CancelledError:
+            await self._finish_log(log_id, "failed", error_message="Verificación cancelada")
+            raise
+        except Exception as e:
+            logger.error(f"Error verificando el backup {source.id}: {e}")
+            await self._finish_log(log_id, "failed", error_message=str(e))
+        finally:
+            try:
+                async with self.engine.connect() as conn:
+                    conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    await conn.execute(text(f'DROP DATABASE IF EXISTS "{scratch}"'))
+            except Exception as e:
+                logger.warning(f"No se pudo borrar la base temporal {scratch}: {e}")
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def start_backup(self, backup_type: str, backup_path: str) -> BackupLog:
+        """
+        Registra un backup y lo lanza en segundo plano.
+
+        Args:
+            backup_type: manual o scheduled
+            backup_path: Directorio donde se guardan los backups
+
+        Returns:
+            BackupLog `in_progress` (el avance se consulta en /backup/logs)
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_dir = os.path.join(backup_path, f"{BACKUP_PREFIX}{timestamp}")
+        backup_log = await self.create_log(backup_type, backup_dir)
+        self._spawn(self.backup(backup_log.id, backup_dir))
+        return backup_log
+
+    async def start_verify(self, backup_log_id: int) -> BackupLog:
+        """
+        Lanza la restauración de prueba de un backup exitoso.
+
+        Raises:
+            ValueError: Si el backup no existe, no terminó bien o no es de formato directorio
+        """
+        async with self.session_factory() as session:
+            source = await session.get(BackupLog, backup_log_id)
+        if source is None or source.backup_type == "verify":
+            raise ValueError("Backup no encontrado")
+        if source.status != "success" or not (source.details or {}).get("row_counts"):
+            raise ValueError("Solo se pueden verificar backups exitosos en formato directorio")
+        verify_log = await self.create_log("verify", source.file_path, details={"source_backup_id": source.id})
+        self._spawn(self.verify(verify_log.id, source))
+        return verify_log
+
+    def running(self) -> int:
+        """Cantidad de trabajos en curso en este proceso."""
+        return len(self._tasks)
+
+
+backup_runner = BackupRunner(engine, AsyncSessionLocal)
+
+
+async def get_backup_settings(session) -> Dict[str, Any]:
+    """Configuración de backup vigente con valores por defecto."""
+    stored = await settings_cache.get(session, BACKUP_SETTINGS_KEY, {})
+    return {**DEFAULT_BACKUP_SETTINGS, **stored, "frequency": resolve_frequency(stored)}
+
+
+async def run_scheduled_backup(now: Optional[datetime] = None) -> Optional[BackupLog]:
+    """
+    Lanza el backup programado si corresponde y aplica la retención.
+
+    Con varios workers, el advisory lock y el registro del BackupLog en la
+    misma transacción hacen que solo uno lo lance.
+
+    Returns:
+        BackupLog lanzado, o None si no correspondía
+    """
+    if engine.dialect.name != "postgresql":
+        return None
+    now = now or datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as session:
+        backup_settings = await get_backup_settings(session)
+        if scheduled_slot(backup_settings, now) is None:
+            return None
+        locked = await session.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+        if not locked.scalar():
+            return None
+        last_started = (await session.execute(
+            select(func.max(BackupLog.started_at)).where(BackupLog.backup_type == "scheduled")
+        )).scalar()
+        if not is_backup_due(backup_settings, last_started, now):
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_dir = os.path.join(backup_settings["backup_path"], f"{BACKUP_PREFIX}{timestamp}")
+        backup_log = BackupLog(backup_type="scheduled", file_path=backup_dir, status="in_progress", progress=0)
+        session.add(backup_log)
+        await session.commit()
+
+    removed = await asyncio.to_thread(
+        remove_expired_backups, backup_settings["backup_path"], int(backup_settings["retention_days"])
+    )
+    if removed:
+        logger.info(f"Backups vencidos borrados: {', '.join(removed)}")
+    backup_runner._spawn(backup_runner.backup(backup_log.id, backup_dir))
+    return backup_log
+
+
+async def backup_scheduler_loop() -> None:
+    """Tarea de fondo: revisa periódicamente si toca un backup programado."""
+    while True:
+        await asyncio.sleep(settings.BACKUP_SCHEDULER_INTERVAL_SECONDS)
+        try:
+            await run_scheduled_backup()
+        except Exception as e:
+            logger.error(f"Error en el programador de backups: {e}")
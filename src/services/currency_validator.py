@@ -11,6 +11,14 @@ from decimal import Decimal
 >>>>>>> refs/remotes/origin/master
 from typing import Tuple, Optional
 
+from src.services.amount_parser import (
+    ERROR_MESSAGES,
+    PARSE_EMPTY,
+    PARSE_OK,
+    detect_format,
+    parse_amount,
+)
+
 class CurrencyValidator:
     """
 <<<<<<< HEAD
@@ -39,44 +47,7 @@ class CurrencyValidator:
         Returns:
             'argentino', 'ingles' o 'invalido'
         """
-        valor_limpio = valor.replace('$', '').replace(' ', '').strip()
-        
-        if not valor_limpio:
-            return 'invalido'
-        
-        # Detectar formato basado en posición de separadores
-        tiene_punto = '.' in valor_limpio
-        tiene_coma = ',' in valor_limpio
-        
-        if tiene_punto and tiene_coma:
-            # Ambos presentes: verificar posiciones
-            pos_punto = valor_limpio.rfind('.')
-            pos_coma = valor_limpio.rfind(',')
-            
-            if pos_coma > pos_punto:
-                return 'argentino'  # 1.234,56
-            else:
-                return 'ingles'  # 1,234.56
-        elif tiene_coma:
-            # Solo coma: verificar si es separador de miles o decimal
-            partes = valor_limpio.split(',')
-            if len(partes) == 2 and len(partes[1]) <= 2:
-                return 'argentino'  # Probablemente 1234,56
-            return 'ingles'  # Probablemente 1,234 o 12,345
-        elif tiene_punto:
-            # Solo punto: verificar si es separador de miles o decimal
-            partes = valor_limpio.split('.')
-            if len(partes) == 2 and len(partes[1]) <= 2:
-                return 'ingles'  # Probablemente 1234.56
-            return 'argentino'  # Probablemente 1.234 o 12.345
-        
-        # Sin separadores: válido para ambos
-        if CurrencyValidator.PATTERN_ARGENTINE.match(valor_limpio):
-            return 'argentino'
-        if CurrencyValidator.PATTERN_ENGLISH.match(valor_limpio):
-            return 'ingles'
-        
-        return 'invalido'
+        return detect_format(valor)
     
     @staticmethod
     def normalizar_a_decimal(valor: str) -> Tuple[bool, Optional[Decimal], str]:
@@ -90,37 +61,19 @@ class CurrencyValidator:
         Returns:
             Tupla (exito, decimal_value, mensaje)
         """
-        try:
-            # Limpiar valor
-            valor_limpio = valor.replace('$', '').replace(' ', '').replace('ARS', '').strip()
-            
-            if not valor_limpio or valor_limpio == '-':
-                return True, Decimal('0'), "Valor vacío, convertido a 0"
-            
-            # Detectar formato
-            formato = CurrencyValidator.detectar_formato(valor)
-            
-            if formato == 'invalido':
-                return False, None, f"Formato inválido: '{valor}'. Use $1.234,56 (argentino) o $1,234.56 (inglés)"
-            
-            # Convertir según formato detectado
-            if formato == 'argentino':
-                # 1.234,56 → 1234.56
-                valor_normalizado = valor_limpio.replace('.', '').replace(',', '.')
-            else:  # ingles
-                # 1,234.56 → 1234.56
-                valor_normalizado = valor_limpio.replace(',', '')
-            
-            decimal_value = Decimal(valor_normalizado)
-            
-            mensaje = "OK"
-            if formato == 'ingles':
-                mensaje = "Formato inglés detectado y convertido automáticamente"
-            
-            return True, decimal_value, mensaje
-            
-        except (InvalidOperation, ValueError) as e:
-            return False, None, f"Error al convertir '{valor}': {str(e)}"
+        decimal_value, codigo = parse_amount(valor)
+        
+        if codigo == PARSE_EMPTY:
+            return True, Decimal('0'), "Valor vacío, convertido a 0"
+        
+        if codigo != PARSE_OK:
+            return False, None, f"Formato inválido: '{valor}'. {ERROR_MESSAGES[codigo]}"
+        
+        mensaje = "OK"
+        if detect_format(valor) == 'ingles':
+            mensaje = "Formato inglés detectado y convertido automáticamente"
+        
+        return True, decimal_value, mensaje
     
     @staticmethod
     def formatear_argentino(valor: Decimal, incluir_simbolo: bool = True) -> str:
@@ -272,24 +225,18 @@ class CurrencyValidator:
         Detecta automáticamente el formato y convierte a Decimal.
         Retorna (valor_decimal, formato_detectado)
         """
-        valor = valor.strip().replace('$', '').replace(' ', '')
-        
-        # Formato argentino: 1.234,56
-        if re.match(r'^\d{1,3}(?:\.\d{3})*,\d{2}$', valor):
-            valor_limpio = valor.replace('.', '').replace(',', '.')
-            return (Decimal(valor_limpio), "argentino")
-        
-        # Formato inglés: 1,234.56
-        elif re.match(r'^\d{1,3}(?:,\d{3})*\.\d{2}$', valor):
-            valor_limpio = valor.replace(',', '')
-            return (Decimal(valor_limpio), "inglés_corregido")
-        
-        # Número simple
-        else:
-            try:
-                return (Decimal(valor), "simple")
-            except:
-                raise ValueError(f"No se pudo parsear: {valor}")
+        decimal_value, codigo = parse_amount(valor)
+        
+        if codigo != PARSE_OK:
+            raise ValueError(f"No se pudo parsear: {valor}")
+        
+        # Número simple (sin separadores)
+        if ',' not in valor and '.' not in valor:
+            return (decimal_value, "simple")
+        
+        if detect_format(valor) == 'argentino':
+            return (decimal_value, "argentino")
+        return (decimal_value, "inglés_corregido")
     
     @staticmethod
     def formatear_argentino(valor: Decimal) -> str:
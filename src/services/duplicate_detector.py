@@ -0,0 +1,223 @@
+"""
+Motor de detección de facturas duplicadas.
+
+Trabaja en tres etapas, todas resueltas con búsquedas por índice:
+1. Coincidencia exacta por hash SHA-256 del archivo.
+2. Bloque por (cuit, tipo_factura, numero_factura) sobre el índice compuesto.
+3. Puntaje difuso (razón social, total, fecha de emisión) solo entre los
+   candidatos del bloque.
+"""
+
+import difflib
+import re
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.models.invoice import Invoice
+from src.services.invoice_extraction import TIPOS_FACTURA, to_date, to_decimal, format_cuit
+
+# Máximo de candidatos a devolver / puntuar
+MAX_CANDIDATES = 10
+# Pesos del puntaje difuso
+FUZZY_WEIGHTS = {"razon_social": 0.4, "total": 0.4, "fecha_emision": 0.2}
+
+_NOT_ALNUM = re.compile(r'[^0-9a-z ]+')
+_SPACES = re.compile(r'\s+')
+_LEGAL_SUFFIXES = re.compile(r'\b(s ?a|s ?r ?l|s ?a ?s|s ?h|sociedad anonima)\b')
+
+
+def numero_variants(numero: Any) -> List[str]:
+    """
+    Variantes de formato de un número de comprobante.
+
+    Cubre '0001-00001234', '000100001234' y el número sin ceros a la
+    izquierda, que es como suele llegar según la fuente (OCR, carga manual).
+    """
+    raw = str(numero).strip()
+    digits = re.sub(r'\D', '', raw)
+    variants = {raw}
+    if digits:
+        variants.add(digits)
+        variants.add(digits.lstrip('0') or '0')
+        if len(digits) > 8:
+            variants.add(f"{digits[:-8].zfill(4)}-{digits[-8:]}")
+    return [variant[:50] for variant in variants]
+
+
+def _normalize_name(value: Optional[str]) -> str:
+    text = _NOT_ALNUM.sub(' ', (value or '').lower().replace('.', ''))
+    text = _LEGAL_SUFFIXES.sub(' ', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+def fuzzy_score(
+    razon_social: Optional[str],
+    total: Optional[Decimal],
+    fecha_emision: Optional[date],
+    candidate: Invoice
+) -> float:
+    """
+    Similitud entre 0 y 1 de una factura candidata del mismo bloque.
+
+    Solo se ponderan los campos presentes en ambos lados.
+    """
+    scores = {}
+
+    if razon_social and candidate.razon_social:
+        scores["razon_social"] = difflib.SequenceMatcher(
+            None, _normalize_name(razon_social), _normalize_name(candidate.razon_social)
+        ).ratio()
+
+    if total is not None and candidate.total is not None:
+        diff = abs(Decimal(total) - Decimal(candidate.total))
+        base = max(abs(Decimal(candidate.total)), Decimal('1'))
+        scores["total"] = 1.0 if diff <= Decimal('0.01') else max(0.0, 1.0 - float(diff / base) * 10)
+
+    if fecha_emision and candidate.fecha_emision:
+        days = abs((fecha_emision - candidate.fecha_emision).days)
+        scores["fecha_emision"] = 1.0 if days == 0 else 0.5 if days <= 3 else 0.0
+
+    if not scores:
+        return 0.0
+    weight = sum(FUZZY_WEIGHTS[field] for field in scores)
+    return sum(FUZZY_WEIGHTS[field] * score for field, score in scores.items()) / weight
+
+
+def _candidate_dict(invoice: Invoice, confidence: float, match_type: str) -> Dict[str, Any]:
+    return {
+        "invoice_id": invoice.id,
+        "match_type": match_type,
+        "confidence": round(confidence, 3),
+        "numero_factura": invoice.numero_factura,
+        "tipo_factura": invoice.tipo_factura,
+        "cuit": invoice.cuit,
+        "razon_social": invoice.razon_social,
+        "total": float(invoice.total) if invoice.total is not None else None,
+        "fecha_emision": invoice.fecha_emision.isoformat() if invoice.fecha_emision else None,
+        "status": invoice.status,
+    }
+
+
+class DuplicateDetector:
+    """
+    Servicio para detectar facturas duplicadas.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_by_hash(self, content_hash: str, exclude_invoice_id: Optional[int] = None) -> List[Invoice]:
+        """Facturas activas con el mismo archivo (hash SHA-256)."""
+        query = select(Invoice).where(
+            Invoice.content_hash == content_hash,
+            Invoice.is_deleted == False
+        )
+        if exclude_invoice_id:
+            query = query.where(Invoice.id != exclude_invoice_id)
+        result = await self.session.execute(query.order_by(Invoice.id).limit(MAX_CANDIDATES))
+        return list(result.scalars().all())
+
+    async def find_block(
+        self,
+        cuit: str,
+        numero_factura: Any,
+        tipo_factura: Optional[str] = None,
+        exclude_invoice_id: Optional[int] = None
+    ) -> List[Invoice]:
+        """Candidatos del bloque (cuit, tipo_factura, numero_factura)."""
+        query = select(Invoice).where(
+            Invoice.cuit == cuit,
+            Invoice.numero_factura.in_(numero_variants(numero_factura)),
+            Invoice.is_deleted == False
+        )
+        if tipo_factura:
+            query = query.where(or_(Invoice.tipo_factura == tipo_factura, Invoice.tipo_factura.is_(None)))
+        if exclude_invoice_id:
+            query = query.where(Invoice.id != exclude_invoice_id)
+        result = await self.session.execute(query.order_by(Invoice.id).limit(MAX_CANDIDATES))
+        return list(result.scalars().all())
+
+    async def check(
+        self,
+        content_hash: Optional[str] = None,
+        cuit: Optional[str] = None,
+        tipo_factura: Optional[str] = None,
+        numero_factura: Optional[Any] = None,
+        razon_social: Optional[str] = None,
+        total: Optional[Any] = None,
+        fecha_emision: Optional[Any] = None,
+        exclude_invoice_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Verifica si una factura es duplicada.
+
+        Args:
+            content_hash: SHA-256 del archivo
+            cuit: CUIT del emisor (con o sin guiones)
+            tipo_factura: Tipo A, B o C
+            numero_factura: Número de comprobante
+            razon_social: Razón social
+            total: Total de la factura
+            fecha_emision: Fecha de emisión (date o ISO)
+            exclude_invoice_id: Factura a excluir (la propia, si ya existe)
+
+        Returns:
+            Diccionario con is_duplicate, confidence, match_type y similar_invoices
+        """
+        if content_hash:
+            exact = await self.find_by_hash(content_hash, exclude_invoice_id)
+            if exact:
+                return {
+                    "is_duplicate": True,
+                    "confidence": 1.0,
+                    "match_type": "hash",
+                    "similar_invoices": [_candidate_dict(invoice, 1.0, "hash") for invoice in exact]
+                }
+
+        cuit = format_cuit(cuit)
+        tipo = str(tipo_factura).upper() if tipo_factura else None
+        if tipo not in TIPOS_FACTURA:
+            tipo = None
+
+        similar = []
+        if cuit and numero_factura:
+            candidates = await self.find_block(cuit, numero_factura, tipo, exclude_invoice_id)
+            total_decimal = to_decimal(total)
+            fecha = to_date(fecha_emision)
+            for candidate in candidates:
+                # Mismo emisor y número: base alta, ajustada por el puntaje difuso
+                confidence = 0.5 + 0.5 * fuzzy_score(razon_social, total_decimal, fecha, candidate)
+                similar.append(_candidate_dict(candidate, confidence, "block"))
+            similar.sort(key=lambda item: -item["confidence"])
+
+        confidence = similar[0]["confidence"] if similar else 0.0
+        return {
+            "is_duplicate": confidence >= settings.DUPLICATE_THRESHOLD,
+            "confidence": confidence,
+            "match_type": "block" if similar else None,
+            "similar_invoices": similar
+        }
+
+    async def check_extracted(
+        self,
+        data: Dict[str, Any],
+        content_hash: Optional[str] = None,
+        exclude_invoice_id: Optional[int] = None,
+        invoice_direction: str = "recibida"
+    ) -> Dict[str, Any]:
+        """Verifica duplicados a partir de los datos extraídos de una factura."""
+        return await self.check(
+            content_hash=content_hash,
+            cuit=data.get('cuit_proveedor'),
+            tipo_factura=data.get('tipo_factura'),
+            numero_factura=data.get('numero_factura'),
+            razon_social=data.get('cliente') if invoice_direction == "emitida" else data.get('proveedor'),
+            total=data.get('total'),
+            fecha_emision=data.get('fecha_emision'),
+            exclude_invoice_id=exclude_invoice_id
+        )
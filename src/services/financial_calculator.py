@@ -4,10 +4,16 @@ Calculadora centralizada para operaciones financieras.
 Implementa la lógica fiscal argentina según explicación de Joni/Hernán.
 """
 
+import logging
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
 from typing import Dict, Any, List, Tuple
 from datetime import date
 
+from src.services.amount_parser import ERROR_MESSAGES, PARSE_EMPTY, PARSE_OK, parse_amount
+from src.services.number_formatting import format_number
+
+logger = logging.getLogger(__name__)
+
 class FinancialCalculator:
     """
     Calculadora centralizada para TODAS las operaciones financieras del sistema.
@@ -33,50 +39,20 @@ class FinancialCalculator:
         - Inglés: $1,234.56 o 1234.56
         - Número: 1234.56
         
+        Usa el parser único de `amount_parser`; los valores vacíos o
+        inválidos se devuelven como 0, y los inválidos además se registran
+        como advertencia para que no pasen desapercibidos.
+        
         Args:
             valor: Valor a normalizar (str, int, float, Decimal)
             
         Returns:
             Decimal normalizado
         """
-        if isinstance(valor, Decimal):
-            return valor
-        
-        if isinstance(valor, (int, float)):
-            return Decimal(str(valor))
-        
-        if isinstance(valor, str):
-            # Remover símbolos de moneda y espacios
-            valor = valor.replace('$', '').replace('ARS', '').replace(' ', '').strip()
-            
-            if not valor or valor == '-':
-                return Decimal('0')
-            
-            # Detectar formato: argentino ($1.234,56) o inglés ($1,234.56)
-            tiene_punto = '.' in valor
-            tiene_coma = ',' in valor
-            
-            if tiene_punto and tiene_coma:
-                # Ambos presentes: detectar cuál es el separador decimal
-                pos_punto = valor.rfind('.')
-                pos_coma = valor.rfind(',')
-                
-                if pos_coma > pos_punto:
-                    # Formato argentino: 1.234,56
-                    valor = valor.replace('.', '').replace(',', '.')
-                else:
-                    # Formato inglés: 1,234.56
-                    valor = valor.replace(',', '')
-            elif tiene_coma:
-                # Solo coma: asumir formato argentino (1.234,56 o 1234,56)
-                valor = valor.replace(',', '.')
-            
-            try:
-                return Decimal(valor)
-            except (InvalidOperation, ValueError):
-                return Decimal('0')
-        
-        return Decimal('0')
+        monto, code = parse_amount(valor)
+        if code not in (PARSE_OK, PARSE_EMPTY):
+            logger.warning(f"Monto no interpretable {valor!r}: {ERROR_MESSAGES[code]}; se usa 0")
+        return monto if monto is not None else Decimal('0')
     
     @staticmethod
     def calcular_iva(subtotal: Decimal, porcentaje: Decimal = IVA_STANDARD) -> Decimal:
@@ -257,27 +233,15 @@ class FinancialCalculator:
         Returns:
             String formateado en formato argentino
         """
-        # Separar parte entera y decimal
-        monto_abs = abs(monto)
-        partes = str(monto_abs).split('.')
-        parte_entera = partes[0]
-        parte_decimal = partes[1] if len(partes) > 1 else '00'
-        
-        # Asegurar 2 decimales
-        parte_decimal = parte_decimal.ljust(2, '0')[:2]
-        
-        # Agregar separadores de miles (punto)
-        parte_entera_formateada = ''
-        for i, digito in enumerate(reversed(parte_entera)):
-            if i > 0 and i % 3 == 0:
-                parte_entera_formateada = '.' + parte_entera_formateada
-            parte_entera_formateada = digito + parte_entera_formateada
+        # Redondear a centavos y formatear con el mini-lenguaje de formato
+        monto = Decimal(str(monto)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        parte_formateada = format_number(abs(monto), 2, '.', ',')
         
         # Construir resultado
         signo = '-' if monto < 0 else ''
         simbolo = '$' if incluir_simbolo else ''
         
-        return f"{signo}{simbolo}{parte_entera_formateada},{parte_decimal}"
+        return f"{signo}{simbolo}{parte_formateada}"
     
     @staticmethod
     def parsear_moneda_argentina(valor: str) -> Decimal:
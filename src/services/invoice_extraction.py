@@ -0,0 +1,278 @@
+"""
+Mapeo local de resultados de Azure Document Intelligence a datos de factura.
+
+No depende de los SDKs de Azure: trabaja sobre el AnalyzeResult serializado
+(`result.to_dict()` pasado por JSON), que es exactamente lo que se guarda en
+`raw_extractions`. Así el mismo código sirve para el procesamiento en línea y
+para re-derivar facturas ya analizadas sin volver a pagar el OCR.
+"""
+
+import json
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+from src.services.amount_parser import PARSE_OK, parse_amount
+
+
+# Versión del pipeline de extracción (mapeo + validación). Incrementar cuando
+# cambie el mapeo, el prompt o las reglas de coherencia, para poder
+# reprocesar selectivamente las facturas procesadas con versiones anteriores.
+PIPELINE_VERSION = 2
+
+# Mapeo de campos de Document Intelligence (modelo prebuilt-invoice)
+FIELD_MAPPING = {
+    'VendorName': 'proveedor',
+    'CustomerName': 'cliente',
+    'InvoiceId': 'numero_factura',
+    'InvoiceDate': 'fecha_emision',
+    'DueDate': 'fecha_vencimiento',
+    'InvoiceTotal': 'total',
+    'SubTotal': 'subtotal',
+    'TotalTax': 'iva',
+    'Items': 'items'
+}
+
+# Campos que se conservan en `invoices.extracted_data` (resumen liviano)
+SUMMARY_FIELDS = (
+    'tipo_factura',
+    'proveedor',
+    'cliente',
+    'cuit_proveedor',
+    'numero_factura',
+    'fecha_emision',
+    'fecha_vencimiento',
+    'subtotal',
+    'iva',
+    'total',
+    'cae',
+    'observaciones',
+    'necesita_revision',
+    'razon_revision',
+    'duplicate_of',
+)
+
+# Campos del resumen que valida o decide la IA (o el pipeline): al re-derivar
+# desde el resultado crudo se conservan si ya tienen valor
+VALIDATED_FIELDS = (
+    'proveedor',
+    'total',
+    'tipo_factura',
+    'necesita_revision',
+    'razon_revision',
+    'duplicate_of',
+)
+
+# Tipos de factura admitidos por la columna `invoices.tipo_factura`
+TIPOS_FACTURA = ('A', 'B', 'C')
+
+# Patrones fiscales argentinos (compilados una sola vez)
+CUIT_PATTERN = re.compile(r'\b\d{2}-\d{8}-\d\b')
+CAE_PATTERN = re.compile(r'CAE:\s*(\d+)', re.IGNORECASE)
+COMPROBANTE_PATTERN = re.compile(r'(?:FACTURA|COMPROBANTE)\s*[A-Z]?\s*N[O°]?\s*(\d+)')
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_cuit(value: Any) -> Optional[str]:
+    """
+    Normaliza un CUIT/CUIL a sus 11 dígitos.
+
+    Args:
+        value: CUIT con o sin guiones/espacios (ej: '20-12345678-9')
+
+    Returns:
+        '20123456789' o None si no tiene 11 dígitos
+    """
+    if value is None:
+        return None
+    digits = NON_DIGITS.sub('', str(value))
+    return digits if len(digits) == 11 else None
+
+
+def format_cuit(value: Any) -> Optional[str]:
+    """Formatea un CUIT como XX-XXXXXXXX-X (formato de `invoices.cuit`)."""
+    digits = normalize_cuit(value)
+    if not digits:
+        return None
+    return f"{digits[:2]}-{digits[2:10]}-{digits[10]}"
+
+
+def to_jsonable(raw: Any) -> Dict[str, Any]:
+    """
+    Normaliza un AnalyzeResult (ya convertido con `to_dict()`) a tipos JSON.
+
+    Las fechas y otros objetos del SDK se convierten a string, igual que al
+    guardarse en `raw_extractions`, para que el mapeo en línea y la
+    re-derivación produzcan exactamente el mismo resultado.
+    """
+    return json.loads(json.dumps(raw, default=str, ensure_ascii=False))
+
+
+def field_value(field: Any) -> Any:
+    """
+    Obtiene el valor de un DocumentField serializado.
+
+    Args:
+        field: Diccionario con 'value_type' y 'value' (o un valor simple)
+
+    Returns:
+        Valor listo para JSON (monedas como monto, listas y objetos anidados resueltos)
+    """
+    if not isinstance(field, dict) or 'value' not in field:
+        return field
+
+    value = field.get('value')
+    value_type = field.get('value_type')
+
+    if value_type == 'currency' and isinstance(value, dict):
+        return value.get('amount')
+    if value_type == 'list' and isinstance(value, list):
+        return [field_value(item) for item in value]
+    if value_type == 'dictionary' and isinstance(value, dict):
+        return {name.lower(): field_value(item) for name, item in value.items()}
+    return value
+
+
+def extract_fiscal_info(extracted_data: Dict[str, Any], content: Optional[str]) -> Dict[str, Any]:
+    """
+    Extrae información fiscal específica (CUIT, tipo de comprobante, CAE).
+
+    Args:
+        extracted_data: Datos ya mapeados desde los campos del documento
+        content: Texto completo reconocido por el OCR
+
+    Returns:
+        Los mismos datos enriquecidos con la información fiscal encontrada
+    """
+    if not content:
+        return extracted_data
+
+    cuit_match = CUIT_PATTERN.search(content)
+    if cuit_match:
+        extracted_data['cuit_proveedor'] = cuit_match.group()
+
+    # Detectar tipo de comprobante
+    content_upper = content.upper()
+    if 'FACTURA A' in content_upper:
+        extracted_data['tipo_factura'] = 'A'
+    elif 'FACTURA B' in content_upper:
+        extracted_data['tipo_factura'] = 'B'
+    elif 'FACTURA C' in content_upper:
+        extracted_data['tipo_factura'] = 'C'
+    elif 'COMPROBANTE' in content_upper:
+        extracted_data['tipo_factura'] = 'Otro'
+    else:
+        extracted_data['tipo_factura'] = 'Desconocido'
+
+    cae_match = CAE_PATTERN.search(content)
+    if cae_match:
+        extracted_data['cae'] = cae_match.group(1)
+
+    # Número de comprobante más específico (solo si el modelo no lo encontró)
+    comprobante_match = COMPROBANTE_PATTERN.search(content_upper)
+    if comprobante_match and 'numero_factura' not in extracted_data:
+        extracted_data['numero_factura'] = comprobante_match.group(1)
+
+    return extracted_data
+
+
+def map_analyze_result(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Mapea un AnalyzeResult serializado a los campos de factura del sistema.
+
+    Args:
+        raw: AnalyzeResult en formato JSON (ver `to_jsonable`)
+
+    Returns:
+        Diccionario con los datos extraídos de la factura
+    """
+    extracted_data: Dict[str, Any] = {}
+
+    for document in raw.get('documents') or []:
+        for name, field in (document.get('fields') or {}).items():
+            key = FIELD_MAPPING.get(name, name.lower())
+            extracted_data[key] = field_value(field)
+
+    return extract_fiscal_info(extracted_data, raw.get('content'))
+
+
+def build_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce los datos extraídos al resumen normalizado que vive en `invoices`.
+
+    El resultado crudo completo queda en `raw_extractions`; la fila caliente
+    solo guarda los campos que consumen la API y el frontend.
+    """
+    return {key: data[key] for key in SUMMARY_FIELDS if data.get(key) is not None}
+
+
+def to_decimal(value: Any) -> Optional[Decimal]:
+    """Convierte un monto extraído a Decimal con 2 decimales (None si no es válido)."""
+    amount, code = parse_amount(value)
+    if code != PARSE_OK:
+        return None
+    try:
+        return amount.quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def to_date(value: Any) -> Optional[date]:
+    """Convierte una fecha extraída (date o ISO) a date (None si no es válida)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+# Columnas de `invoices` que completa `apply_summary`
+SUMMARY_COLUMNS = (
+    'cuit',
+    'razon_social',
+    'numero_factura',
+    'tipo_factura',
+    'fecha_emision',
+    'fecha_vencimiento',
+    'subtotal',
+    'iva_monto',
+    'total',
+)
+
+
+def apply_summary(invoice: Any, summary: Dict[str, Any]) -> None:
+    """
+    Copia los datos del resumen a las columnas fiscales de la factura.
+
+    Solo completa columnas con valores válidos (CUIT de 11 dígitos, tipo
+    A/B/C, fechas y montos parseables); las columnas indexadas son las que usan
+    la detección de duplicados y la vinculación con partners.
+
+    Args:
+        invoice: Instancia de Invoice a actualizar
+        summary: Resumen generado por `build_summary`
+    """
+    tipo = str(summary.get('tipo_factura') or '').upper().replace('TIPO', '').strip()
+    is_emitida = getattr(invoice, 'invoice_direction', 'recibida') == 'emitida'
+    razon_social = summary.get('cliente') if is_emitida else summary.get('proveedor')
+
+    values = {
+        'cuit': format_cuit(summary.get('cuit_proveedor')),
+        'razon_social': str(razon_social)[:255] if razon_social else None,
+        'numero_factura': str(summary['numero_factura'])[:50] if summary.get('numero_factura') else None,
+        'tipo_factura': tipo if tipo in TIPOS_FACTURA else None,
+        'fecha_emision': to_date(summary.get('fecha_emision')),
+        'fecha_vencimiento': to_date(summary.get('fecha_vencimiento')),
+        'subtotal': to_decimal(summary.get('subtotal')),
+        'iva_monto': to_decimal(summary.get('iva')),
+        'total': to_decimal(summary.get('total')),
+    }
+    for column, value in values.items():
+        if value is not None:
+            setattr(invoice, column, value)
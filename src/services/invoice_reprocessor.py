@@ -0,0 +1,325 @@
+"""
+Reprocesamiento masivo en segundo plano de facturas con IA.
+
+Permite volver a ejecutar extracción + validación sobre facturas que
+quedaron en `needs_review` o `error` (por ejemplo tras una caída de Azure o
+un cambio de prompt) sin borrarlas ni volver a subirlas. Los trabajos pasan
+por la cola de IA con prioridad baja para no demorar las subidas nuevas.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import AsyncSessionLocal
+from src.models.invoice import Invoice
+from src.services.invoice_extraction import (
+    PIPELINE_VERSION,
+    SUMMARY_FIELDS,
+    apply_summary,
+    build_summary,
+    map_analyze_result,
+)
+from src.services.partner_resolver import PartnerResolver
+from src.services.processing_queue import PRIORITY_REPROCESS, ai_slot
+from src.services.raw_extraction_store import RawExtractionStore
+
+logger = logging.getLogger(__name__)
+
+# Estados que se reprocesan por defecto
+DEFAULT_STATUSES = ("needs_review", "error")
+# Cantidad máxima de diffs por factura guardados en memoria por trabajo
+MAX_DIFFS_PER_JOB = 500
+# Cantidad de trabajos recientes que se conservan para consulta
+MAX_JOBS_KEPT = 50
+
+
+class ReprocessJob:
+    """Estado y progreso de un trabajo de reprocesamiento."""
+
+    def __init__(self, filters: Dict[str, Any], requested_by: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.filters = filters
+        self.requested_by = requested_by
+        self.status = "queued"  # queued, running, completed, failed
+        self.total = 0
+        self.processed = 0
+        self.changed = 0
+        self.errors = 0
+        self.skipped = 0
+        self.status_changes: Dict[str, int] = {}
+        self.field_changes: Dict[str, int] = {}
+        self.diffs: List[Dict[str, Any]] = []
+        self.error_message: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def record_diff(self, invoice_id: int, changes: Dict[str, List[Any]]) -> None:
+        """Registra los campos modificados de una factura."""
+        self.changed += 1
+        for field in changes:
+            self.field_changes[field] = self.field_changes.get(field, 0) + 1
+        if "status" in changes:
+            transition = f"{changes['status'][0]}->{changes['status'][1]}"
+            self.status_changes[transition] = self.status_changes.get(transition, 0) + 1
+        if len(self.diffs) < MAX_DIFFS_PER_JOB:
+            self.diffs.append({"invoice_id": invoice_id, "changes": changes})
+
+    def to_dict(self, include_diffs: bool = True) -> Dict[str, Any]:
+        """Representación serializable del trabajo."""
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "filters": self.filters,
+            "requested_by": self.requested_by,
+            "total": self.total,
+            "processed": self.processed,
+            "progress": round(self.processed / self.total * 100, 1) if self.total else 0.0,
+            "changed": self.changed,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "status_changes": self.status_changes,
+            "field_changes": self.field_changes,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_diffs:
+            data["diffs"] = self.diffs
+        return data
+
+
+_jobs: "OrderedDict[str, ReprocessJob]" = OrderedDict()
+
+
+def get_job(job_id: str) -> Optional[ReprocessJob]:
+    """Obtiene un trabajo de reprocesamiento por ID."""
+    return _jobs.get(job_id)
+
+
+def _register_job(job: ReprocessJob) -> None:
+    _jobs[job.id] = job
+    while len(_jobs) > MAX_JOBS_KEPT:
+        oldest_id, oldest = next(iter(_jobs.items()))
+        if oldest.status in ("queued", "running"):
+            break
+        _jobs.pop(oldest_id)
+
+
+def diff_invoice(old_summary: Dict[str, Any], old_status: str,
+                 new_summary: Dict[str, Any], new_status: str) -> Dict[str, List[Any]]:
+    """
+    Compara el resumen y el estado antes y después del reprocesamiento.
+
+    Returns:
+        Diccionario campo -> [valor anterior, valor nuevo] solo con los campos que cambiaron
+    """
+    changes = {}
+    for field in SUMMARY_FIELDS:
+        before = old_summary.get(field)
+        after = new_summary.get(field)
+        if before != after:
+            changes[field] = [before, after]
+    if old_status != new_status:
+        changes["status"] = [old_status, new_status]
+    return changes
+
+
+class InvoiceReprocessor:
+    """
+    Servicio para seleccionar y reprocesar facturas con IA.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def select_invoice_ids(
+        self,
+        statuses: Optional[List[str]] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        owner: Optional[str] = None,
+        pipeline_version_below: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """
+        Selecciona las facturas a reprocesar.
+
+        Args:
+            statuses: Estados a incluir (por defecto needs_review y error)
+            date_from: Fecha de subida desde (inclusive)
+            date_to: Fecha de subida hasta (inclusive)
+            owner: Socio responsable
+            pipeline_version_below: Solo facturas procesadas con una versión menor (o sin versión)
+            limit: Cantidad máxima de facturas
+
+        Returns:
+            IDs de las facturas seleccionadas, ordenados
+        """
+        query = select(Invoice.id).where(
+            Invoice.is_deleted == False,
+            Invoice.blob_url.is_not(None),
+            Invoice.status.in_(statuses or DEFAULT_STATUSES)
+        )
+        if date_from:
+            query = query.where(Invoice.created_at >= datetime.combine(date_from, datetime.min.time()))
+        if date_to:
+            query = query.where(Invoice.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+        if owner:
+            query = query.where(Invoice.owner == owner)
+        if pipeline_version_below is not None:
+            query = query.where(or_(
+                Invoice.pipeline_version.is_(None),
+                Invoice.pipeline_version < pipeline_version_below
+            ))
+        query = query.order_by(Invoice.id)
+        if limit:
+            query = query.limit(limit)
+
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def reprocess_invoice(self, invoice: Invoice, dry_run: bool = False) -> Optional[Dict[str, List[Any]]]:
+        """
+        Vuelve a ejecutar extracción y validación sobre una factura.
+
+        Si existe el resultado crudo de Document Intelligence (por hash de
+        contenido) se reutiliza; solo se repite la validación con IA.
+
+        En `dry_run` no se llama a Azure ni a OpenAI: el diff se calcula con el
+        mapeo local del resultado crudo guardado (sin la validación con IA) y
+        solo sobre los campos que ese mapeo produce.
+
+        Args:
+            invoice: Factura a reprocesar
+            dry_run: Si es True calcula el diff sin guardar cambios
+
+        Returns:
+            Diff de campos modificados, o None en `dry_run` si la factura no
+            tiene resultado crudo guardado
+
+        Raises:
+            RuntimeError: Si el procesamiento con IA termina con estado `error`
+        """
+        old_summary = build_summary(invoice.extracted_data or {})
+        old_status = invoice.status
+
+        if dry_run:
+            raw = await RawExtractionStore(self.session).get(invoice.content_hash) if invoice.content_hash else None
+            if raw is None:
+                return None
+            new_summary = build_summary(map_analyze_result(raw))
+            changes = diff_invoice(old_summary, old_status, new_summary, old_status)
+            return {field: change for field, change in changes.items() if field in new_summary}
+
+        # Import diferido: el agente carga los SDKs de Azure y OpenAI
+        from src.agents.enhanced_invoice_processing_agent import EnhancedInvoiceProcessingAgent
+
+        agent = EnhancedInvoiceProcessingAgent(session=self.session)
+        async with ai_slot(PRIORITY_REPROCESS):
+            result = await agent.process_invoice(
+                blob_url=invoice.blob_url,
+                user_id=invoice.user_id,
+                invoice_id=invoice.id,
+                content_hash=invoice.content_hash,
+                invoice_direction=invoice.invoice_direction,
+                # La factura ya existe: no copiar los datos de otra con el mismo archivo
+                reuse_exact_duplicate=False
+            )
+
+        if result.get("status") == "error":
+            # Se conservan los datos anteriores de la factura
+            raise RuntimeError(result.get("error_message") or "Error en el procesamiento con IA")
+
+        new_summary = build_summary(result.get("extracted_data") or {})
+        new_status = result.get("status", "completed")
+        changes = diff_invoice(old_summary, old_status, new_summary, new_status)
+
+        invoice.extracted_data = new_summary
+        invoice.status = new_status
+        apply_summary(invoice, new_summary)
+        await PartnerResolver(self.session).link_invoice(invoice)
+        invoice.pipeline_version = PIPELINE_VERSION
+        await self.session.commit()
+
+        return changes
+
+
+async def run_reprocess_job(job: ReprocessJob, invoice_ids: List[int], dry_run: bool = False) -> ReprocessJob:
+    """
+    Ejecuta un trabajo de reprocesamiento con su propia sesión de base de datos.
+
+    Args:
+        job: Trabajo a ejecutar (se actualiza su progreso en memoria)
+        invoice_ids: Facturas a reprocesar
+        dry_run: Si es True no se guardan cambios ni se llama a la IA
+
+    Returns:
+        El mismo trabajo, finalizado
+    """
+    job.status = "running"
+    job.total = len(invoice_ids)
+    job.started_at = datetime.utcnow()
+
+    try:
+        async with AsyncSessionLocal() as session:
+            reprocessor = InvoiceReprocessor(session)
+            for invoice_id in invoice_ids:
+                invoice = await session.get(Invoice, invoice_id)
+                try:
+                    if invoice is not None and not invoice.is_deleted:
+                        changes = await reprocessor.reprocess_invoice(invoice, dry_run=dry_run)
+                        if changes is None:
+                            job.skipped += 1
+                        elif changes:
+                            job.record_diff(invoice_id, changes)
+                except Exception as e:
+                    job.errors += 1
+                    logger.error(f"Error reprocesando factura {invoice_id}: {str(e)}")
+                    await session.rollback()
+                finally:
+                    job.processed += 1
+                    # No acumular facturas en el identity map durante trabajos largos
+                    session.expunge_all()
+
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.error_message = str(e)
+        logger.error(f"Error en trabajo de reprocesamiento {job.id}: {str(e)}")
+    finally:
+        job.finished_at = datetime.utcnow()
+
+    logger.info(
+        f"Reprocesamiento {job.id}: {job.processed}/{job.total} procesadas, "
+        f"{job.changed} con cambios, {job.errors} errores, {job.skipped} omitidas"
+    )
+    return job
+
+
+def start_reprocess_job(
+    invoice_ids: List[int],
+    filters: Dict[str, Any],
+    requested_by: Optional[int] = None,
+    dry_run: bool = False
+) -> ReprocessJob:
+    """
+    Registra y lanza un trabajo de reprocesamiento en segundo plano.
+
+    Returns:
+        Trabajo creado (consultable con `get_job`)
+    """
+    job = ReprocessJob(filters={**filters, "dry_run": dry_run}, requested_by=requested_by)
+    job.total = len(invoice_ids)
+    _register_job(job)
+    job.task = asyncio.create_task(run_reprocess_job(job, invoice_ids, dry_run=dry_run))
+    return job
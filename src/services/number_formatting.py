@@ -0,0 +1,136 @@
+"""
+Núcleo de formateo de números y montos.
+
+Usa el mini-lenguaje de formato de Python (`format(valor, ",.2f")`, que
+agrupa miles en C) y después cambia los separadores, en lugar de armar la
+cadena dígito por dígito:
+
+    format(1234567.891, ",.2f")  -> "1,234,567.89"
+    intercambio "," <-> "."      -> "1.234.567,89"
+
+Para lotes, los valores se formatean con `map`, se unen en un único string
+y se traducen con un solo `str.translate`, así que el cambio de
+separadores se paga una vez por lote y no una vez por valor.
+"""
+
+from functools import lru_cache
+from typing import Callable, Iterable, List
+
+# Separadores que produce el mini-lenguaje de formato
+_DEFAULT_THOUSANDS = ","
+_DEFAULT_DECIMAL = "."
+
+
+@lru_cache(maxsize=64)
+def _translation(thousands_separator: str, decimal_separator: str) -> dict:
+    # Intercambio simultáneo: "," -> miles y "." -> decimal
+    return str.maketrans({_DEFAULT_THOUSANDS: thousands_separator, _DEFAULT_DECIMAL: decimal_separator})
+
+
+def _needs_translation(thousands_separator: str, decimal_separator: str) -> bool:
+    return (thousands_separator, decimal_separator) != (_DEFAULT_THOUSANDS, _DEFAULT_DECIMAL)
+
+
+@lru_cache(maxsize=64)
+def make_number_formatter(
+    decimal_places: int = 2,
+    thousands_separator: str = ".",
+    decimal_separator: str = ","
+) -> Callable[[float], str]:
+    """
+    Crea (y cachea) una función que formatea un número con los separadores dados.
+
+    Args:
+        decimal_places: Cantidad de decimales
+        thousands_separator: Separador de miles (ej: ".")
+        decimal_separator: Separador decimal (ej: ",")
+
+    Returns:
+        Función valor -> string formateado
+    """
+    template = "{:,.%df}" % decimal_places
+    if not _needs_translation(thousands_separator, decimal_separator):
+        return template.format
+    # Para strings cortos tres replace (en C) son más rápidos que translate
+    return lambda value: (
+        template.format(value)
+        .replace(_DEFAULT_THOUSANDS, "\0")
+        .replace(_DEFAULT_DECIMAL, decimal_separator)
+        .replace("\0", thousands_separator)
+    )
+
+
+def format_number(
+    value: float,
+    decimal_places: int = 2,
+    thousands_separator: str = ".",
+    decimal_separator: str = ","
+) -> str:
+    """
+    Formatea un número con separadores de miles y decimales.
+
+    Args:
+        value: Número a formatear (float, int o Decimal)
+        decimal_places: Cantidad de decimales
+        thousands_separator: Separador de miles
+        decimal_separator: Separador decimal
+
+    Returns:
+        Número formateado (ej: "1.234.567,89")
+    """
+    return make_number_formatter(decimal_places, thousands_separator, decimal_separator)(value)
+
+
+def format_numbers(
+    values: Iterable[float],
+    decimal_places: int = 2,
+    thousands_separator: str = ".",
+    decimal_separator: str = ","
+) -> List[str]:
+    """
+    Formatea un lote de números (una sola traducción de separadores por lote).
+
+    Args:
+        values: Números a formatear
+        decimal_places: Cantidad de decimales
+        thousands_separator: Separador de miles
+        decimal_separator: Separador decimal
+
+    Returns:
+        Lista de números formateados, en el mismo orden
+    """
+    formatted = list(map(("{:,.%df}" % decimal_places).format, values))
+    if not formatted or not _needs_translation(thousands_separator, decimal_separator):
+        return formatted
+    # "\n" no aparece en la salida del formato numérico
+    return "\n".join(formatted).translate(_translation(thousands_separator, decimal_separator)).split("\n")
+
+
+def format_currencies(
+    values: Iterable[float],
+    symbol: str = "$",
+    position: str = "before",
+    decimal_places: int = 2,
+    thousands_separator: str = ".",
+    decimal_separator: str = ","
+) -> List[str]:
+    """
+    Formatea un lote de montos con símbolo de moneda.
+
+    Args:
+        values: Montos a formatear
+        symbol: Símbolo de moneda
+        position: "before" o "after"
+        decimal_places: Cantidad de decimales
+        thousands_separator: Separador de miles
+        decimal_separator: Separador decimal
+
+    Returns:
+        Lista de montos formateados, en el mismo orden
+    """
+    numbers = format_numbers(values, decimal_places, thousands_separator, decimal_separator)
+    if position == "before":
+        prefix = f"{symbol} "
+        return [prefix + number for number in numbers]
+    suffix = f" {symbol}"
+    return [number + suffix for number in numbers]
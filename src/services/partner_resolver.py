@@ -0,0 +1,351 @@
+"""
+Resolución automática CUIT -> Partner.
+
+Mantiene en memoria un índice CUIT (11 dígitos) -> partner_id que se
+refresca periódicamente, de modo que vincular una factura con su partner
+durante la ingesta no cueste una consulta por factura. Opcionalmente crea
+partners "esqueleto" para CUITs desconocidos.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.models.invoice import Invoice
+from src.models.partner import Partner
+from src.services.invoice_extraction import format_cuit, normalize_cuit
+
+logger = logging.getLogger(__name__)
+
+# Cantidad de trabajos de vinculación recientes que se conservan para consulta
+MAX_BACKFILL_JOBS_KEPT = 20
+
+
+class PartnerIndex:
+    """
+    Índice en memoria CUIT normalizado -> partner_id, con refresco por TTL.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._index: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Recarga el índice completo (solo columnas id y cuit)."""
+        result = await session.execute(
+            select(Partner.id, Partner.cuit).where(Partner.cuit.is_not(None))
+        )
+        index = {}
+        for partner_id, cuit in result.all():
+            digits = normalize_cuit(cuit)
+            if digits:
+                index[digits] = partner_id
+        self._index = index
+        self._loaded_at = time.monotonic()
+        logger.info(f"Índice CUIT->partner cargado: {len(index)} partners")
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        """Refresca el índice si venció el TTL."""
+        if self.is_stale:
+            async with self._lock:
+                if self.is_stale:
+                    await self.refresh(session)
+
+    async def get(self, session: AsyncSession, cuit: Any) -> Optional[int]:
+        """Busca el partner_id de un CUIT (con o sin guiones)."""
+        digits = normalize_cuit(cuit)
+        if not digits:
+            return None
+        await self.ensure_fresh(session)
+        return self._index.get(digits)
+
+    def lookup(self, cuit: Any) -> Optional[int]:
+        """Busca en el índice cargado, sin refrescar."""
+        return self._index.get(normalize_cuit(cuit) or "")
+
+    def put(self, cuit: Any, partner_id: int) -> None:
+        """Agrega o actualiza una entrada (ej: al crear/editar un partner)."""
+        digits = normalize_cuit(cuit)
+        if digits:
+            self._index[digits] = partner_id
+
+    def invalidate(self) -> None:
+        """Fuerza la recarga en la próxima consulta."""
+        self._loaded_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._index),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+        }
+
+
+# Índice compartido por todo el proceso
+partner_index = PartnerIndex(settings.PARTNER_INDEX_TTL_SECONDS)
+_create_lock = asyncio.Lock()
+
+
+class PartnerResolver:
+    """
+    Servicio para vincular facturas con partners por CUIT.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def resolve(
+        self,
+        cuit: Any,
+        razon_social: Optional[str] = None,
+        business_type: Optional[str] = None,
+        auto_create: Optional[bool] = None
+    ) -> Optional[int]:
+        """
+        Obtiene el partner_id para un CUIT.
+
+        Args:
+            cuit: CUIT con o sin guiones
+            razon_social: Nombre a usar si se crea un partner nuevo
+            business_type: 'proveedor' o 'cliente' para el partner nuevo
+            auto_create: Crear partner esqueleto si no existe (por defecto PARTNER_AUTO_CREATE)
+
+        Returns:
+            ID del partner o None si el CUIT no es válido o no existe (y no se crea)
+        """
+        partner_id = await partner_index.get(self.session, cuit)
+        if partner_id is not None:
+            return partner_id
+
+        if auto_create is None:
+            auto_create = settings.PARTNER_AUTO_CREATE
+        if not auto_create or not normalize_cuit(cuit):
+            return None
+
+        return await self._create_skeleton(cuit, razon_social, business_type)
+
+    async def _create_skeleton(self, cuit: Any, razon_social: Optional[str], business_type: Optional[str]) -> Optional[int]:
+        """Crea un partner mínimo para un CUIT desconocido."""
+        formatted = format_cuit(cuit)
+        base_name = (razon_social or "").strip()[:200] or f"CUIT {formatted}"
+
+        async with _create_lock:
+            # Otro request pudo crearlo mientras se esperaba el lock
+            partner_id = partner_index.lookup(cuit)
+            if partner_id is not None:
+                return partner_id
+
+            for name in (base_name, f"{base_name} ({formatted})"):
+                partner = Partner(
+                    name=name,
+                    cuit=formatted,
+                    business_type=business_type,
+                    is_active=True,
+                    notes="Creado automáticamente desde la ingesta de facturas"
+                )
+                try:
+                    async with self.session.begin_nested():
+                        self.session.add(partner)
+                        await self.session.flush()
+                except IntegrityError:
+                    # Nombre o CUIT ya existentes: puede que el CUIT esté con otro formato
+                    await partner_index.refresh(self.session)
+                    partner_id = partner_index.lookup(cuit)
+                    if partner_id is not None:
+                        return partner_id
+                    continue
+
+                partner_index.put(cuit, partner.id)
+                logger.info(f"Partner esqueleto creado para CUIT {formatted}: {partner.id}")
+                return partner.id
+
+        logger.warning(f"No se pudo crear partner para CUIT {formatted}")
+        return None
+
+    async def link_invoice(self, invoice: Invoice, auto_create: Optional[bool] = None) -> Optional[int]:
+        """
+        Completa `invoice.partner_id` a partir de su CUIT (no hace commit).
+
+        Returns:
+            partner_id asignado (o el que ya tenía)
+        """
+        if invoice.partner_id or not invoice.cuit:
+            return invoice.partner_id
+        partner_id = await self.resolve(
+            invoice.cuit,
+            invoice.razon_social,
+            business_type="cliente" if invoice.invoice_direction == "emitida" else "proveedor",
+            auto_create=auto_create
+        )
+        if partner_id is not None:
+            invoice.partner_id = partner_id
+        return partner_id
+
+    async def backfill_invoices(
+        self,
+        batch_size: int = 500,
+        auto_create: Optional[bool] = None,
+        dry_run: bool = False,
+        stats: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
+        """
+        Vincula en lotes las facturas existentes sin partner.
+
+        Args:
+            batch_size: Cantidad de facturas por lote
+            auto_create: Crear partners esqueleto para CUITs desconocidos
+            dry_run: Si es True solo cuenta sin guardar cambios
+            stats: Contadores a actualizar durante el recorrido (progreso de un trabajo)
+
+        Returns:
+            Estadísticas: facturas revisadas, vinculadas y sin partner
+        """
+        if stats is None:
+            stats = {}
+        stats.update({"processed": 0, "linked": 0, "unresolved": 0})
+        await partner_index.refresh(self.session)
+        last_id = 0
+
+        while True:
+            result = await self.session.execute(
+                select(Invoice)
+                .where(
+                    Invoice.id > last_id,
+                    Invoice.partner_id.is_(None),
+                    Invoice.cuit.is_not(None)
+                )
+                .order_by(Invoice.id)
+                .limit(batch_size)
+            )
+            invoices: List[Invoice] = result.scalars().all()
+            if not invoices:
+                break
+            last_id = invoices[-1].id
+
+            for invoice in invoices:
+                stats["processed"] += 1
+                if dry_run:
+                    partner_id = await partner_index.get(self.session, invoice.cuit)
+                else:
+                    partner_id = await self.link_invoice(invoice, auto_create=auto_create)
+                if partner_id is None:
+                    stats["unresolved"] += 1
+                else:
+                    stats["linked"] += 1
+
+            if dry_run:
+                await self.session.rollback()
+            else:
+                await self.session.commit()
+            self.session.expunge_all()
+            logger.info(f"Vinculación de partners: {stats['processed']} revisadas, {stats['linked']} vinculadas")
+
+        return stats
+
+
+class BackfillJob:
+    """Estado y progreso de un trabajo de vinculación de facturas."""
+
+    def __init__(self, options: Dict[str, Any], requested_by: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.options = options
+        self.requested_by = requested_by
+        self.status = "queued"  # queued, running, completed, failed
+        self.stats: Dict[str, int] = {"processed": 0, "linked": 0, "unresolved": 0}
+        self.error_message: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable del trabajo."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "options": self.options,
+            "requested_by": self.requested_by,
+            "stats": self.stats,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+_backfill_jobs: "OrderedDict[str, BackfillJob]" = OrderedDict()
+
+
+def get_backfill_job(job_id: str) -> Optional[BackfillJob]:
+    """Obtiene un trabajo de vinculación por ID."""
+    return _backfill_jobs.get(job_id)
+
+
+def _register_backfill_job(job: BackfillJob) -> None:
+    _backfill_jobs[job.id] = job
+    while len(_backfill_jobs) > MAX_BACKFILL_JOBS_KEPT:
+        oldest_id, oldest = next(iter(_backfill_jobs.items()))
+        if oldest.status in ("queued", "running"):
+            break
+        _backfill_jobs.pop(oldest_id)
+
+
+async def run_backfill_job(job: BackfillJob) -> BackfillJob:
+    """
+    Ejecuta un trabajo de vinculación con su propia sesión de base de datos.
+
+    Args:
+        job: Trabajo a ejecutar (sus opciones son los argumentos de `backfill_invoices`)
+
+    Returns:
+        El mismo trabajo, finalizado
+    """
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    try:
+        async with AsyncSessionLocal() as session:
+            await PartnerResolver(session).backfill_invoices(**job.options, stats=job.stats)
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.error_message = str(e)
+        logger.error(f"Error en trabajo de vinculación {job.id}: {str(e)}")
+    finally:
+        job.finished_at = datetime.utcnow()
+    return job
+
+
+def start_backfill_job(
+    batch_size: int = 500,
+    auto_create: Optional[bool] = None,
+    dry_run: bool = False,
+    requested_by: Optional[int] = None
+) -> BackfillJob:
+    """
+    Registra y lanza la vinculación de facturas en segundo plano.
+
+    Returns:
+        Trabajo creado (consultable con `get_backfill_job`)
+    """
+    job = BackfillJob(
+        options={"batch_size": batch_size, "auto_create": auto_create, "dry_run": dry_run},
+        requested_by=requested_by
+    )
+    _register_backfill_job(job)
+    job.task = asyncio.create_task(run_backfill_job(job))
+    return job
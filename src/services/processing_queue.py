@@ -0,0 +1,108 @@
+"""
+Cola con prioridades para las llamadas a los servicios de IA (Document
+Intelligence + Azure OpenAI).
+
+Todas las extracciones pasan por un número fijo de "slots". Las subidas
+nuevas tienen prioridad sobre el reprocesamiento masivo, y el
+reprocesamiento además tiene su propio límite de concurrencia, de modo que
+nunca ocupa todos los slots y no deja sin servicio a los usuarios.
+"""
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
+
+from src.core.config import settings
+
+# Prioridades (menor número = se atiende antes)
+PRIORITY_UPLOAD = 0
+PRIORITY_REPROCESS = 10
+
+
+class PrioritySlots:
+    """
+    Semáforo asíncrono que entrega los slots libres por orden de prioridad
+    (y por orden de llegada dentro de la misma prioridad).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    def waiting(self, priority: int = None) -> int:
+        """Cantidad de tareas esperando un slot (opcionalmente de una prioridad)."""
+        return sum(
+            1 for prio, _, future in self._waiters
+            if not future.done() and (priority is None or prio == priority)
+        )
+
+    async def acquire(self, priority: int) -> None:
+        """Espera un slot libre con la prioridad indicada."""
+        if self.in_use < self.limit and not self.waiting():
+            self.in_use += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Si el slot ya había sido asignado, devolverlo
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Libera un slot y despierta a la próxima tarea en espera."""
+        self.in_use -= 1
+        while self._waiters and self.in_use < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.in_use += 1
+            future.set_result(None)
+
+
+# Slots compartidos por todo el proceso
+ai_slots = PrioritySlots(settings.AI_MAX_CONCURRENCY)
+# Límite adicional para el reprocesamiento masivo
+_reprocess_limit = asyncio.Semaphore(settings.REPROCESS_MAX_CONCURRENCY)
+
+
+@asynccontextmanager
+async def ai_slot(priority: int = PRIORITY_UPLOAD):
+    """
+    Context manager para ejecutar una extracción con IA dentro de un slot.
+
+    Args:
+        priority: PRIORITY_UPLOAD para subidas, PRIORITY_REPROCESS para reprocesos
+    """
+    if priority >= PRIORITY_REPROCESS:
+        async with _reprocess_limit:
+            await ai_slots.acquire(priority)
+            try:
+                yield
+            finally:
+                ai_slots.release()
+        # Pausa entre reprocesos para dejar aire a las subidas
+        await asyncio.sleep(settings.REPROCESS_DELAY_SECONDS)
+    else:
+        await ai_slots.acquire(priority)
+        try:
+            yield
+        finally:
+            ai_slots.release()
+
+
+def stats() -> Dict[str, int]:
+    """Estado actual de la cola de IA."""
+    return {
+        "limit": ai_slots.limit,
+        "in_use": ai_slots.in_use,
+        "waiting_uploads": ai_slots.waiting(PRIORITY_UPLOAD),
+        "waiting_reprocess": ai_slots.waiting(PRIORITY_REPROCESS),
+    }
@@ -0,0 +1,199 @@
+"""
+Almacenamiento comprimido de resultados crudos de Document Intelligence
+y re-derivación local de facturas.
+"""
+
+import gzip
+import json
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.models.invoice import Invoice
+from src.models.raw_extraction import RawExtraction
+from src.services.invoice_extraction import (
+    SUMMARY_COLUMNS,
+    VALIDATED_FIELDS,
+    apply_summary,
+    build_summary,
+    map_analyze_result,
+)
+
+try:  # zstd es opcional: si no está instalado se usa gzip
+    import zstandard
+except ImportError:  # pragma: no cover - depende del entorno
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+def compress_payload(data: bytes, codec: str) -> bytes:
+    """Comprime bytes con el codec indicado ('zstd' o 'gzip')."""
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress_payload(data: bytes, codec: str) -> bytes:
+    """Descomprime bytes guardados con el codec indicado."""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("El payload está comprimido con zstd pero 'zstandard' no está instalado")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def preferred_codec() -> str:
+    """Codec a utilizar para nuevos payloads según configuración y disponibilidad."""
+    if settings.RAW_EXTRACTION_CODEC == "zstd" and zstandard is not None:
+        return "zstd"
+    return "gzip"
+
+
+class RawExtractionStore:
+    """
+    Servicio para guardar y recuperar AnalyzeResults crudos por hash de contenido.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el resultado crudo de un documento ya analizado.
+
+        Args:
+            content_hash: SHA-256 del archivo
+
+        Returns:
+            AnalyzeResult en formato JSON o None si nunca se analizó
+        """
+        result = await self.session.execute(
+            select(RawExtraction).where(RawExtraction.content_hash == content_hash)
+        )
+        raw_extraction = result.scalar_one_or_none()
+        if not raw_extraction:
+            return None
+        return self.decode(raw_extraction)
+
+    async def save(self, content_hash: str, raw: Dict[str, Any], model_id: str = "prebuilt-invoice") -> None:
+        """
+        Guarda el resultado crudo comprimido. Si el hash ya existe no hace nada.
+
+        Solo hace flush: el commit queda a cargo de quien maneja la sesión,
+        junto con el resto de los cambios de la factura.
+
+        Args:
+            content_hash: SHA-256 del archivo
+            raw: AnalyzeResult en formato JSON
+            model_id: Modelo de Document Intelligence utilizado
+        """
+        encoded = json.dumps(raw, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        codec = preferred_codec()
+        payload = compress_payload(encoded, codec)
+
+        try:
+            # Savepoint: un hash duplicado no invalida la transacción del llamador
+            async with self.session.begin_nested():
+                self.session.add(RawExtraction(
+                    content_hash=content_hash,
+                    model_id=model_id,
+                    codec=codec,
+                    payload=payload,
+                    raw_size=len(encoded),
+                    compressed_size=len(payload)
+                ))
+                await self.session.flush()
+        except IntegrityError:
+            # Otra subida del mismo archivo ya lo guardó
+            logger.debug(f"Resultado crudo {content_hash[:12]} ya existente")
+
+    @staticmethod
+    def decode(raw_extraction: RawExtraction) -> Dict[str, Any]:
+        """Descomprime y decodifica el payload de un RawExtraction."""
+        data = decompress_payload(raw_extraction.payload, raw_extraction.codec)
+        return json.loads(data.decode("utf-8"))
+
+    async def rederive_invoices(self, batch_size: int = 500, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Vuelve a ejecutar el mapeo local sobre los resultados crudos guardados.
+
+        Recorre las facturas con `content_hash` en lotes (paginación por id) y
+        carga los payloads de cada lote con una sola consulta. Los campos que
+        salen del resultado crudo se recalculan con el mapeo actual; los de
+        `VALIDATED_FIELDS` (proveedor, total, tipo, necesita_revision...) se
+        conservan si ya tienen valor y solo se completan si faltan. Las
+        columnas fiscales se actualizan con `apply_summary`. No realiza ninguna
+        llamada a Azure.
+
+        Args:
+            batch_size: Cantidad de facturas por lote
+            dry_run: Si es True solo cuenta los cambios sin guardarlos
+
+        Returns:
+            Estadísticas: facturas procesadas, actualizadas y sin resultado crudo
+        """
+        stats = {"processed": 0, "updated": 0, "missing_raw": 0}
+        last_id = 0
+
+        while True:
+            result = await self.session.execute(
+                select(Invoice)
+                .where(Invoice.id > last_id, Invoice.content_hash.is_not(None))
+                .order_by(Invoice.id)
+                .limit(batch_size)
+            )
+            invoices = result.scalars().all()
+            if not invoices:
+                break
+            last_id = invoices[-1].id
+
+            hashes = {invoice.content_hash for invoice in invoices}
+            raw_result = await self.session.execute(
+                select(RawExtraction).where(RawExtraction.content_hash.in_(hashes))
+            )
+            raw_by_hash = {row.content_hash: row for row in raw_result.scalars().all()}
+
+            for invoice in invoices:
+                stats["processed"] += 1
+                raw_extraction = raw_by_hash.get(invoice.content_hash)
+                if raw_extraction is None:
+                    stats["missing_raw"] += 1
+                    continue
+
+                current = invoice.extracted_data or {}
+                mapped = map_analyze_result(self.decode(raw_extraction))
+                derived = {
+                    key: value for key, value in build_summary(mapped).items()
+                    if key not in VALIDATED_FIELDS or current.get(key) is None
+                }
+                summary = {**current, **derived}
+
+                # Se aplica sobre una copia para poder contar los cambios en dry_run
+                columns = {column: getattr(invoice, column) for column in SUMMARY_COLUMNS}
+                target = SimpleNamespace(invoice_direction=invoice.invoice_direction, **columns)
+                apply_summary(target, summary)
+                changed_columns = {
+                    column: getattr(target, column)
+                    for column in SUMMARY_COLUMNS
+                    if getattr(target, column) != columns[column]
+                }
+
+                if summary != current or changed_columns:
+                    stats["updated"] += 1
+                    if not dry_run:
+                        invoice.extracted_data = summary
+                        for column, value in changed_columns.items():
+                            setattr(invoice, column, value)
+
+            if not dry_run:
+                await self.session.commit()
+            self.session.expunge_all()
+            logger.info(f"Re-derivación: {stats['processed']} facturas procesadas, {stats['updated']} actualizadas")
+
+        return stats
@@ -4,78 +4,99 @@ Servicio para gestión de usuarios con funcionalidades avanzadas.
 
 import os
 import uuid
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, date
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import UploadFile, HTTPException
 from ..models.user import User
-from ..core.security import get_password_hash, verify_password
+from ..models.invoice import Invoice
+from ..core.security import hash_password_async
+from ..repositories.returning import insert_returning, update_returning
 # from ..services.azure_storage import AzureStorageService
 
 
 class UserService:
     """Servicio para gestión de usuarios."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         # self.azure_storage = AzureStorageService()
     
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Obtener usuario por ID."""
-        return self.db.query(User).filter(User.id == user_id).first()
+        result = await self.db.execute(select(User).where(User.id == user_id))
+        return result.scalar_one_or_none()
     
-    def get_user_by_email(self, email: str) -> Optional[User]:
+    async def get_user_by_email(self, email: str) -> Optional[User]:
         """Obtener usuario por email."""
-        return self.db.query(User).filter(User.email == email).first()
+        result = await self.db.execute(select(User).where(User.email == email))
+        return result.scalar_one_or_none()
     
-    def get_all_users(self, skip: int = 0, limit: int = 100) -> List[User]:
+    async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[User]:
         """Obtener todos los usuarios con paginación."""
-        return self.db.query(User).offset(skip).limit(limit).all()
+        result = await self.db.execute(select(User).order_by(User.id).offset(skip).limit(limit))
+        return list(result.scalars().all())
     
-    def create_user(self, user_data: Dict[str, Any]) -> User:
+    async def get_users_with_total(self, skip: int = 0, limit: int = 100) -> Tuple[List[User], int]:
+        """
+        Obtener una página de usuarios y el total en una sola consulta.
+        
+        Returns:
+            Tupla (usuarios de la página, total de usuarios)
+        """
+        result = await self.db.execute(
+            select(User, func.count().over().label("total"))
+            .order_by(User.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        rows = result.all()
+        if rows:
+            return [row[0] for row in rows], rows[0].total
+        # Página fuera de rango: la ventana no devuelve filas, contar aparte
+        total = await self.db.scalar(select(func.count()).select_from(User))
+        return [], total or 0
+    
+    async def create_user(self, user_data: Dict[str, Any]) -> User:
         """Crear nuevo usuario."""
         # Verificar si el email ya existe
-        if self.get_user_by_email(user_data['email']):
+        if await self.get_user_by_email(user_data['email']):
             raise HTTPException(status_code=400, detail="El email ya está registrado")
         
-        # Hash de la contraseña
-        hashed_password = get_password_hash(user_data['password'])
+        # Hash de la contraseña (fuera del event loop)
+        hashed_password = await hash_password_async(user_data['password'])
         
         # Crear usuario
-        user = User(
-            email=user_data['email'],
-            hashed_password=hashed_password,
-            full_name=user_data['full_name'],
-            role=user_data.get('role', 'editor'),
-            phone=user_data.get('phone'),
-            address=user_data.get('address'),
-            birth_date=user_data.get('birth_date'),
-            position=user_data.get('position'),
-            department=user_data.get('department'),
-            hire_date=user_data.get('hire_date'),
-            salary=user_data.get('salary'),
-            preferences=user_data.get('preferences', {})
-        )
-        
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        
-        return user
+        return await insert_returning(self.db, User, {
+            "email": user_data['email'],
+            "hashed_password": hashed_password,
+            "full_name": user_data['full_name'],
+            "role": user_data.get('role', 'editor'),
+            "phone": user_data.get('phone'),
+            "address": user_data.get('address'),
+            "birth_date": user_data.get('birth_date'),
+            "position": user_data.get('position'),
+            "department": user_data.get('department'),
+            "hire_date": user_data.get('hire_date'),
+            "salary": user_data.get('salary'),
+            "preferences": user_data.get('preferences', {})
+        })
     
-    def update_user(self, user_id: int, user_data: Dict[str, Any]) -> User:
+    async def update_user(self, user_id: int, user_data: Dict[str, Any]) -> User:
         """Actualizar usuario existente."""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
+        values: Dict[str, Any] = {}
+        
         # Verificar email único si se está cambiando
         if 'email' in user_data and user_data['email'] != user.email:
-            existing_user = self.get_user_by_email(user_data['email'])
+            existing_user = await self.get_user_by_email(user_data['email'])
             if existing_user:
                 raise HTTPException(status_code=400, detail="El email ya está registrado")
-            user.email = user_data['email']
+            values['email'] = user_data['email']
         
         # Actualizar campos permitidos
         allowed_fields = [
@@ -85,49 +106,36 @@ class UserService:
         
         for field in allowed_fields:
             if field in user_data:
-                setattr(user, field, user_data[field])
+                values[field] = user_data[field]
         
         # Actualizar contraseña si se proporciona
         if 'password' in user_data:
-            user.hashed_password = get_password_hash(user_data['password'])
+            values['hashed_password'] = await hash_password_async(user_data['password'])
         
-        user.updated_at = datetime.utcnow()
+        values['updated_at'] = datetime.utcnow()
         
-        self.db.commit()
-        self.db.refresh(user)
-        
-        return user
+        return await update_returning(self.db, User, User.id == user_id, values)
     
-    def delete_user(self, user_id: int) -> bool:
-        """Eliminar usuario (soft delete)."""
-        user = self.get_user_by_id(user_id)
+    async def _set_fields(self, user_id: int, values: Dict[str, Any]) -> User:
+        """Actualiza campos de un usuario en un UPDATE ... RETURNING (404 si no existe)."""
+        values['updated_at'] = datetime.utcnow()
+        user = await update_returning(self.db, User, User.id == user_id, values)
         if not user:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        
-        user.is_active = False
-        user.updated_at = datetime.utcnow()
-        
-        self.db.commit()
+        return user
+    
+    async def delete_user(self, user_id: int) -> bool:
+        """Eliminar usuario (soft delete)."""
+        await self._set_fields(user_id, {"is_active": False})
         return True
     
-    def restore_user(self, user_id: int) -> bool:
+    async def restore_user(self, user_id: int) -> bool:
         """Restaurar usuario eliminado."""
-        user = self.get_user_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        
-        user.is_active = True
-        user.updated_at = datetime.utcnow()
-        
-        self.db.commit()
+        await self._set_fields(user_id, {"is_active": True})
         return True
     
-    def upload_profile_photo(self, user_id: int, photo_file: UploadFile) -> str:
+    async def upload_profile_photo(self, user_id: int, photo_file: UploadFile) -> str:
         """Subir foto de perfil del usuario."""
-        user = self.get_user_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        
         # Validar tipo de archivo
         if not photo_file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="El archivo debe ser una imagen")
@@ -140,21 +148,17 @@ class UserService:
             # TODO: Implementar subida a Azure Blob Storage
             # Por ahora, simular URL
             blob_url = f"https://storage.example.com/user-files/{unique_filename}"
-            
-            # Actualizar URL en la base de datos
-            user.profile_photo_url = blob_url
-            user.updated_at = datetime.utcnow()
-            
-            self.db.commit()
-            
-            return blob_url
-            
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error al subir la imagen: {str(e)}")
+        
+        # Actualizar URL en la base de datos
+        await self._set_fields(user_id, {"profile_photo_url": blob_url})
+        
+        return blob_url
     
-    def delete_profile_photo(self, user_id: int) -> bool:
+    async def delete_profile_photo(self, user_id: int) -> bool:
         """Eliminar foto de perfil del usuario."""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
@@ -168,40 +172,42 @@ class UserService:
                 pass
             
             # Limpiar URL en la base de datos
-            user.profile_photo_url = None
-            user.updated_at = datetime.utcnow()
-            
-            self.db.commit()
+            await self._set_fields(user_id, {"profile_photo_url": None})
         
         return True
     
-    def update_user_preferences(self, user_id: int, preferences: Dict[str, Any]) -> User:
+    async def update_user_preferences(self, user_id: int, preferences: Dict[str, Any]) -> User:
         """Actualizar preferencias del usuario."""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
-        # Mergear preferencias existentes con las nuevas
-        current_preferences = user.preferences or {}
-        current_preferences.update(preferences)
-        
-        user.preferences = current_preferences
-        user.updated_at = datetime.utcnow()
+        # Mergear preferencias existentes con las nuevas (dict nuevo para que
+        # la columna JSON se marque como modificada)
+        merged_preferences = {**(user.preferences or {}), **preferences}
         
-        self.db.commit()
-        self.db.refresh(user)
-        
-        return user
+        return await self._set_fields(user_id, {"preferences": merged_preferences})
     
-    def get_user_statistics(self, user_id: int) -> Dict[str, Any]:
-        """Obtener estadísticas del usuario."""
-        user = self.get_user_by_id(user_id)
-        if not user:
+    async def get_user_statistics(self, user_id: int) -> Dict[str, Any]:
+        """Obtener estadísticas del usuario (usuario y conteo de facturas en una consulta)."""
+        invoice_count = (
+            select(func.count(Invoice.id))
+            .where(Invoice.user_id == User.id)
+            .correlate(User)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(User, invoice_count.label("total_invoices")).where(User.id == user_id)
+        )
+        row = result.first()
+        if not row:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
+        user = row[0]
+        
         # Calcular estadísticas básicas
         stats = {
-            "total_invoices": len(user.invoices),
+            "total_invoices": row.total_invoices,
             "active_since": user.created_at,
             "last_activity": user.updated_at,
             "profile_completion": self._calculate_profile_completion(user)
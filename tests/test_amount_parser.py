@@ -0,0 +1,84 @@
+"""
+Pruebas para el parser único de montos.
+"""
+
+import logging
+from decimal import Decimal
+
+from src.services.amount_parser import (
+    PARSE_EMPTY,
+    PARSE_INVALID,
+    PARSE_MALFORMED,
+    PARSE_OK,
+    PARSE_OVERFLOW,
+    detect_format,
+    parse_amount,
+    parse_many,
+)
+from src.services.financial_calculator import FinancialCalculator
+from src.services.invoice_extraction import to_decimal
+
+
+class TestAmountParser:
+    """Pruebas del parser de montos."""
+
+    def test_argentine_and_english_formats(self):
+        """Prueba que ambos formatos se conviertan al mismo valor."""
+        assert parse_amount("$1.234,56") == (Decimal("1234.56"), PARSE_OK)
+        assert parse_amount("1,234.56") == (Decimal("1234.56"), PARSE_OK)
+        assert parse_amount("ARS -1.234.567,8") == (Decimal("-1234567.8"), PARSE_OK)
+        assert parse_amount("1234,5") == (Decimal("1234.5"), PARSE_OK)
+        assert detect_format("$1.234,56") == "argentino"
+        assert detect_format("1,234.56") == "ingles"
+
+    def test_single_separator_with_three_digits_is_thousands(self):
+        """Prueba que "1.500" se interprete como mil quinientos."""
+        assert parse_amount("1.500") == (Decimal("1500"), PARSE_OK)
+        assert parse_amount("0,125") == (Decimal("0.125"), PARSE_OK)
+
+    def test_space_thousands_separator(self):
+        """Prueba que el espacio (común, duro o angosto) se acepte como separador de miles."""
+        assert parse_amount("1 234,56") == (Decimal("1234.56"), PARSE_OK)
+        assert parse_amount("1\u00a0234,56") == (Decimal("1234.56"), PARSE_OK)
+        assert parse_amount("$ 1\u202f234\u202f567,89") == (Decimal("1234567.89"), PARSE_OK)
+        assert parse_amount("1 234.56") == (Decimal("1234.56"), PARSE_OK)
+        assert detect_format("1 234") == "argentino"
+        # Los grupos deben ser de 3 dígitos y con un único tipo de separador
+        assert parse_amount("1 23,45")[1] == PARSE_INVALID
+        assert parse_amount("1 234.567,89")[1] == PARSE_INVALID
+
+    def test_normalizar_monto_logs_invalid_values(self, caplog):
+        """Prueba que un monto inválido se registre en lugar de volverse 0 en silencio."""
+        with caplog.at_level(logging.WARNING, logger="src.services.financial_calculator"):
+            assert FinancialCalculator.normalizar_monto("1 234,56") == Decimal("1234.56")
+            assert FinancialCalculator.normalizar_monto("") == Decimal("0")
+            assert caplog.records == []
+
+            assert FinancialCalculator.normalizar_monto("12 abc") == Decimal("0")
+
+        assert [record.getMessage() for record in caplog.records] == [
+            "Monto no interpretable '12 abc': Formato inválido. Use $1.234,56 (argentino) o $1,234.56 (inglés); se usa 0"
+        ]
+
+    def test_error_codes(self):
+        """Prueba los códigos de error por tipo de entrada."""
+        assert parse_amount("")[1] == PARSE_EMPTY
+        assert parse_amount("$ -")[1] == PARSE_EMPTY
+        assert parse_amount("1e5")[1] == PARSE_INVALID
+        assert parse_amount("1.234.56")[1] == PARSE_MALFORMED
+        assert parse_amount(None)[1] == PARSE_EMPTY
+
+    def test_parse_many_returns_cents_and_codes(self):
+        """Prueba el parseo en lote a centavos con redondeo half-up."""
+        cents, codes = parse_many(["$1.234,56", "0,005", 1.005, 7, "abc", "9" * 30])
+
+        assert list(cents) == [123456, 1, 101, 700, 0, 0]
+        assert list(codes) == [PARSE_OK, PARSE_OK, PARSE_OK, PARSE_OK, PARSE_INVALID, PARSE_OVERFLOW]
+        assert cents.typecode == "q"
+
+    def test_extraction_amounts_use_parser(self):
+        """Prueba que los montos extraídos acepten formato argentino."""
+        assert to_decimal("1.234,56") == Decimal("1234.56")
+        assert to_decimal(99.9) == Decimal("99.90")
+        assert to_decimal("sin monto") is None
+        assert to_decimal(True) is None
@@ -0,0 +1,160 @@
+"""
+Pruebas de UserService y SystemSettingsService sobre AsyncSession.
+
+Levanta los routers de usuarios y configuraciones contra SQLite en memoria
+y los llama en paralelo mientras mide el atraso del event loop.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.api.routers import system_settings, users
+from src.core.database import get_session
+from src.core.principal import get_current_principal
+from src.core.security import get_current_user
+from src.core.settings_cache import settings_cache
+from src.models.invoice import Invoice
+from src.models.system_settings import SystemSettings
+from src.models.user import User
+from src.services.system_settings_service import SystemSettingsService
+from src.services.user_service import UserService
+
+
+async def _measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    """Mide cuánto se atrasa el event loop respecto de un tick fijo."""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+    return lags
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Base SQLite con las tablas de usuarios, facturas y configuraciones."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'services.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.metadata.create_all(
+            sync_conn, tables=[User.__table__, Invoice.__table__, SystemSettings.__table__]
+        ))
+    # Base nueva: descartar lo que haya cargado la caché de configuraciones
+    settings_cache.bump()
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def admin(session_factory):
+    """Usuario administrador creado con el servicio."""
+    async with session_factory() as session:
+        return await UserService(session).create_user({
+            "email": "admin@opendoors.com",
+            "password": "secreto123",
+            "full_name": "Admin",
+            "role": "admin",
+            "phone": "1122334455"
+        })
+
+
+@pytest.fixture
+async def api_client(session_factory, admin):
+    """Cliente HTTP para los routers con sesión y usuario reemplazados."""
+    app = FastAPI()
+    app.include_router(users.router, prefix="/api/users")
+    app.include_router(system_settings.router, prefix="/api/v1/system")
+
+    async def session_override():
+        async with session_factory() as session:
+            yield session
+
+    principal = SimpleNamespace(id=admin.id, email=admin.email, role="admin")
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_current_user] = lambda: admin
+    app.dependency_overrides[get_current_principal] = lambda: principal
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+class TestAsyncServices:
+    """Pruebas de los servicios asíncronos."""
+
+    async def test_user_service_crud_and_statistics(self, session_factory, admin):
+        """Prueba alta, edición, baja lógica y estadísticas en una consulta."""
+        async with session_factory() as session:
+            service = UserService(session)
+
+            updated = await service.update_user(admin.id, {"full_name": "Administrador", "preferences": {"theme": "dark"}})
+            assert updated.full_name == "Administrador"
+
+            merged = await service.update_user_preferences(admin.id, {"language": "es"})
+            assert merged.preferences == {"theme": "dark", "language": "es"}
+
+            assert await service.delete_user(admin.id)
+            assert (await service.get_user_by_id(admin.id)).is_active is False
+
+            stats = await service.get_user_statistics(admin.id)
+            assert stats["total_invoices"] == 0
+            assert stats["profile_completion"] == 28
+
+            users_page, total = await service.get_users_with_total(skip=0, limit=10)
+            assert total == 1
+            assert [user.id for user in users_page] == [admin.id]
+
+            users_page, total = await service.get_users_with_total(skip=10, limit=10)
+            assert users_page == []
+            assert total == 1
+
+    async def test_settings_service_round_trip(self, session_factory):
+        """Prueba guardar y leer configuraciones y formatear números."""
+        async with session_factory() as session:
+            service = SystemSettingsService(session)
+
+            assert (await service.get_currency_settings())["code"] == "ARS"
+            await service.set_number_format_settings({
+                "thousands_separator": ".",
+                "decimal_separator": ",",
+                "decimal_places": 2
+            })
+
+            assert await service.format_number(1234567.891) == "1.234.567,89"
+            assert await service.format_currency(1500) == "$ 1.500,00"
+
+    async def test_concurrent_requests_do_not_block_loop(self, api_client, admin):
+        """Prueba que los routers atendidos en paralelo no bloqueen el event loop."""
+        paths = (
+            "/api/v1/system/currency",
+            "/api/v1/system/number-format",
+            f"/api/users/{admin.id}/statistics",
+            "/api/users/",
+        )
+        # Primera pasada fuera de la medición (arma schemas y conexiones)
+        for path in paths:
+            assert (await api_client.get(path)).status_code == 200
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_measure_loop_lag(stop))
+
+        reads = [api_client.get(path) for _ in range(10) for path in paths]
+        creates = [
+            api_client.post("/api/users/", json={
+                "email": f"editor{index}@opendoors.com",
+                "password": "secreto123",
+                "full_name": f"Editor {index}"
+            })
+            for index in range(4)
+        ]
+        responses = await asyncio.gather(*reads, *creates)
+        stop.set()
+        lags = await probe
+
+        assert all(response.status_code == 200 for response in responses)
+        # Un solo bcrypt o una consulta síncrona en el loop superaría este límite
+        assert max(lags) < 0.1
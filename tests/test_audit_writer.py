@@ -0,0 +1,133 @@
+"""
+Pruebas de la escritura en lotes del log de actividades.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.models.activity_log import ActivityLog
+from src.models.user import User
+from src.services import audit_writer as audit_writer_module
+from src.services.activity_logger import ActivityLogger
+from src.services.audit_writer import AuditWriter, build_activity_row
+
+
+@pytest.fixture
+async def session_factory(tmp_path, monkeypatch):
+    """Base SQLite con usuarios y log de actividades; el writer escribe en ella."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'audit.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.metadata.create_all(
+            sync_conn, tables=[User.__table__, ActivityLog.__table__]
+        ))
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(User(email="audit@opendoors.com", hashed_password="x", full_name="Audit", role="admin"))
+        await session.commit()
+    monkeypatch.setattr(audit_writer_module, "AsyncSessionLocal", factory)
+    yield factory
+    await engine.dispose()
+
+
+def failing_once(factory, gate: asyncio.Event):
+    """Fábrica de sesiones cuya primera sesión falla (cuando se abre `gate`)."""
+    calls = []
+
+    @asynccontextmanager
+    async def session_factory():
+        calls.append(1)
+        if len(calls) == 1:
+            await gate.wait()
+            raise OSError("base no disponible")
+        async with factory() as session:
+            yield session
+
+    return session_factory
+
+
+async def count_logs(factory) -> int:
+    async with factory() as session:
+        return (await session.execute(select(func.count()).select_from(ActivityLog))).scalar_one()
+
+
+def row(index: int) -> dict:
+    return build_activity_row(1, "CARGA_FACTURA", {"invoice_id": index})
+
+
+class TestAuditWriter:
+    """Pruebas del buffer y los lotes."""
+
+    async def test_events_are_written_in_batches(self, session_factory):
+        """Prueba que los eventos esperen en el buffer y se escriban en INSERTs de max_batch filas."""
+        writer = AuditWriter(flush_interval=60, max_batch=2, max_buffer=100)
+        await writer.start()
+        for index in range(5):
+            await writer.enqueue(row(index))
+
+        assert await count_logs(session_factory) == 0
+        await writer.stop()
+
+        assert await count_logs(session_factory) == 5
+        assert writer.stats()["written"] == 5
+        assert writer.stats()["flushes"] == 3
+
+    async def test_failed_flush_requeues_events(self, session_factory, monkeypatch):
+        """Prueba que un flush fallido conserve los eventos para el siguiente intento."""
+        gate = asyncio.Event()
+        gate.set()
+        monkeypatch.setattr(audit_writer_module, "AsyncSessionLocal", failing_once(session_factory, gate))
+        writer = AuditWriter(flush_interval=60, max_batch=10, max_buffer=100)
+
+        await writer.enqueue(row(1))
+        assert writer.stats()["failed_flushes"] == 1
+        assert writer.stats()["pending"] == 1
+
+        assert await writer.flush() == 1
+        assert await count_logs(session_factory) == 1
+        assert writer.stats()["dropped"] == 0
+
+    async def test_overflow_during_failure_is_counted(self, session_factory, monkeypatch):
+        """Prueba que los eventos que no entran al re-encolar se cuenten como descartados."""
+        gate = asyncio.Event()
+        monkeypatch.setattr(audit_writer_module, "AsyncSessionLocal", failing_once(session_factory, gate))
+        writer = AuditWriter(flush_interval=60, max_batch=10, max_buffer=4)
+        await writer.start()
+        for index in range(3):
+            await writer.enqueue(row(index))
+
+        flushing = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0)
+        # Llegan más eventos mientras la escritura está en curso
+        for index in range(3, 6):
+            await writer.enqueue(row(index))
+        gate.set()
+        await flushing
+
+        assert writer.stats()["dropped"] == 2
+        assert writer.stats()["pending"] == 4
+        await writer.stop()
+        assert await count_logs(session_factory) == 4
+
+
+class TestDurableLogging:
+    """Pruebas del modo durable (escritura en la transacción de la petición)."""
+
+    async def test_durable_event_skips_the_buffer(self, session_factory, monkeypatch):
+        """Prueba que un evento durable quede escrito al volver, sin pasar por el writer."""
+        writer = AuditWriter(flush_interval=60, max_batch=10, max_buffer=100)
+        monkeypatch.setattr("src.services.activity_logger.audit_writer", writer)
+        await writer.start()
+
+        async with session_factory() as session:
+            activity_logger = ActivityLogger(session)
+            await activity_logger.log_activity(1, "APROBACION_FACTURA", {"invoice_id": 1}, durable=True)
+            await activity_logger.log_activity(1, "CARGA_FACTURA", {"invoice_id": 2})
+
+        assert await count_logs(session_factory) == 1
+        assert writer.stats()["pending"] == 1
+        await writer.stop()
+        assert await count_logs(session_factory) == 2
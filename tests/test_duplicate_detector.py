@@ -0,0 +1,122 @@
+"""
+Pruebas del motor de detección de facturas duplicadas.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.config import settings
+from src.models.invoice import Invoice
+from src.models.partner import Partner
+from src.models.user import User
+from src.services.duplicate_detector import DuplicateDetector, fuzzy_score, numero_variants
+
+CONTENT_HASH = "b" * 64
+
+
+@pytest.fixture
+async def session(tmp_path):
+    """Sesión SQLite con una factura ya cargada."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'duplicates.db'}")
+    tables = [User.__table__, Partner.__table__, Invoice.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.metadata.create_all(sync_conn, tables=tables))
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        user = User(email="carga@opendoors.com", hashed_password="x", full_name="Carga", role="admin")
+        session.add(user)
+        await session.flush()
+        session.add(Invoice(
+            user_id=user.id,
+            filename="factura.pdf",
+            content_hash=CONTENT_HASH,
+            cuit="20-12345678-9",
+            tipo_factura="A",
+            numero_factura="0001-00001234",
+            razon_social="Proveedor S.A.",
+            total=Decimal("1210.00"),
+            fecha_emision=date(2025, 3, 10)
+        ))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+class TestFuzzyHelpers:
+    """Pruebas de normalización y puntaje difuso."""
+
+    def test_numero_variants(self):
+        """Prueba las variantes de formato del número de comprobante."""
+        assert set(numero_variants("0001-00001234")) == {"0001-00001234", "000100001234", "100001234"}
+        assert "0001-00001234" in numero_variants("000100001234")
+
+    def test_fuzzy_score_weights_present_fields(self):
+        """Prueba que solo se ponderen los campos presentes en ambos lados."""
+        candidate = Invoice(razon_social="Proveedor S.A.", total=Decimal("1210.00"), fecha_emision=date(2025, 3, 10))
+
+        assert fuzzy_score("PROVEEDOR SA", Decimal("1210.00"), date(2025, 3, 10), candidate) == 1.0
+        assert fuzzy_score(None, Decimal("1210.00"), None, candidate) == 1.0
+        assert fuzzy_score("Proveedor SA", Decimal("1210.00"), date(2025, 3, 12), candidate) == pytest.approx(0.9)
+        assert fuzzy_score(None, None, None, candidate) == 0.0
+
+
+class TestDuplicateDetector:
+    """Pruebas de la detección por hash, bloque y umbral."""
+
+    async def test_exact_hash_match(self, session):
+        """Prueba que el mismo archivo sea duplicado con confianza 1, salvo la propia factura."""
+        detector = DuplicateDetector(session)
+
+        result = await detector.check(content_hash=CONTENT_HASH)
+        assert (result["is_duplicate"], result["confidence"], result["match_type"]) == (True, 1.0, "hash")
+
+        own = await detector.check(content_hash=CONTENT_HASH, exclude_invoice_id=1)
+        assert not own["is_duplicate"]
+
+    async def test_block_match_across_number_formats(self, session):
+        """Prueba que el bloque encuentre el comprobante con otro formato de número y CUIT."""
+        result = await DuplicateDetector(session).check_extracted({
+            "cuit_proveedor": "20123456789",
+            "tipo_factura": "a",
+            "numero_factura": "000100001234",
+            "proveedor": "PROVEEDOR SA",
+            "total": "1210,00",
+            "fecha_emision": "2025-03-10",
+        })
+
+        assert result["is_duplicate"]
+        assert result["match_type"] == "block"
+        assert result["confidence"] == 1.0
+        assert [candidate["invoice_id"] for candidate in result["similar_invoices"]] == [1]
+
+    async def test_other_type_or_number_is_not_a_candidate(self, session):
+        """Prueba que otro tipo de factura u otro número no entren al bloque."""
+        detector = DuplicateDetector(session)
+
+        other_type = await detector.check(cuit="20-12345678-9", tipo_factura="B", numero_factura="0001-00001234")
+        other_number = await detector.check(cuit="20-12345678-9", tipo_factura="A", numero_factura="0001-00001235")
+
+        assert other_type["similar_invoices"] == []
+        assert other_number["similar_invoices"] == []
+
+    async def test_confidence_threshold(self, session, monkeypatch):
+        """Prueba que un candidato del bloque con datos distintos solo sea duplicado bajo un umbral menor."""
+        detector = DuplicateDetector(session)
+        data = {
+            "cuit": "20-12345678-9",
+            "tipo_factura": "A",
+            "numero_factura": "000100001234",
+            "razon_social": "Otra Empresa SRL",
+            "total": "5000",
+            "fecha_emision": date(2025, 6, 1),
+        }
+
+        result = await detector.check(**data)
+        assert 0.5 <= result["confidence"] < settings.DUPLICATE_THRESHOLD
+        assert not result["is_duplicate"]
+        assert result["similar_invoices"][0]["invoice_id"] == 1
+
+        monkeypatch.setattr(settings, "DUPLICATE_THRESHOLD", result["confidence"])
+        assert (await detector.check(**data))["is_duplicate"]
@@ -0,0 +1,162 @@
+"""
+Pruebas del middleware de Idempotency-Key sobre una app ASGI mínima.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from httpx import ASGITransport, AsyncClient
+from jose import jwt
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core import idempotency as idempotency_module
+from src.core.config import settings
+from src.core.idempotency import IdempotencyMiddleware
+from src.models.idempotency_key import IdempotencyKey
+
+
+@pytest.fixture
+async def session_factory(tmp_path, monkeypatch):
+    """Base SQLite con la tabla de claves; el middleware escribe en ella."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'idempotency.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: IdempotencyKey.metadata.create_all(
+            sync_conn, tables=[IdempotencyKey.__table__]
+        ))
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(idempotency_module, "AsyncSessionLocal", factory)
+    yield factory
+    await engine.dispose()
+
+
+class InvoiceApp:
+    """App con un POST de creación que cuenta llamadas y puede quedar en espera."""
+
+    def __init__(self, status_code: int = 201):
+        self.status_code = status_code
+        self.calls = 0
+        self.entered = asyncio.Event()
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.app = FastAPI()
+
+        @self.app.post("/api/invoices")
+        async def create_invoice(payload: dict):
+            self.calls += 1
+            self.entered.set()
+            await self.gate.wait()
+            return JSONResponse({"id": self.calls, **payload}, status_code=self.status_code)
+
+        self.app.add_middleware(IdempotencyMiddleware)
+
+    async def wait_calls(self, count: int) -> None:
+        while self.calls < count:
+            await asyncio.sleep(0.01)
+
+    def client(self) -> AsyncClient:
+        return AsyncClient(transport=ASGITransport(app=self.app), base_url="http://test")
+
+
+def headers(key: str = "clave-1", user: str = "carga@opendoors.com") -> dict:
+    token = jwt.encode({"sub": user}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {token}", "Idempotency-Key": key}
+
+
+async def stored_keys(factory) -> list:
+    async with factory() as session:
+        return (await session.execute(select(IdempotencyKey))).scalars().all()
+
+
+class TestIdempotencyMiddleware:
+    """Pruebas de reserva, reintentos y liberación de claves."""
+
+    async def test_first_request_claims_and_retry_is_replayed(self, session_factory):
+        """Prueba que el reintento reciba la respuesta original sin volver a ejecutar el endpoint."""
+        invoice_app = InvoiceApp()
+
+        async with invoice_app.client() as client:
+            first = await client.post("/api/invoices", json={"total": 100}, headers=headers())
+            retry = await client.post("/api/invoices", json={"total": 100}, headers=headers())
+            other_user = await client.post("/api/invoices", json={"total": 100}, headers=headers(user="otro@opendoors.com"))
+
+        assert first.status_code == 201
+        assert "idempotent-replayed" not in first.headers
+        assert (retry.status_code, retry.json()) == (201, first.json())
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert other_user.json()["id"] == 2
+        assert invoice_app.calls == 2
+        assert {record.status for record in await stored_keys(session_factory)} == {"completed"}
+
+    async def test_concurrent_requests_with_same_key(self, session_factory):
+        """Prueba que con dos peticiones simultáneas solo una se procese y la otra reciba 409."""
+        invoice_app = InvoiceApp()
+        invoice_app.gate.clear()
+
+        async with invoice_app.client() as client:
+            requests = [
+                asyncio.create_task(client.post("/api/invoices", json={"total": 100}, headers=headers()))
+                for _ in range(2)
+            ]
+            done, pending = await asyncio.wait(requests, return_when=asyncio.FIRST_COMPLETED)
+            [conflict] = [task.result() for task in done]
+            assert conflict.status_code == 409
+            assert conflict.headers["retry-after"] == "2"
+
+            invoice_app.gate.set()
+            [original] = [await task for task in pending]
+
+        assert original.status_code == 201
+        assert invoice_app.calls == 1
+
+    async def test_same_key_with_different_body_is_rejected(self, session_factory):
+        """Prueba que reutilizar la clave con otro cuerpo devuelva 422."""
+        invoice_app = InvoiceApp()
+
+        async with invoice_app.client() as client:
+            await client.post("/api/invoices", json={"total": 100}, headers=headers())
+            mismatch = await client.post("/api/invoices", json={"total": 999}, headers=headers())
+
+        assert mismatch.status_code == 422
+        assert invoice_app.calls == 1
+
+    async def test_stale_lock_is_reclaimed(self, session_factory):
+        """Prueba que un bloqueo huérfano (más viejo que el timeout) lo tome el reintento."""
+        invoice_app = InvoiceApp()
+        invoice_app.gate.clear()
+
+        async with invoice_app.client() as client:
+            orphan = asyncio.create_task(client.post("/api/invoices", json={"total": 100}, headers=headers()))
+            await invoice_app.entered.wait()
+            async with session_factory() as session:
+                await session.execute(update(IdempotencyKey).values(
+                    locked_at=datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS + 1)
+                ))
+                await session.commit()
+
+            retry = asyncio.create_task(client.post("/api/invoices", json={"total": 100}, headers=headers()))
+            await asyncio.wait_for(invoice_app.wait_calls(2), timeout=5)
+            invoice_app.gate.set()
+            await orphan
+
+        assert (await retry).status_code == 201
+        assert invoice_app.calls == 2
+
+    async def test_server_error_releases_key(self, session_factory):
+        """Prueba que una respuesta 5xx libere la clave para permitir el reintento."""
+        invoice_app = InvoiceApp(status_code=503)
+
+        async with invoice_app.client() as client:
+            failed = await client.post("/api/invoices", json={"total": 100}, headers=headers())
+            assert await stored_keys(session_factory) == []
+
+            invoice_app.status_code = 201
+            retry = await client.post("/api/invoices", json={"total": 100}, headers=headers())
+
+        assert failed.status_code == 503
+        assert retry.status_code == 201
+        assert "idempotent-replayed" not in retry.headers
+        assert invoice_app.calls == 2
@@ -0,0 +1,143 @@
+"""
+Pruebas del reprocesamiento de facturas: dry run sin IA y conteo de errores.
+"""
+
+import sys
+from types import ModuleType
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.config import settings
+from src.models.invoice import Invoice
+from src.models.partner import Partner
+from src.models.raw_extraction import RawExtraction
+from src.models.user import User
+from src.services import invoice_reprocessor as reprocessor_module
+from src.services.invoice_reprocessor import ReprocessJob, run_reprocess_job
+from src.services.raw_extraction_store import RawExtractionStore
+
+AGENT_MODULE = "src.agents.enhanced_invoice_processing_agent"
+
+RAW = {
+    "content": "FACTURA A\nCUIT: 20-12345678-9",
+    "documents": [{
+        "fields": {
+            "VendorName": {"value_type": "string", "value": "PROVEEDOR OCR"},
+            "InvoiceTotal": {"value_type": "currency", "value": {"amount": 999.0}},
+        }
+    }],
+}
+
+
+@pytest.fixture
+async def session_factory(tmp_path, monkeypatch):
+    """Base SQLite con facturas; el trabajo de reprocesamiento abre sesiones sobre ella."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'reprocess.db'}")
+    tables = [User.__table__, Partner.__table__, Invoice.__table__, RawExtraction.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.metadata.create_all(sync_conn, tables=tables))
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(reprocessor_module, "AsyncSessionLocal", factory)
+    monkeypatch.setattr(settings, "REPROCESS_DELAY_SECONDS", 0)
+    yield factory
+    await engine.dispose()
+
+
+def install_agent(monkeypatch, result: dict) -> list:
+    """Reemplaza el agente de IA por uno que devuelve `result`; registra las llamadas."""
+    calls = []
+
+    class FakeAgent:
+        def __init__(self, session):
+            self.session = session
+
+        async def process_invoice(self, **kwargs):
+            calls.append(kwargs)
+            return result
+
+    module = ModuleType(AGENT_MODULE)
+    module.EnhancedInvoiceProcessingAgent = FakeAgent
+    monkeypatch.setitem(sys.modules, AGENT_MODULE, module)
+    return calls
+
+
+async def create_invoices(factory) -> list:
+    """Crea dos facturas en revisión; solo la primera tiene resultado crudo guardado."""
+    async with factory() as session:
+        user = User(email="carga@opendoors.com", hashed_password="x", full_name="Carga", role="admin")
+        session.add(user)
+        await session.flush()
+        invoices = [
+            Invoice(
+                user_id=user.id,
+                filename=f"factura-{index}.pdf",
+                blob_url=f"https://blob/factura-{index}.pdf",
+                content_hash=str(index) * 64,
+                status="needs_review",
+                extracted_data={"proveedor": "Proveedor Validado SA", "total": 1210.0},
+                invoice_direction="recibida"
+            )
+            for index in (1, 2)
+        ]
+        session.add_all(invoices)
+        await RawExtractionStore(session).save("1" * 64, RAW)
+        await session.commit()
+        return [invoice.id for invoice in invoices]
+
+
+class TestReprocessJob:
+    """Pruebas del trabajo de reprocesamiento."""
+
+    async def test_dry_run_uses_stored_raw_without_ai(self, session_factory, monkeypatch):
+        """Prueba que el dry run no llame al agente y calcule el diff con el resultado crudo."""
+        calls = install_agent(monkeypatch, {"status": "completed", "extracted_data": {}})
+        invoice_ids = await create_invoices(session_factory)
+
+        job = await run_reprocess_job(ReprocessJob(filters={}), invoice_ids, dry_run=True)
+
+        assert calls == []
+        assert (job.status, job.processed, job.changed, job.skipped, job.errors) == ("completed", 2, 1, 1, 0)
+        assert [diff["invoice_id"] for diff in job.diffs] == invoice_ids[:1]
+        changes = job.diffs[0]["changes"]
+        assert changes["proveedor"] == ["Proveedor Validado SA", "PROVEEDOR OCR"]
+        assert changes["cuit_proveedor"] == [None, "20-12345678-9"]
+        assert "status" not in changes
+        async with session_factory() as session:
+            invoice = await session.get(Invoice, invoice_ids[0])
+            assert invoice.extracted_data == {"proveedor": "Proveedor Validado SA", "total": 1210.0}
+            assert invoice.status == "needs_review"
+
+    async def test_error_result_is_counted_and_not_saved(self, session_factory, monkeypatch):
+        """Prueba que un resultado con estado `error` cuente como error y conserve la factura."""
+        calls = install_agent(monkeypatch, {"status": "error", "error_message": "Azure no disponible"})
+        invoice_ids = await create_invoices(session_factory)
+
+        job = await run_reprocess_job(ReprocessJob(filters={}), invoice_ids)
+
+        assert len(calls) == 2
+        assert all(call["reuse_exact_duplicate"] is False for call in calls)
+        assert (job.status, job.errors, job.changed) == ("completed", 2, 0)
+        async with session_factory() as session:
+            invoice = await session.get(Invoice, invoice_ids[0])
+            assert invoice.status == "needs_review"
+            assert invoice.extracted_data["proveedor"] == "Proveedor Validado SA"
+            assert invoice.pipeline_version is None
+
+    async def test_completed_result_is_saved(self, session_factory, monkeypatch):
+        """Prueba que un reproceso exitoso guarde el nuevo resumen y registre el cambio de estado."""
+        install_agent(monkeypatch, {
+            "status": "completed",
+            "extracted_data": {"proveedor": "Proveedor Validado SA", "total": 1331.0},
+        })
+        invoice_ids = await create_invoices(session_factory)
+
+        job = await run_reprocess_job(ReprocessJob(filters={}), invoice_ids[:1])
+
+        assert (job.errors, job.changed) == (0, 1)
+        assert job.status_changes == {"needs_review->completed": 1}
+        async with session_factory() as session:
+            invoice = await session.get(Invoice, invoice_ids[0])
+            assert invoice.status == "completed"
+            assert invoice.extracted_data["total"] == 1331.0
+            assert invoice.pipeline_version is not None
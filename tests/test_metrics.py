@@ -0,0 +1,105 @@
+"""
+Pruebas de las métricas en formato Prometheus.
+"""
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.core.metrics import (
+    MetricsMiddleware,
+    MetricsRegistry,
+    azure_request_duration_seconds,
+    azure_throttled_total,
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+    track_azure,
+)
+
+
+class ThrottledError(Exception):
+    """Error con status_code como los del SDK de Azure y de OpenAI."""
+
+    status_code = 429
+
+
+class TestMetricsRegistry:
+    """Pruebas del registro y del formato de texto."""
+
+    def test_render_counter_histogram_and_collector(self):
+        """Prueba el formato de contadores, buckets acumulativos y colectores."""
+        registry = MetricsRegistry()
+        requests = registry.counter("demo_requests_total", "Peticiones", ("route",))
+        latency = registry.histogram("demo_seconds", "Latencia", ("route",), buckets=(0.1, 1.0))
+        registry.register_collector(lambda: [("demo_queue", "gauge", "Cola", [({"priority": 'a"b'}, 3)])])
+
+        requests.inc("/items/{item_id}")
+        requests.inc("/items/{item_id}")
+        for value in (0.05, 0.1, 0.5, 2.0):
+            latency.observe(value, "/items/{item_id}")
+
+        output = registry.render()
+
+        assert "# TYPE demo_requests_total counter" in output
+        assert 'demo_requests_total{route="/items/{item_id}"} 2' in output
+        assert 'demo_seconds_bucket{route="/items/{item_id}",le="0.1"} 2' in output
+        assert 'demo_seconds_bucket{route="/items/{item_id}",le="1"} 3' in output
+        assert 'demo_seconds_bucket{route="/items/{item_id}",le="+Inf"} 4' in output
+        assert 'demo_seconds_count{route="/items/{item_id}"} 4' in output
+        assert 'demo_queue{priority="a\\"b"} 3' in output
+
+    def test_failing_collector_does_not_break_export(self):
+        """Prueba que un colector con error no impida exportar el resto."""
+        registry = MetricsRegistry()
+        registry.gauge("demo_up", "Arriba").set(value=1)
+        registry.register_collector(lambda: 1 / 0)
+
+        output = registry.render()
+
+        assert "demo_up 1" in output
+        assert "falló" in output
+
+
+class TestMetricsMiddleware:
+    """Pruebas de la medición por plantilla de ruta."""
+
+    async def test_labels_use_route_template(self):
+        """Prueba que las series usen la plantilla de la ruta y no la URL concreta."""
+        app = FastAPI()
+
+        @app.get("/api/demo-metrics/{item_id}")
+        async def get_item(item_id: int):
+            return {"id": item_id}
+
+        app.add_middleware(MetricsMiddleware)
+        labels = ("GET", "/api/demo-metrics/{item_id}", "200")
+        before = http_requests_total.value(*labels)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            for item_id in (1, 2, 3):
+                assert (await client.get(f"/api/demo-metrics/{item_id}")).status_code == 200
+            assert (await client.get("/no-existe/123")).status_code == 404
+
+        assert http_requests_total.value(*labels) == before + 3
+        assert http_request_duration_seconds.count(*labels) >= 3
+        assert http_requests_total.value("GET", "unmatched", "404") >= 1
+        assert http_requests_in_flight.value() == 0
+
+
+class TestTrackAzure:
+    """Pruebas de la medición de llamadas a Azure."""
+
+    def test_throttled_call_is_counted(self):
+        """Prueba que un 429 se cuente como throttle y se registre su latencia."""
+        before = azure_throttled_total.value("openai", "demo")
+
+        with pytest.raises(ThrottledError):
+            with track_azure("openai", "demo"):
+                raise ThrottledError()
+        with track_azure("openai", "demo"):
+            pass
+
+        assert azure_throttled_total.value("openai", "demo") == before + 1
+        assert azure_request_duration_seconds.count("openai", "demo", "throttled") >= 1
+        assert azure_request_duration_seconds.count("openai", "demo", "ok") >= 1
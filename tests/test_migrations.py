@@ -0,0 +1,70 @@
+"""
+Pruebas de la verificación del esquema por migraciones de Alembic en el arranque.
+"""
+
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.core.migrations import SchemaOutOfDateError, current_revision, ensure_schema, head_revision
+
+
+@pytest.fixture
+async def sqlite_engine(tmp_path):
+    """Base SQLite vacía en un archivo temporal."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}", poolclass=NullPool)
+    yield engine
+    await engine.dispose()
+
+
+async def table_columns(engine, table: str) -> set:
+    """Nombres de columna de una tabla."""
+    async with engine.connect() as conn:
+        return await conn.run_sync(lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns(table)})
+
+
+class TestEnsureSchema:
+    """Pruebas de ensure_schema en sus tres modos."""
+
+    async def test_check_refuses_unmigrated_database(self, sqlite_engine):
+        """Prueba que en modo check una base sin migrar rechace el arranque."""
+        with pytest.raises(SchemaOutOfDateError):
+            await ensure_schema(sqlite_engine, mode="check")
+
+        assert await ensure_schema(sqlite_engine, mode="off") is None
+
+    async def test_upgrade_then_single_query_check(self, sqlite_engine):
+        """Prueba que upgrade deje la base en la cabeza y luego verificar cueste una consulta."""
+        assert await ensure_schema(sqlite_engine, mode="upgrade") == head_revision()
+        async with sqlite_engine.connect() as conn:
+            assert await current_revision(conn) == head_revision()
+        async with sqlite_engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+        assert {"users", "invoices", "backup_logs", "activity_logs", "idempotency_keys"} <= tables
+
+        statements = []
+        event.listen(sqlite_engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        assert await ensure_schema(sqlite_engine, mode="check") == head_revision()
+        assert statements == ["SELECT version_num FROM alembic_version"]
+
+    async def test_upgrade_converges_legacy_create_all_database(self, sqlite_engine):
+        """Prueba que una base creada con create_all (sin alembic_version) reciba las columnas nuevas."""
+        async with sqlite_engine.begin() as conn:
+            await conn.execute(text(
+                "CREATE TABLE backup_logs (id INTEGER PRIMARY KEY, backup_type VARCHAR(50) NOT NULL, "
+                "file_path VARCHAR(500) NOT NULL, file_size INTEGER, status VARCHAR(20) NOT NULL, "
+                "started_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, completed_at DATETIME, error_message TEXT)"
+            ))
+            await conn.execute(text(
+                "INSERT INTO backup_logs (backup_type, file_path, status) VALUES ('manual', '/backups/a', 'success')"
+            ))
+
+        await ensure_schema(sqlite_engine, mode="upgrade")
+
+        assert {"progress", "tables_total", "tables_done", "details"} <= await table_columns(sqlite_engine, "backup_logs")
+        assert "token_version" in await table_columns(sqlite_engine, "users")
+        async with sqlite_engine.connect() as conn:
+            progress = (await conn.execute(text("SELECT progress FROM backup_logs"))).scalar_one()
+        assert progress == 0
@@ -0,0 +1,30 @@
+"""
+Pruebas para el núcleo de formateo de números y montos.
+"""
+
+from decimal import Decimal
+
+from src.services.number_formatting import format_currencies, format_number, format_numbers
+
+
+class TestNumberFormatting:
+    """Pruebas del formateo con mini-lenguaje de formato y cambio de separadores."""
+
+    def test_format_number_with_custom_separators(self):
+        """Prueba separadores argentinos, por defecto y personalizados."""
+        assert format_number(1234567.891) == "1.234.567,89"
+        assert format_number(-1234.5, 2, ",", ".") == "-1,234.50"
+        assert format_number(1234567, 0, " ", ",") == "1 234 567"
+        assert format_number(Decimal("999.999"), 2) == "1.000,00"
+
+    def test_batch_matches_single_value(self):
+        """Prueba que el lote produzca lo mismo que el formateo individual."""
+        values = [0, 0.5, -12.345, 1000, 9876543.21, Decimal("15.05")]
+
+        assert format_numbers(values, 2, ".", ",") == [format_number(value, 2, ".", ",") for value in values]
+        assert format_numbers([], 2) == []
+
+    def test_format_currencies(self):
+        """Prueba la posición del símbolo de moneda."""
+        assert format_currencies([1500, -2.5]) == ["$ 1.500,00", "$ -2,50"]
+        assert format_currencies([1500], "€", "after", 2, ".", ",") == ["1.500,00 €"]
@@ -0,0 +1,156 @@
+"""
+Pruebas de la resolución CUIT -> Partner: índice en memoria, partners
+esqueleto y vinculación en segundo plano.
+"""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.models.invoice import Invoice
+from src.models.partner import Partner
+from src.models.user import User
+from src.services import partner_resolver as partner_resolver_module
+from src.services.partner_resolver import (
+    BackfillJob,
+    PartnerIndex,
+    PartnerResolver,
+    get_backfill_job,
+    run_backfill_job,
+    start_backfill_job,
+)
+
+
+@pytest.fixture
+async def session_factory(tmp_path, monkeypatch):
+    """Base SQLite con facturas y partners, y un índice CUIT->partner nuevo."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'partners.db'}")
+    tables = [User.__table__, Partner.__table__, Invoice.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.metadata.create_all(sync_conn, tables=tables))
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(partner_resolver_module, "partner_index", PartnerIndex(ttl_seconds=300))
+    monkeypatch.setattr(partner_resolver_module, "AsyncSessionLocal", factory)
+    yield factory
+    await engine.dispose()
+
+
+def age(index: PartnerIndex, seconds: float) -> None:
+    """Simula que pasaron `seconds` desde la última carga del índice."""
+    index._loaded_at -= seconds
+
+
+async def create_invoices(factory, cuits: list) -> None:
+    async with factory() as session:
+        user = User(email="carga@opendoors.com", hashed_password="x", full_name="Carga", role="admin")
+        session.add(user)
+        await session.flush()
+        session.add_all([
+            Invoice(user_id=user.id, filename=f"factura-{i}.pdf", cuit=cuit, razon_social=f"Proveedor {i}")
+            for i, cuit in enumerate(cuits)
+        ])
+        await session.commit()
+
+
+class TestPartnerIndex:
+    """Pruebas del índice CUIT->partner con TTL."""
+
+    async def test_index_refreshes_after_ttl(self, session_factory):
+        """Prueba que un partner nuevo solo aparezca tras vencer el TTL (o al invalidar)."""
+        index = PartnerIndex(ttl_seconds=60)
+
+        async with session_factory() as session:
+            session.add(Partner(name="Proveedor Uno", cuit="20-12345678-9"))
+            await session.commit()
+
+            assert await index.get(session, "20123456789") == 1
+            session.add(Partner(name="Proveedor Dos", cuit="30-11111111-2"))
+            await session.commit()
+
+            age(index, 59)
+            assert await index.get(session, "30-11111111-2") is None
+            age(index, 2)
+            assert await index.get(session, "30-11111111-2") == 2
+
+            session.add(Partner(name="Proveedor Tres", cuit="27-22222222-3"))
+            await session.commit()
+            index.invalidate()
+            assert await index.get(session, "27222222223") == 3
+            assert index.stats()["size"] == 3
+
+    async def test_invalid_cuit_skips_the_query(self, session_factory):
+        """Prueba que un CUIT inválido no dispare la carga del índice."""
+        index = PartnerIndex(ttl_seconds=60)
+
+        async with session_factory() as session:
+            assert await index.get(session, "no-es-cuit") is None
+
+        assert index.is_stale
+
+
+class TestSkeletonPartners:
+    """Pruebas de la creación de partners esqueleto."""
+
+    async def test_unknown_cuit_creates_skeleton_once(self, session_factory):
+        """Prueba que un CUIT desconocido cree un partner con CUIT formateado y se reutilice."""
+        async with session_factory() as session:
+            resolver = PartnerResolver(session)
+
+            assert await resolver.resolve("20123456789", "Proveedor SA") is None
+
+            partner_id = await resolver.resolve("20123456789", "Proveedor SA", "proveedor", auto_create=True)
+            again = await resolver.resolve("20-12345678-9", "Otro Nombre", auto_create=True)
+            await session.commit()
+
+            partners = (await session.execute(select(Partner))).scalars().all()
+            assert again == partner_id
+            assert [(p.name, p.cuit, p.business_type) for p in partners] == [
+                ("Proveedor SA", "20-12345678-9", "proveedor")
+            ]
+
+    async def test_name_collision_appends_cuit(self, session_factory):
+        """Prueba que si el nombre ya existe con otro CUIT se agregue el CUIT al nombre."""
+        async with session_factory() as session:
+            session.add(Partner(name="Proveedor SA", cuit="30-11111111-2"))
+            await session.commit()
+
+            partner_id = await PartnerResolver(session).resolve("20123456789", "Proveedor SA", auto_create=True)
+            await session.commit()
+
+            partner = await session.get(Partner, partner_id)
+            assert partner.name == "Proveedor SA (20-12345678-9)"
+
+
+class TestBackfillJob:
+    """Pruebas de la vinculación de facturas existentes en segundo plano."""
+
+    async def test_dry_run_counts_without_linking(self, session_factory):
+        """Prueba que el dry run cuente vinculables sin modificar facturas ni crear partners."""
+        async with session_factory() as session:
+            session.add(Partner(name="Proveedor Uno", cuit="20-12345678-9"))
+            await session.commit()
+        await create_invoices(session_factory, ["20123456789", "30-11111111-2", "20-12345678-9"])
+
+        job = await run_backfill_job(BackfillJob(options={"batch_size": 2, "auto_create": True, "dry_run": True}))
+
+        assert job.status == "completed"
+        assert job.stats == {"processed": 3, "linked": 2, "unresolved": 1}
+        async with session_factory() as session:
+            linked = (await session.execute(select(Invoice.partner_id))).scalars().all()
+            assert linked == [None, None, None]
+            assert len((await session.execute(select(Partner))).scalars().all()) == 1
+
+    async def test_started_job_links_invoices(self, session_factory):
+        """Prueba que el trabajo lanzado en segundo plano vincule y cree los partners faltantes."""
+        await create_invoices(session_factory, ["20123456789", "30-11111111-2", "20-12345678-9"])
+
+        job = start_backfill_job(batch_size=2, auto_create=True, requested_by=1)
+        assert get_backfill_job(job.id) is job
+        await job.task
+
+        assert job.to_dict()["status"] == "completed"
+        assert job.stats == {"processed": 3, "linked": 3, "unresolved": 0}
+        async with session_factory() as session:
+            invoices = (await session.execute(select(Invoice).order_by(Invoice.id))).scalars().all()
+            assert invoices[0].partner_id == invoices[2].partner_id
+            assert invoices[1].partner_id not in (None, invoices[0].partner_id)
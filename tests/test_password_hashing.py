@@ -0,0 +1,58 @@
+"""
+Pruebas de carga del hash de contraseñas fuera del event loop.
+"""
+
+import asyncio
+import time
+
+from src.core.security import (
+    get_password_hash,
+    hash_password_async,
+    needs_rehash,
+    verify_password_async,
+)
+
+
+async def _measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    """Mide cuánto se atrasa el event loop respecto de un tick fijo."""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+    return lags
+
+
+def _p99(values: list) -> float:
+    ordered = sorted(values)
+    return ordered[int(len(ordered) * 0.99) - 1] if ordered else 0.0
+
+
+class TestPasswordHashing:
+    """Pruebas del pool dedicado para bcrypt."""
+
+    async def test_verify_async(self):
+        """Prueba que la verificación asíncrona acepte y rechace correctamente."""
+        hashed = await hash_password_async("secreto123")
+
+        assert await verify_password_async("secreto123", hashed)
+        assert not await verify_password_async("otra", hashed)
+
+    async def test_login_burst_does_not_block_loop(self):
+        """Prueba que una ráfaga de logins no infle el p99 del resto de las peticiones."""
+        hashed = get_password_hash("secreto123")
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_measure_loop_lag(stop))
+
+        await asyncio.gather(*(verify_password_async("secreto123", hashed) for _ in range(20)))
+        stop.set()
+        lags = await probe
+
+        # Un solo bcrypt bloqueante (~250ms) ya superaría este límite
+        assert _p99(lags) < 0.05
+
+    def test_needs_rehash(self):
+        """Prueba la detección de hashes con un costo distinto al configurado."""
+        assert not needs_rehash(get_password_hash("secreto123"))
+        assert needs_rehash("$2b$04$" + "a" * 53)
+        assert not needs_rehash("no-es-bcrypt")
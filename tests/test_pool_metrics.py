@@ -0,0 +1,55 @@
+"""
+Pruebas para las métricas del pool de conexiones.
+"""
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.pool_metrics import InstrumentedQueuePool, pool_metrics
+
+
+@pytest.fixture
+async def small_engine(tmp_path):
+    """Engine SQLite con un pool de una conexión y sin overflow."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="test_pool",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1
+    )
+    pool_metrics.register("test_pool", engine)
+    yield engine
+    await engine.dispose()
+
+
+class TestPoolMetrics:
+    """Pruebas de la instrumentación del pool."""
+
+    async def test_checkouts_and_usage_are_reported(self, small_engine):
+        """Prueba que cada checkout quede contado y se vea la conexión en uso."""
+        before = pool_metrics.stats()["test_pool"]["checkouts"]
+
+        async with small_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            stats = pool_metrics.stats()["test_pool"]
+            assert stats["in_use"] == 1
+            assert stats["pool_size"] == 1
+
+        stats = pool_metrics.stats()["test_pool"]
+        assert stats["checkouts"] == before + 1
+        assert stats["in_use"] == 0
+        assert stats["checkout_ms"]["max"] >= stats["checkout_ms"]["p50"]
+
+    async def test_exhausted_pool_counts_timeouts(self, small_engine):
+        """Prueba que un checkout con el pool agotado se cuente como timeout."""
+        before = pool_metrics.stats()["test_pool"]["timeouts"]
+
+        async with small_engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with small_engine.connect():
+                    pass
+
+        assert pool_metrics.stats()["test_pool"]["timeouts"] == before + 1
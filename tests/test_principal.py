@@ -0,0 +1,98 @@
+"""
+Pruebas de las máscaras de permisos y de la revocación de tokens.
+"""
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core import principal as principal_module
+from src.core.config import settings
+from src.core.permissions import Permission, has_permission, role_mask
+from src.core.principal import Principal, TokenVersionMap, build_token_claims, get_current_principal
+from src.core.principal_cache import principal_cache
+from src.core.security import get_current_user
+from src.models.user import User
+
+
+@pytest.fixture
+async def session(tmp_path, monkeypatch):
+    """Sesión sobre SQLite con la tabla de usuarios y un mapa de versiones nuevo."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'principal.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.metadata.create_all(sync_conn, tables=[User.__table__]))
+    monkeypatch.setattr(principal_module, "token_versions", TokenVersionMap(refresh_seconds=60))
+    principal_cache.clear()
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    principal_cache.clear()
+    await engine.dispose()
+
+
+async def create_user(session: AsyncSession, role: str = "accountant") -> User:
+    user = User(email=f"{role}@opendoors.com", hashed_password="x", full_name=role, role=role)
+    session.add(user)
+    await session.commit()
+    return user
+
+
+def token_for(user: User) -> str:
+    return jwt.encode(build_token_claims(user), settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+class TestRoleMasks:
+    """Pruebas de la compilación de roles a máscaras de bits."""
+
+    def test_masks_follow_role_permissions(self):
+        """Prueba los permisos de cada rol a partir de la máscara compilada."""
+        superadmin = Principal(id=1, email="a@x.com", role="superadmin", permission_mask=role_mask("superadmin"))
+        accountant = Principal(id=2, email="c@x.com", role="accountant", permission_mask=role_mask("accountant"))
+
+        assert all(has_permission(superadmin, permission) for permission in Permission)
+        assert has_permission(accountant, Permission.INVOICE_APPROVE)
+        assert not has_permission(accountant, Permission.INVOICE_DELETE)
+        assert role_mask("rol-inexistente") == 0
+
+    def test_inactive_user_has_no_permissions(self):
+        """Prueba que un usuario inactivo no tenga permisos aunque su rol los otorgue."""
+        user = User(email="admin@x.com", role="admin", is_active=False)
+
+        assert not has_permission(user, Permission.INVOICE_VIEW)
+
+
+class TestTokenRevocation:
+    """Pruebas de la revocación por `token_version`."""
+
+    async def test_revoked_token_is_rejected_by_both_dependencies(self, session):
+        """Prueba que, tras revocar, el token anterior no pase ni por claims ni por la caché."""
+        user = await create_user(session)
+        old_token = token_for(user)
+
+        assert (await get_current_user(old_token, session)).id == user.id
+        assert (await get_current_principal(old_token, session)).permission_mask == role_mask("accountant")
+
+        await principal_module.token_versions.revoke(session, user.id)
+
+        for dependency in (get_current_user, get_current_principal):
+            with pytest.raises(HTTPException) as error:
+                await dependency(old_token, session)
+            assert error.value.status_code == 401
+
+        await session.refresh(user)
+        assert (await get_current_user(token_for(user), session)).id == user.id
+
+    async def test_inactive_user_is_rejected(self, session):
+        """Prueba que desactivar al usuario invalide sus tokens."""
+        user = await create_user(session)
+        token = token_for(user)
+        assert (await get_current_user(token, session)).id == user.id
+
+        user.is_active = False
+        await session.commit()
+        principal_cache.invalidate_user(user.id)
+        await principal_module.token_versions.revoke(session, user.id)
+
+        for dependency in (get_current_user, get_current_principal):
+            with pytest.raises(HTTPException):
+                await dependency(token, session)
@@ -0,0 +1,139 @@
+"""
+Pruebas de la caché del usuario autenticado: LRU, TTL e invalidación.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.api.routers import users as users_module
+from src.api.routers.users import UserUpdateRequest, delete_user, update_user
+from src.core import principal as principal_module
+from src.core import principal_cache as principal_cache_module
+from src.core.config import settings
+from src.core.principal import TokenVersionMap, build_token_claims
+from src.core.principal_cache import PrincipalCache, principal_cache
+from src.core.security import get_current_user
+from src.models.user import User
+
+
+class FakeClock:
+    """Reemplazo de time.monotonic controlable desde la prueba."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Reloj falso solo para el módulo de la caché."""
+    fake = FakeClock()
+    monkeypatch.setattr(principal_cache_module, "time", SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+@pytest.fixture
+async def session(tmp_path, monkeypatch):
+    """Sesión SQLite con un admin y un usuario, y un mapa de versiones nuevo."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.metadata.create_all(sync_conn, tables=[User.__table__]))
+    versions = TokenVersionMap(refresh_seconds=60)
+    monkeypatch.setattr(principal_module, "token_versions", versions)
+    monkeypatch.setattr(users_module, "token_versions", versions)
+    principal_cache.clear()
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        session.add_all([
+            User(email="admin@opendoors.com", hashed_password="x", full_name="Admin", role="admin"),
+            User(email="carga@opendoors.com", hashed_password="x", full_name="Carga", role="accountant"),
+        ])
+        await session.commit()
+        yield session
+    principal_cache.clear()
+    await engine.dispose()
+
+
+async def token_for(session: AsyncSession, user_id: int) -> str:
+    user = await session.get(User, user_id)
+    return jwt.encode(build_token_claims(user), settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def cached_user(user_id: int, email: str) -> User:
+    return User(id=user_id, email=email, hashed_password="secreto", full_name=email, role="viewer", is_active=True)
+
+
+class TestPrincipalCache:
+    """Pruebas de la caché LRU con TTL."""
+
+    def test_least_recently_used_is_evicted(self, clock):
+        """Prueba que al superar max_size se descarte el usuario usado hace más tiempo."""
+        cache = PrincipalCache(ttl_seconds=60, max_size=2)
+        cache.set("a@x.com", cached_user(1, "a@x.com"))
+        cache.set("b@x.com", cached_user(2, "b@x.com"))
+        assert cache.get("a@x.com") is not None
+
+        cache.set("c@x.com", cached_user(3, "c@x.com"))
+
+        assert cache.get("b@x.com") is None
+        assert cache.get("a@x.com").id == 1
+        assert cache.get("c@x.com").id == 3
+        assert cache.stats()["evictions"] == 1
+        # El usuario descartado ya no se puede invalidar por id
+        cache.invalidate_user(2)
+        assert cache.stats()["invalidations"] == 0
+
+    def test_entries_expire_after_ttl(self, clock):
+        """Prueba que una entrada venza al pasar el TTL y no guarde la contraseña."""
+        cache = PrincipalCache(ttl_seconds=30, max_size=10)
+        cache.set("a@x.com", cached_user(1, "a@x.com"))
+
+        clock.now += 30
+        hit = cache.get("a@x.com")
+        assert hit.email == "a@x.com"
+        assert hit.hashed_password is None
+
+        clock.now += 1
+        assert cache.get("a@x.com") is None
+        assert cache.stats()["size"] == 0
+
+    def test_disabled_cache_stores_nothing(self, clock):
+        """Prueba que con TTL 0 la caché quede desactivada."""
+        cache = PrincipalCache(ttl_seconds=0, max_size=10)
+        cache.set("a@x.com", cached_user(1, "a@x.com"))
+
+        assert cache.get("a@x.com") is None
+
+
+class TestInvalidation:
+    """Pruebas de la invalidación desde los endpoints de usuarios."""
+
+    async def test_update_invalidates_cached_user(self, session):
+        """Prueba que editar un usuario lo saque de la caché y la próxima petición vea el cambio."""
+        admin = await session.get(User, 1)
+        token = await token_for(session, 2)
+        assert (await get_current_user(token, session)).full_name == "Carga"
+        assert principal_cache.get("carga@opendoors.com") is not None
+
+        await update_user(2, UserUpdateRequest(full_name="Carga Editada"), db=session, current_user=admin)
+
+        assert principal_cache.get("carga@opendoors.com") is None
+        assert (await get_current_user(token, session)).full_name == "Carga Editada"
+
+    async def test_delete_invalidates_cached_user(self, session):
+        """Prueba que eliminar un usuario lo saque de la caché y sus tokens dejen de valer."""
+        admin = await session.get(User, 1)
+        token = await token_for(session, 2)
+        assert (await get_current_user(token, session)).is_active
+
+        await delete_user(2, db=session, current_user=admin)
+
+        assert principal_cache.get("carga@opendoors.com") is None
+        with pytest.raises(HTTPException) as error:
+            await get_current_user(token, session)
+        assert error.value.status_code == 401
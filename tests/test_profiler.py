@@ -0,0 +1,70 @@
+"""
+Pruebas del profiler de peticiones opcional.
+"""
+
+import cProfile
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.core.profiler import ProfilerMiddleware, ProfileStore
+
+
+def build_app(store: ProfileStore, sample_rate: float) -> FastAPI:
+    """App mínima con una ruta parametrizada detrás del profiler."""
+    app = FastAPI()
+
+    @app.get("/api/demo-profile/{item_id}")
+    async def get_item(item_id: int):
+        return {"total": sum(range(10_000)), "id": item_id}
+
+    app.add_middleware(ProfilerMiddleware, store=store, sample_rate=sample_rate)
+    return app
+
+
+class TestProfilerMiddleware:
+    """Pruebas de la captura y el guardado de perfiles."""
+
+    async def test_sampled_request_is_saved_with_metadata(self, tmp_path):
+        """Prueba que una petición muestreada deje el .prof y su metadata."""
+        store = ProfileStore(str(tmp_path), max_files=10)
+
+        async with AsyncClient(transport=ASGITransport(app=build_app(store, 1.0)), base_url="http://test") as client:
+            assert (await client.get("/api/demo-profile/7")).status_code == 200
+
+        [metadata] = store.list()
+        assert metadata["route"] == "/api/demo-profile/{item_id}"
+        assert metadata["path"] == "/api/demo-profile/7"
+        assert metadata["status"] == 200
+        assert metadata["reason"] == "sample"
+        assert store.profile_path(metadata["id"]) is not None
+        assert "get_item" in store.summary(metadata["id"])
+
+    async def test_header_requires_admin_token(self, tmp_path):
+        """Prueba que la cabecera X-Profile sin token de admin no perfile la petición."""
+        store = ProfileStore(str(tmp_path), max_files=10)
+
+        async with AsyncClient(transport=ASGITransport(app=build_app(store, 0.0)), base_url="http://test") as client:
+            response = await client.get("/api/demo-profile/1", headers={"X-Profile": "1", "Authorization": "Bearer invalido"})
+
+        assert response.status_code == 200
+        assert store.list() == []
+
+
+class TestProfileStore:
+    """Pruebas de retención y validación de ids."""
+
+    def test_prune_and_reject_invalid_ids(self, tmp_path):
+        """Prueba que se conserven los últimos perfiles y se rechacen ids arbitrarios."""
+        store = ProfileStore(str(tmp_path), max_files=2)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        profiler.disable()
+
+        ids = [store.save(profiler, {"method": "GET", "path": f"/{i}"}) for i in range(4)]
+
+        assert [profile["id"] for profile in store.list()] == ids[:1:-1]
+        assert store.profile_path("../../etc/passwd") is None
+        assert store.profile_path("20250101T000000000000-00000000") is None
+        assert all(store.profile_path(profile["id"]) for profile in store.list())
+        assert len(set(ids)) == 4
@@ -0,0 +1,83 @@
+"""
+Pruebas del conteo de consultas por petición y de `assert_max_queries`.
+"""
+
+import asyncio
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.query_stats import QueryStatsMiddleware, assert_max_queries, track_queries
+
+
+@pytest.fixture
+async def sqlite_engine():
+    """Engine SQLite en memoria."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    yield engine
+    await engine.dispose()
+
+
+async def run_queries(engine, count: int) -> None:
+    async with engine.connect() as conn:
+        for value in range(count):
+            await conn.execute(text("SELECT :value"), {"value": value})
+
+
+class TestQueryCounting:
+    """Pruebas de los contadores por contexto."""
+
+    async def test_assert_max_queries(self, sqlite_engine):
+        """Prueba que el helper pase dentro del límite y falle con las sentencias al superarlo."""
+        with assert_max_queries(3) as stats:
+            await run_queries(sqlite_engine, 3)
+        assert stats.count == 3
+        assert stats.total_seconds > 0
+
+        with pytest.raises(AssertionError, match="Se ejecutaron 6 consultas"):
+            with assert_max_queries(5):
+                await run_queries(sqlite_engine, 6)
+
+    async def test_concurrent_tasks_are_counted_separately(self, sqlite_engine):
+        """Prueba que dos tareas concurrentes no mezclen sus consultas."""
+        async def counted(count: int) -> int:
+            with track_queries() as stats:
+                await run_queries(sqlite_engine, count)
+            return stats.count
+
+        assert await asyncio.gather(counted(2), counted(7)) == [2, 7]
+
+    async def test_repeated_statement_flagged(self, sqlite_engine):
+        """Prueba que la misma sentencia repetida se informe como posible N+1."""
+        with track_queries() as stats:
+            await run_queries(sqlite_engine, 6)
+
+        assert stats.repeated() == [("SELECT ?", 6)]
+        assert "N+1? x6" in stats.summary()
+
+
+class TestQueryStatsMiddleware:
+    """Pruebas del middleware."""
+
+    async def test_server_timing_and_slow_request_log(self, sqlite_engine, caplog):
+        """Prueba la cabecera Server-Timing y el warning al superar el umbral."""
+        app = FastAPI()
+
+        @app.get("/items")
+        async def list_items():
+            await run_queries(sqlite_engine, 4)
+            return {"ok": True}
+
+        app.add_middleware(QueryStatsMiddleware, max_count=3, max_ms=10_000, server_timing=True)
+
+        with caplog.at_level(logging.WARNING, logger="src.core.query_stats"):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.get("/items")
+
+        assert response.status_code == 200
+        assert 'desc="4 queries"' in response.headers["server-timing"]
+        assert "GET /items: 4 consultas" in caplog.text
@@ -0,0 +1,151 @@
+"""
+Pruebas del almacenamiento de resultados crudos y de la re-derivación local.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.models.invoice import Invoice
+from src.models.partner import Partner
+from src.models.raw_extraction import RawExtraction
+from src.models.user import User
+from src.services import raw_extraction_store as raw_extraction_store_module
+from src.services.invoice_extraction import map_analyze_result
+from src.services.raw_extraction_store import RawExtractionStore
+
+CONTENT_HASH = "a" * 64
+
+RAW = {
+    "content": "FACTURA A\nCUIT: 20-12345678-9\nCAE: 71234567890123",
+    "documents": [{
+        "fields": {
+            "VendorName": {"value_type": "string", "value": "PROVEEDOR OCR"},
+            "InvoiceTotal": {"value_type": "currency", "value": {"amount": 999.0}},
+            "InvoiceDate": {"value_type": "date", "value": "2025-03-10"},
+        }
+    }],
+}
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Base SQLite con usuarios, partners, facturas y resultados crudos."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'raw.db'}")
+    tables = [User.__table__, Partner.__table__, Invoice.__table__, RawExtraction.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: User.metadata.create_all(sync_conn, tables=tables))
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def create_invoice(session: AsyncSession, extracted_data: dict) -> Invoice:
+    user = User(email="carga@opendoors.com", hashed_password="x", full_name="Carga", role="admin")
+    session.add(user)
+    await session.flush()
+    invoice = Invoice(
+        user_id=user.id,
+        filename="factura.pdf",
+        content_hash=CONTENT_HASH,
+        extracted_data=extracted_data,
+        invoice_direction="recibida"
+    )
+    session.add(invoice)
+    await session.commit()
+    return invoice
+
+
+class TestRawExtractionStore:
+    """Pruebas del guardado comprimido."""
+
+    async def test_save_only_flushes(self, session_factory):
+        """Prueba que save no haga commit y que un hash repetido no rompa la transacción."""
+        async with session_factory() as session:
+            # Transacción del llamador ya abierta (como en la subida de facturas)
+            session.add(User(email="carga@opendoors.com", hashed_password="x", full_name="Carga", role="admin"))
+            await session.flush()
+            store = RawExtractionStore(session)
+            await store.save(CONTENT_HASH, RAW)
+            await store.save(CONTENT_HASH, RAW)
+            assert await store.get(CONTENT_HASH) == RAW
+            await session.rollback()
+            assert await store.get(CONTENT_HASH) is None
+
+            await store.save(CONTENT_HASH, RAW)
+            await session.commit()
+
+        async with session_factory() as session:
+            assert await RawExtractionStore(session).get(CONTENT_HASH) == RAW
+
+
+class TestRederiveInvoices:
+    """Pruebas de la re-derivación sin llamadas a Azure."""
+
+    async def test_validated_values_are_kept_and_columns_filled(self, session_factory):
+        """Prueba que solo se completen campos faltantes y se actualicen las columnas fiscales."""
+        validated = {
+            "proveedor": "Proveedor Validado SA",
+            "total": 1210.0,
+            "tipo_factura": "B",
+            "necesita_revision": False,
+        }
+        async with session_factory() as session:
+            invoice = await create_invoice(session, validated)
+            await RawExtractionStore(session).save(CONTENT_HASH, RAW)
+            await session.commit()
+
+            stats = await RawExtractionStore(session).rederive_invoices(dry_run=True)
+            assert stats == {"processed": 1, "updated": 1, "missing_raw": 0}
+
+        async with session_factory() as session:
+            unchanged = await session.get(Invoice, invoice.id)
+            assert unchanged.extracted_data == validated
+            assert unchanged.cuit is None
+
+            stats = await RawExtractionStore(session).rederive_invoices()
+            assert stats["updated"] == 1
+
+        async with session_factory() as session:
+            updated = await session.get(Invoice, invoice.id)
+            assert updated.extracted_data["proveedor"] == "Proveedor Validado SA"
+            assert updated.extracted_data["total"] == 1210.0
+            assert updated.extracted_data["tipo_factura"] == "B"
+            assert updated.extracted_data["necesita_revision"] is False
+            assert updated.extracted_data["cuit_proveedor"] == "20-12345678-9"
+            assert updated.extracted_data["cae"] == "71234567890123"
+            assert updated.cuit == "20-12345678-9"
+            assert updated.razon_social == "Proveedor Validado SA"
+            assert updated.tipo_factura == "B"
+            assert Decimal(str(updated.total)) == Decimal("1210.00")
+
+            stats = await RawExtractionStore(session).rederive_invoices()
+            assert stats["updated"] == 0
+
+    async def test_changed_mapping_updates_populated_fields(self, session_factory, monkeypatch):
+        """Prueba que un cambio en el mapeo actualice campos ya cargados, salvo los validados por la IA."""
+        async with session_factory() as session:
+            invoice = await create_invoice(session, {"proveedor": "Proveedor Validado SA", "total": 1210.0})
+            await RawExtractionStore(session).save(CONTENT_HASH, RAW)
+            await session.commit()
+            await RawExtractionStore(session).rederive_invoices()
+
+        def improved_mapping(raw):
+            # Nueva versión del mapeo: otro formato de fecha y de CUIT
+            mapped = map_analyze_result(raw)
+            mapped.update({"fecha_emision": "2025-03-11", "cuit_proveedor": "27-12345678-0", "proveedor": "OCR"})
+            return mapped
+
+        monkeypatch.setattr(raw_extraction_store_module, "map_analyze_result", improved_mapping)
+        async with session_factory() as session:
+            stats = await RawExtractionStore(session).rederive_invoices()
+            assert stats["updated"] == 1
+
+        async with session_factory() as session:
+            updated = await session.get(Invoice, invoice.id)
+            assert updated.extracted_data["fecha_emision"] == "2025-03-11"
+            assert updated.extracted_data["cuit_proveedor"] == "27-12345678-0"
+            assert updated.extracted_data["proveedor"] == "Proveedor Validado SA"
+            assert updated.fecha_emision == date(2025, 3, 11)
+            assert updated.cuit == "27-12345678-0"
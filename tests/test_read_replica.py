@@ -0,0 +1,71 @@
+"""
+Pruebas para el ruteo de lecturas entre réplica y primario.
+"""
+
+from contextlib import asynccontextmanager
+
+from src.core.database import ReadReplicaRouter
+
+
+class FakeReplicaEngine:
+    """Engine mínimo que responde la consulta de lag con un valor fijo."""
+
+    def __init__(self, lag=0.0, error=None):
+        self.lag = lag
+        self.error = error
+        self.connections = 0
+
+    @asynccontextmanager
+    async def connect(self):
+        self.connections += 1
+        if self.error:
+            raise self.error
+        yield self
+
+    async def scalar(self, statement):
+        return self.lag
+
+
+class TestReadReplicaRouter:
+    """Pruebas del ruteo de lecturas."""
+
+    async def test_without_replica_reads_go_to_primary(self):
+        """Prueba que sin réplica configurada todo vaya al primario."""
+        router = ReadReplicaRouter(None)
+
+        assert await router.route() == "primary"
+        assert router.stats()["state"] == "disabled"
+        assert router.stats()["decisions"]["primary_no_replica"] == 1
+
+    async def test_healthy_replica_is_checked_once_per_interval(self):
+        """Prueba que una réplica al día reciba las lecturas con una sola medición."""
+        engine = FakeReplicaEngine(lag=1.5)
+        router = ReadReplicaRouter(engine, max_lag=30, check_interval=60)
+
+        for _ in range(5):
+            assert await router.route() == "replica"
+
+        assert engine.connections == 1
+        assert router.stats()["lag_seconds"] == 1.5
+        assert router.stats()["decisions"]["replica"] == 5
+
+    async def test_lagging_or_down_replica_falls_back_to_primary(self):
+        """Prueba la vuelta al primario con lag excesivo o réplica caída."""
+        lagging = ReadReplicaRouter(FakeReplicaEngine(lag=120), max_lag=30)
+        down = ReadReplicaRouter(FakeReplicaEngine(error=OSError("connection refused")))
+
+        assert await lagging.route() == "primary"
+        assert lagging.stats()["decisions"]["primary_lagging"] == 1
+
+        assert await down.route() == "primary"
+        assert down.stats()["state"] == "down"
+        assert down.stats()["check_failures"] == 1
+
+    async def test_replica_recovers_after_next_check(self):
+        """Prueba que la réplica vuelva a usarse cuando se recupera."""
+        engine = FakeReplicaEngine(error=OSError("connection refused"))
+        router = ReadReplicaRouter(engine, check_interval=0)
+
+        assert await router.route() == "primary"
+        engine.error = None
+        assert await router.route() == "replica"
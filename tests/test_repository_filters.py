@@ -0,0 +1,99 @@
+"""
+Pruebas para el DSL de filtros y el conteo de los repositorios.
+"""
+
+from datetime import date
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import Field, SQLModel
+
+from src.repositories.base import SQLAlchemyRepository
+from src.repositories.filters import compile_filters, filter_cache_info
+
+
+class FilterItem(SQLModel, table=True):
+    """Modelo mínimo para las pruebas del repositorio."""
+    __tablename__ = "test_filter_items"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str
+    status: str
+    issued: date
+    deleted_at: Optional[date] = None
+
+
+class FilterItemSchema(BaseModel):
+    name: str
+    status: str
+    issued: date
+
+
+@pytest.fixture
+async def repository():
+    """Repositorio sobre una base SQLite en memoria con datos de prueba."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(FilterItem.__table__.create)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        for index in range(10):
+            session.add(FilterItem(
+                name=f"Factura {index}",
+                status="approved" if index % 2 else "pending",
+                issued=date(2025, 1, index + 1),
+                deleted_at=date(2025, 2, 1) if index == 9 else None
+            ))
+        await session.commit()
+        yield SQLAlchemyRepository[FilterItem, FilterItemSchema, FilterItemSchema](session, FilterItem)
+
+    await engine.dispose()
+
+
+class TestRepositoryFilters:
+    """Pruebas del DSL de filtros."""
+
+    def test_operators_compile_to_sql(self):
+        """Prueba que cada operador genere la expresión esperada."""
+        conditions = compile_filters(FilterItem, {
+            "status": ["approved", "pending"],
+            "issued__gte": date(2025, 1, 1),
+            "issued__lte": date(2025, 1, 31),
+            "name__ilike": "%factura%",
+            "deleted_at__isnull": True,
+            "unknown_field": 1,
+        })
+        sql = " AND ".join(str(condition) for condition in conditions)
+
+        assert "test_filter_items.status IN" in sql
+        assert "test_filter_items.issued >=" in sql
+        assert "test_filter_items.issued <=" in sql
+        assert "lower(test_filter_items.name) LIKE lower(" in sql
+        assert "test_filter_items.deleted_at IS NULL" in sql
+        assert len(conditions) == 5
+
+    def test_plan_is_cached_per_shape(self):
+        """Prueba que la misma forma de filtro reutilice el plan compilado."""
+        compile_filters(FilterItem, {"status": "approved", "issued__gte": date(2025, 1, 1)})
+        hits = filter_cache_info().hits
+        compile_filters(FilterItem, {"issued__gte": date(2025, 3, 1), "status": "pending"})
+
+        assert filter_cache_info().hits == hits + 1
+
+    async def test_count_and_get_multi_with_count(self, repository):
+        """Prueba el conteo con COUNT(*) y la página con total en una consulta."""
+        filters = {"status": "approved", "deleted_at__isnull": True}
+
+        assert await repository.count() == 10
+        assert await repository.count(filters) == 4
+
+        items, total = await repository.get_multi_with_count(skip=1, limit=2, filters=filters)
+        assert total == 4
+        assert len(items) == 2
+        assert all(item.status == "approved" for item in items)
+
+        items, total = await repository.get_multi_with_count(skip=50, limit=2, filters=filters)
+        assert items == []
+        assert total == 4
@@ -0,0 +1,76 @@
+"""
+Pruebas para la caché versionada de configuraciones del sistema.
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.settings_cache import settings_cache
+from src.models.system_settings import SystemSettings
+from src.services.system_settings_service import SystemSettingsService
+
+
+@pytest.fixture
+async def counted_session_factory(tmp_path):
+    """Base SQLite con `system_settings` y un contador de sentencias."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'settings.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SystemSettings.__table__.create)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    settings_cache.bump()
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False), statements
+    await engine.dispose()
+
+
+class TestSettingsCache:
+    """Pruebas de la caché de configuraciones."""
+
+    async def test_formatting_is_served_from_cache(self, counted_session_factory):
+        """Prueba que, con la caché caliente, formatear no consulte la base."""
+        session_factory, statements = counted_session_factory
+        async with session_factory() as session:
+            service = SystemSettingsService(session)
+            await service.format_currency(10)
+
+            statements.clear()
+            for amount in range(100):
+                await service.format_currency(amount)
+                await service.format_number(amount)
+
+            assert statements == []
+
+    async def test_set_setting_bumps_version(self, counted_session_factory):
+        """Prueba que guardar una configuración invalide la caché."""
+        session_factory, statements = counted_session_factory
+        async with session_factory() as session:
+            service = SystemSettingsService(session)
+            assert await service.format_number(1234.5) == "1.234,50"
+
+            version = settings_cache.version
+            await service.set_number_format_settings({
+                "thousands_separator": ",",
+                "decimal_separator": ".",
+                "decimal_places": 1
+            })
+
+            assert settings_cache.version == version + 1
+            assert await service.format_number(1234.5) == "1,234.5"
+
+    async def test_notification_from_other_worker_invalidates(self, counted_session_factory):
+        """Prueba que un NOTIFY recibido fuerce la recarga en la próxima lectura."""
+        session_factory, statements = counted_session_factory
+        async with session_factory() as session:
+            service = SystemSettingsService(session)
+            await service.get_ui_settings()
+            assert settings_cache.is_fresh()
+
+            settings_cache._on_notification(None, 0, "system_settings_changed", "ui_settings")
+
+            assert not settings_cache.is_fresh()
+            statements.clear()
+            await service.get_ui_settings()
+            assert len(statements) == 1
@@ -0,0 +1,83 @@
+"""
+Presupuesto de tiempo de importación de la aplicación (`python -X importtime`).
+
+Cada worker de uvicorn y cada corrida de pruebas importa `src.main`; los
+agentes de IA y los SDKs de Azure/OpenAI se cargan recién en el primer uso.
+
+El tiempo medido depende de la máquina, así que el presupuesto solo se
+verifica si se define IMPORT_TIME_BUDGET_MS (por ejemplo en un runner de CI
+dedicado):
+
+    IMPORT_TIME_BUDGET_MS=1500 pytest tests/test_startup_time.py
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_TIME_BUDGET_MS = os.getenv("IMPORT_TIME_BUDGET_MS", "")
+
+requires_time_budget = pytest.mark.skipif(
+    not IMPORT_TIME_BUDGET_MS,
+    reason="Requiere IMPORT_TIME_BUDGET_MS (depende del tiempo de reloj de la máquina)"
+)
+
+# Paquetes que solo deben cargarse al procesar facturas o analizar con IA
+LAZY_PACKAGES = ("langgraph", "langchain_core", "langchain_openai", "openai", "azure")
+
+
+def import_profile(module: str = "src.main") -> Dict[str, int]:
+    """
+    Importa un módulo en un proceso nuevo y devuelve el tiempo acumulado por módulo.
+
+    Returns:
+        Nombre de módulo -> microsegundos acumulados (incluye sus imports)
+    """
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    # La primera corrida compila los .pyc; se mide la segunda
+    subprocess.run(command, cwd=ROOT, capture_output=True)
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def top_level_packages(profile: Dict[str, int]) -> List[str]:
+    """Paquetes raíz importados (ej: "azure" para "azure.storage.blob")."""
+    return sorted({name.split(".")[0] for name in profile})
+
+
+class TestStartupTime:
+    """Pruebas del costo de arranque de la aplicación."""
+
+    def test_ai_sdks_are_not_imported_at_startup(self):
+        """Prueba que importar la aplicación no cargue los agentes ni los SDKs de IA."""
+        profile = import_profile()
+
+        loaded = [package for package in LAZY_PACKAGES if package in top_level_packages(profile)]
+        assert loaded == []
+        assert not any(name.startswith("src.agents.") for name in profile)
+
+    @requires_time_budget
+    def test_import_time_within_budget(self):
+        """Prueba que `import src.main` no supere el presupuesto de tiempo."""
+        profile = import_profile()
+        budget_ms = float(IMPORT_TIME_BUDGET_MS)
+
+        elapsed_ms = profile["src.main"] / 1000
+        slowest = sorted(profile.items(), key=lambda item: item[1], reverse=True)[:10]
+        assert elapsed_ms <= budget_ms, (
+            f"import src.main tardó {elapsed_ms:.0f} ms (presupuesto {budget_ms:.0f} ms). "
+            f"Más lentos: {slowest}"
+        )